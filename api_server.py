@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import instrumentation
+from csv_export import record_csv
+from experience_record import EXPORT_COLUMNS, HANDBOOK_CRITERIA, RATING_COLUMNS, ExperienceRecord
+from render_cache import pdf_cache, stable_hash
+
+# Listening address and PDF render processes (overridable through the environment)
+DEFAULT_HOST = os.environ.get("BEC_API_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("BEC_API_PORT", 8600))
+DEFAULT_WORKERS = int(os.environ.get("BEC_API_WORKERS", os.cpu_count() or 1))
+# Largest request body accepted, in bytes
+MAX_BODY = int(os.environ.get("BEC_API_MAX_BODY", 1024 * 1024))
+# Requests read ahead on one connection while earlier responses are still being produced
+PIPELINE_DEPTH = int(os.environ.get("BEC_API_PIPELINE", 32))
+MAX_HEADER = 16 * 1024
+# PDFs share the form's cache namespace: the same data renders the same document
+PDF_NAMESPACE = "version5"
+
+_EXPORT_KEYS = frozenset(EXPORT_COLUMNS)
+_pool = None
+
+
+# An error response raised anywhere while handling a request; errors reading a request also
+# close its connection, since the next request cannot be found in the stream
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# One parsed request; keep_alive is False once the client asked to close the connection
+class Request:
+    __slots__ = ("method", "path", "headers", "body", "keep_alive")
+
+    def __init__(self, method, path, headers, body, keep_alive):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.keep_alive = keep_alive
+
+
+# Function to check a posted experience against the version5 data shape and return it in that
+# order as strings; raises HTTPError(400) naming what is wrong
+def validate(payload):
+    if not isinstance(payload, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a JSON object of version5 report fields")
+    missing = [key for key in EXPORT_COLUMNS if key not in payload]
+    unknown = sorted(set(payload) - _EXPORT_KEYS)
+    if missing or unknown:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "; ".join(
+            part for part in (missing and f"missing fields: {', '.join(missing)}",
+                              unknown and f"unknown fields: {', '.join(unknown)}") if part
+        ))
+    data = {}
+    for key in EXPORT_COLUMNS:
+        value = payload[key]
+        # Numbers are accepted where the form sends digits (the ratings)
+        if isinstance(value, bool) or not isinstance(value, (str, int)):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{key!r} must be a string")
+        data[key] = str(value)
+    # Every criterion is rated; an empty rating would otherwise be stored as 0
+    unrated = [key for key in RATING_COLUMNS if not (data[key].isascii() and data[key].isdigit() and int(data[key]) <= 10)]
+    if unrated:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"handbook ratings must be 0 to 10 for all {len(HANDBOOK_CRITERIA)}"
+                                                f" criteria: {', '.join(unrated)}")
+    try:
+        record = ExperienceRecord.from_data(data, "version5")
+    except ValueError as error:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid field value: {error}") from None
+    if not 1 <= (record.customer_service_rating or 0) <= 5:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "'Customer Service Rating' must be 1 to 5")
+    if record.experience_date is None:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "'Experience Date' is required (YYYY-MM-DD)")
+    return data
+
+
+def _render_pdf(data):
+    from report_pdf import render_experience
+
+    return render_experience(data)
+
+
+async def csv_report(data):
+    return HTTPStatus.OK, "text/csv; charset=utf-8", record_csv(data)
+
+
+# CPU-bound rendering runs in the process pool so the event loop keeps reading requests
+async def pdf_report(data):
+    key = stable_hash(data, PDF_NAMESPACE)
+    payload = pdf_cache.get(key)
+    if payload is None:
+        payload = await asyncio.get_running_loop().run_in_executor(_pool, _render_pdf, data)
+        pdf_cache.put(key, payload)
+    return HTTPStatus.OK, "application/pdf", payload
+
+
+# Saving goes through the same single writer as the forms; its blocking wait runs on a thread
+async def store_report(data):
+    from write_queue import WriterBusy, commit_report
+
+    try:
+        submission_id = await asyncio.to_thread(commit_report, data, "version5")
+    except WriterBusy as error:
+        raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, str(error)) from None
+    except TimeoutError:
+        raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "the report is queued but not saved yet") from None
+    return HTTPStatus.CREATED, "application/json", json.dumps({"id": submission_id}).encode()
+
+
+# POST path -> handler taking the validated data
+ROUTES = {
+    "/reports.csv": csv_report,
+    "/reports.pdf": pdf_report,
+    "/reports": store_report,
+}
+
+
+async def respond(request):
+    start = time.perf_counter()
+    try:
+        if request.path == "/health":
+            if request.method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use GET")
+            return HTTPStatus.OK, "application/json", b'{"status":"ok"}'
+        handler = ROUTES.get(request.path)
+        if handler is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no such endpoint: {request.path}")
+        if request.method != "POST":
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST with a JSON body")
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "the body is not valid JSON") from None
+        return await handler(validate(payload))
+    except HTTPError as error:
+        return _error(error)
+    except Exception as error:
+        # A failed render or save answers this request only; the connection carries on
+        return _error(HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(error).__name__}: {error}"))
+    finally:
+        if instrumentation.ENABLED:
+            instrumentation.registry.observe(f"api {request.path}", time.perf_counter() - start)
+            instrumentation.registry.flush()
+
+
+def _error(error):
+    return error.status, "application/json", json.dumps({"error": str(error)}).encode()
+
+
+def _encode(status, content_type, body, keep_alive):
+    head = (f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n")
+    if not keep_alive:
+        head += "Connection: close\r\n"
+    return head.encode("latin-1") + b"\r\n" + body
+
+
+# Function to read the next request off a connection; None at a clean end of stream
+async def read_request(reader):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as error:
+        if error.partial.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "incomplete request") from None
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "request head too large") from None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, path, protocol = lines[0].split(" ")
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line") from None
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if protocol == "HTTP/1.1" else connection == "keep-alive"
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(HTTPStatus.NOT_IMPLEMENTED, "chunked bodies are not supported; send Content-Length")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length") from None
+    if length > MAX_BODY:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"bodies are limited to {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, path.split("?", 1)[0], headers, body, keep_alive)
+
+
+# Function to serve one connection: requests are read and started as they arrive (pipelining),
+# and their responses are written back strictly in request order
+async def handle_connection(reader, writer):
+    responses = asyncio.Queue(PIPELINE_DEPTH)
+
+    async def send():
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            task, keep_alive = item
+            writer.write(_encode(*await task, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+
+    sender = asyncio.create_task(send())
+    try:
+        while not sender.done():
+            try:
+                request = await read_request(reader)
+            except HTTPError as error:
+                await responses.put((asyncio.create_task(_failed(error)), False))
+                break
+            if request is None:
+                break
+            await responses.put((asyncio.create_task(respond(request)), request.keep_alive))
+            if not request.keep_alive:
+                break
+        await responses.put(None)
+        await sender
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        sender.cancel()
+        writer.close()
+
+
+async def _failed(error):
+    return _error(error)
+
+
+async def serve(host, port, workers, ready=None):
+    global _pool
+    _pool = ProcessPoolExecutor(max_workers=workers)
+    # Start the workers now, so the first PDF requests do not pay for process start-up
+    await asyncio.gather(*(asyncio.get_running_loop().run_in_executor(_pool, _render_pdf, {})
+                           for _ in range(workers)))
+    server = await asyncio.start_server(handle_connection, host, port, limit=MAX_HEADER)
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+    address = server.sockets[0].getsockname()
+    print(f"serving on http://{address[0]}:{address[1]} with {workers} PDF workers", file=sys.stderr, flush=True)
+    if ready:
+        ready(address)
+    async with server:
+        await stop.wait()
+    _pool.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Headless JSON API: POST version5 report fields to /reports.csv, /reports.pdf or /reports."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="PDF render processes")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.host, args.port, args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
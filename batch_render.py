@@ -0,0 +1,107 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from experience_record import ExperienceRecord
+from report_pdf import render_sections
+from submission_store import DEFAULT_STORE_PATH, SubmissionStore
+
+# Per-record timings are appended here inside the output directory
+TIMINGS_FILE = "timings.csv"
+
+
+# Function to render one report's (title, body) sections to its output path; runs in a worker process
+def render_task(task):
+    name, sections, path = task
+    start = time.perf_counter()
+    payload = render_sections(sections)
+    # Write under a temporary name so an interrupted run never leaves a file that looks finished
+    partial = path + ".part"
+    with open(partial, "wb") as output:
+        output.write(payload)
+    os.replace(partial, path)
+    return name, time.perf_counter() - start, len(payload)
+
+
+# Function to yield (name, sections) pairs from a CSV export, one section per column
+def csv_records(path):
+    with open(path, newline="", encoding="utf-8") as source:
+        for number, row in enumerate(csv.DictReader(source), start=1):
+            yield f"row-{number:07d}", list(row.items())
+
+
+# Function to yield (name, sections) pairs from the store, laid out by each report's version
+# exactly as the bundle and combined report lay it out
+def store_records(store, start=None, end=None):
+    for rows in store.iter_chunks(start, end):
+        for row in rows:
+            yield f"report-{row['id']:07d}", ExperienceRecord.from_row(row).pdf_sections()
+
+
+# Function to render every record not yet rendered into output_dir, keeping a bounded number in flight
+def render_batch(records, output_dir, workers=None, on_done=None):
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    rendered = skipped = 0
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for name, sections in records:
+            path = os.path.join(output_dir, name + ".pdf")
+            if os.path.exists(path):
+                skipped += 1
+                continue
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rendered += 1
+                    if on_done:
+                        on_done(*future.result())
+            pending.add(executor.submit(render_task, (name, sections, path)))
+        for future in wait(pending).done:
+            rendered += 1
+            if on_done:
+                on_done(*future.result())
+    return rendered, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render one PDF per experience across all CPU cores.")
+    parser.add_argument("output_dir")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="CSV export to render instead of the store")
+    source.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--start", help="first Experience Date (YYYY-MM-DD), store only")
+    parser.add_argument("--end", help="last Experience Date (YYYY-MM-DD), store only")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        records = csv_records(args.csv)
+    else:
+        records = store_records(SubmissionStore(args.store), args.start, args.end)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timings_path = os.path.join(args.output_dir, TIMINGS_FILE)
+    new_file = not os.path.exists(timings_path)
+    start = time.perf_counter()
+    with open(timings_path, "a", newline="") as timings:
+        writer = csv.writer(timings)
+        if new_file:
+            writer.writerow(["record", "seconds", "bytes"])
+
+        def record_timing(name, seconds, size):
+            writer.writerow([name, f"{seconds:.4f}", size])
+
+        rendered, skipped = render_batch(records, args.output_dir, args.workers, record_timing)
+    elapsed = time.perf_counter() - start
+    rate = rendered / elapsed if elapsed else 0.0
+    print(f"rendered {rendered}, skipped {skipped} already rendered, {elapsed:.1f} s ({rate:.0f} PDFs/s) "
+          f"with {args.workers} workers; timings in {timings_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Filtered handbook-rating aggregates over a large in-memory ratings matrix.
+
+Run: python benchmarks/bench_analytics.py [--rows 500000]
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from synthetic import EMPLOYEES
+
+from ratings_analytics import CRITERIA_COUNT, RatingsMatrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, args.rows + 1)
+    dates = np.datetime64("2023-07-01") + rng.integers(0, 730, args.rows)
+    matrix = RatingsMatrix()
+    start = time.perf_counter()
+    matrix.append(
+        ids,
+        dates,
+        rng.integers(1, 6, args.rows),
+        rng.integers(0, 11, (args.rows, CRITERIA_COUNT)),
+        list(zip(ids.tolist(), rng.choice(EMPLOYEES, args.rows).tolist())),
+    )
+    print(f"load {args.rows} rows: {(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"ratings matrix {matrix.ratings.nbytes / 1e6:.1f} MB")
+
+    filters = [
+        dict(),
+        dict(start="2024-01-01", end="2024-06-30"),
+        dict(min_service=1, max_service=2),
+        dict(start="2023-10-01", end="2024-09-30", employees=(EMPLOYEES[0], EMPLOYEES[4])),
+    ]
+    for query in filters:
+        start = time.perf_counter()
+        matrix.criterion_summary(**query)
+        matrix.employee_means(**query)
+        matrix.period_means(**query)
+        cold = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        matrix.criterion_summary(**query)
+        matrix.employee_means(**query)
+        matrix.period_means(**query)
+        warm = (time.perf_counter() - start) * 1000
+        print(f"{str(query) or 'all rows':<90} {cold:7.1f} ms  (cached {warm:.2f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Date-range ZIP bundles: cold and cached build time, checked against a memory ceiling.
+
+Fills a fresh store with synthetic reports and bundles a date range twice: first
+with an empty PDF cache (every report renders in the worker pool), then again with
+every PDF coming from the cache, written to an unseekable sink as a web response
+would be. Checks that the archive holds one PDF per report and that its CSV matches
+csv_export byte for byte. Exits non-zero when the traced peak of the exporting
+process exceeds --ceiling-mb.
+
+Run: python benchmarks/bench_bundle.py [--reports 2000] [--workers N] [--ceiling-mb 16]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import date
+
+from synthetic import version5_reports
+
+from bundle_export import CSV_NAME, write_bundle
+from csv_export import stream_csv
+from render_cache import DiskCache
+from submission_store import SubmissionStore
+
+START, END = date(2023, 7, 1), date(2024, 6, 30)
+
+
+# Write-only sink that keeps nothing but a byte count, like a socket
+class Sink:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def timed_bundle(store, output, workers, cache):
+    tracemalloc.start()
+    start = time.perf_counter()
+    reports, rendered = write_bundle(store, output, START, END, workers, cache)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return reports, rendered, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=2000, help="reports in the store (about half fall in range)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--ceiling-mb", type=float, default=16.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(os.path.join(tmp, "bench.db"))
+        store.add_many(version5_reports(args.reports), "version5")
+        cache = DiskCache(os.path.join(tmp, "pdf_cache"))
+        path = os.path.join(tmp, "bundle.zip")
+
+        reports, rendered, cold, cold_peak = timed_bundle(store, path, args.workers, cache)
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+            csv_bytes = archive.read(CSV_NAME)
+        expected_csv = b"".join(stream_csv(store, START, END))
+        if len(names) != reports + 1 or csv_bytes != expected_csv:
+            print(f"MISMATCH: {len(names)} entries for {reports} reports, CSV equal: {csv_bytes == expected_csv}")
+            return 1
+        size = os.path.getsize(path)
+
+        sink = Sink()
+        _, warm_rendered, warm, warm_peak = timed_bundle(store, sink, args.workers, cache)
+        store.close()
+
+    print(f"{reports} reports in range, {size / 1e6:.1f} MB archive, {args.workers} workers")
+    print(f"  cold cache  {cold:6.2f} s ({reports / cold:6.0f} reports/s), {rendered} rendered, peak {cold_peak:.1f} MB")
+    print(f"  warm cache  {warm:6.2f} s ({reports / warm:6.0f} reports/s), {warm_rendered} rendered, "
+          f"peak {warm_peak:.1f} MB, {sink.size / 1e6:.1f} MB streamed")
+    peak = max(cold_peak, warm_peak)
+    if peak > args.ceiling_mb:
+        print(f"peak traced memory {peak:.1f} MB exceeds the {args.ceiling_mb:.0f} MB ceiling")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
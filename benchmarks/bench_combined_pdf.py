@@ -0,0 +1,46 @@
+"""Peak memory of the combined multi-experience PDF, checked against a fixed budget.
+
+Exits non-zero when the traced peak exceeds --budget-mb.
+Run: python benchmarks/bench_combined_pdf.py [--experiences 5000] [--budget-mb 16]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import version5_reports
+
+from combined_report import write_combined_report
+from experience_record import ExperienceRecord
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--experiences", type=int, default=5000)
+    parser.add_argument("--budget-mb", type=float, default=16.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "combined.pdf")
+        tracemalloc.start()
+        start = time.perf_counter()
+        records = (ExperienceRecord.from_data(data, "version5") for data in version5_reports(args.experiences))
+        pages = write_combined_report(records, path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = os.path.getsize(path)
+
+    peak_mb = peak / 1024 / 1024
+    print(f"{args.experiences} experiences, {pages} pages, {size / 1e6:.1f} MB file in {elapsed:.1f} s, "
+          f"peak traced memory {peak_mb:.1f} MB")
+    if peak_mb > args.budget_mb:
+        print(f"FAIL: peak memory above the {args.budget_mb:.0f} MB budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Per-item frequency and co-occurrence counts of Code of Conduct selections.
+
+Counts the same synthetic selections two ways: scanning the JSON lists of item
+sentences the store used to hold, and the vectorized bit operations over 16-bit
+masks in conduct_catalog. Also prints the size of both encodings in a CSV column.
+
+Run: python benchmarks/bench_conduct.py [--reports 2000000]
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+import synthetic  # noqa: F401  (puts the repository root on sys.path)
+from conduct_catalog import CONDUCT_ITEMS, co_occurrence, conduct_items, item_counts, mask_histogram
+
+
+# Function to count item and pair citations by scanning JSON lists of sentences
+def scan_counts(lists):
+    index = {item: bit for bit, item in enumerate(CONDUCT_ITEMS)}
+    counts = np.zeros(len(CONDUCT_ITEMS), dtype=np.int64)
+    pairs = np.zeros((len(CONDUCT_ITEMS), len(CONDUCT_ITEMS)), dtype=np.int64)
+    for text in lists:
+        bits = [index[item] for item in json.loads(text)]
+        for first in bits:
+            counts[first] += 1
+            for second in bits:
+                pairs[first, second] += 1
+    return counts, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=2_000_000)
+    parser.add_argument("--scan-reports", type=int, default=200_000, help="reports for the slower JSON scan")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Most reports cite nothing or one or two items
+    selected = rng.random((args.reports, len(CONDUCT_ITEMS))) < rng.choice([0.0, 0.05, 0.2], args.reports)[:, None]
+    masks = (selected.astype(np.uint16) << np.arange(len(CONDUCT_ITEMS), dtype=np.uint16)).sum(axis=1, dtype=np.uint16)
+
+    start = time.perf_counter()
+    counts = item_counts(masks)
+    pairs = co_occurrence(masks)
+    mask_seconds = time.perf_counter() - start
+    distinct = len(mask_histogram(masks)[0])
+
+    sample = masks[:args.scan_reports]
+    lists = [json.dumps(conduct_items(mask)) for mask in sample.tolist()]
+    start = time.perf_counter()
+    scan_item_counts, scan_pairs = scan_counts(lists)
+    scan_seconds = time.perf_counter() - start
+    if not (np.array_equal(scan_item_counts, item_counts(sample)) and np.array_equal(scan_pairs, co_occurrence(sample))):
+        print("MISMATCH between the JSON scan and the bitmask counts")
+        return 1
+
+    per_million = 1e6 / args.reports
+    print(f"{args.reports} reports, {distinct} distinct masks, {int(counts.sum())} citations, "
+          f"{int(pairs.sum())} co-occurring pairs")
+    print(f"  bitmask counts   {mask_seconds * per_million * 1000:8.1f} ms per million reports")
+    print(f"  JSON list scan   {scan_seconds * 1e6 / args.scan_reports * 1000:8.1f} ms per million reports")
+    list_bytes = sum(map(len, lists)) / len(lists)
+    mask_bytes = sum(len(str(mask)) for mask in sample.tolist()) / len(sample)
+    print(f"  CSV cell: {list_bytes:.0f} bytes as a list of sentences, {mask_bytes:.1f} bytes as a mask")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
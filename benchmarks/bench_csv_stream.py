@@ -0,0 +1,48 @@
+"""Peak memory of the streaming CSV export, checked against a fixed ceiling.
+
+Exits non-zero when the traced peak exceeds --ceiling-mb, so it can gate CI.
+Run: python benchmarks/bench_csv_stream.py [--rows 1000000] [--ceiling-mb 16]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic import version5_reports
+
+from csv_export import write_csv
+from submission_store import SubmissionStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--ceiling-mb", type=float, default=16.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(os.path.join(tmp, "bench.db"))
+        store.add_many(version5_reports(args.rows), "version5", batch_size=20000)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        written = write_csv(store, os.path.join(tmp, "export.csv"), chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        store.close()
+
+    peak_mb = peak / 1024 / 1024
+    print(f"exported {args.rows} rows, {written / 1e6:.0f} MB in {elapsed:.1f} s "
+          f"({args.rows / elapsed:,.0f} rows/s), peak traced memory {peak_mb:.1f} MB")
+    if peak_mb > args.ceiling_mb:
+        print(f"FAIL: peak memory above the {args.ceiling_mb:.0f} MB ceiling")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
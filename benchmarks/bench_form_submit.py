@@ -0,0 +1,76 @@
+"""Reruns and server CPU time for one completed version5 report.
+
+Compares every edit rerunning the script (BEC_BATCH_SUBMIT=0) with the
+batched form submission. Run: python benchmarks/bench_form_submit.py
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+SCRIPT = str(Path(__file__).resolve().parent.parent / "version5.py")
+
+TEXT = "Staff greeted me quickly and walked me through the job search tools."
+
+
+# Function to fill in a complete report the way a kiosk user would
+def complete_report(batch):
+    os.environ["BEC_BATCH_SUBMIT"] = "1" if batch else "0"
+    at = AppTest.from_file(SCRIPT, default_timeout=60)
+    reruns = 0
+    cpu = 0.0
+
+    def run():
+        nonlocal reruns, cpu
+        start = time.process_time()
+        at.run()
+        cpu += time.process_time() - start
+        reruns += 1
+        assert not at.exception, at.exception
+
+    run()
+
+    # The roster is interactive in both modes
+    at.text_input[0].input("Danielle")
+    run()
+    at.button[0].click()
+    run()
+
+    # Without the form every edit is committed, and rerun, on its own
+    edits = [(text_area, TEXT) for text_area in at.text_area]
+    edits += [(number_input, number_input.value + 1) for number_input in at.number_input]
+    edits += [(slider, 3) for slider in at.slider]
+    for widget, value in edits:
+        widget.set_value(value)
+        if not batch:
+            run()
+
+    # Saving waits for the submit button in both modes
+    at.button[-1].click()
+    run()
+
+    assert "report" in at.session_state
+    return reruns, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for label, batch in (("before (rerun per edit)", False), ("after (batched form)", True)):
+        runs = [complete_report(batch) for _ in range(args.repeat)]
+        reruns = runs[0][0]
+        cpu_ms = sorted(cpu for _, cpu in runs)[len(runs) // 2] * 1000
+        results[label] = (reruns, cpu_ms)
+        print(f"{label:<26} reruns/report={reruns:>3}  cpu/report={cpu_ms:8.1f} ms")
+
+    (before_reruns, before_cpu), (after_reruns, after_cpu) = results.values()
+    print(f"{'reduction':<26} reruns x{before_reruns / after_reruns:.1f}  cpu x{before_cpu / after_cpu:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Throughput of the bulk importer on historical exports in every version's CSV layout.
+
+Writes one synthetic export per layout (version1, version3, version4, version5) the
+way each version's convert_df_to_csv did, then times per layout: parsing (reading the
+CSV and normalizing it into store rows), and the whole import into a fresh store both
+row batch by row batch and in bulk mode (store.bulk_load, which builds the indexes,
+full-text index, roster and aggregates once at the end). The import rate is bounded by
+SQLite's write speed. Exits non-zero if any layout parses or bulk-imports slower than
+--min-rate rows per second.
+
+Run: python benchmarks/bench_import.py [--rows 200000] [--min-rate 100000]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import time as clock_time
+
+import pandas as pd
+from synthetic import version5_reports
+
+from bulk_import import import_csv, read_chunks, normalize_chunk
+from conduct_catalog import CONDUCT_ITEMS
+from experience_record import HANDBOOK_CRITERIA, RATING_COLUMNS
+from submission_store import SubmissionStore
+
+COMMON = (
+    "Customer Service Rating",
+    "Customer Service Feedback",
+    "Experience Date",
+    "Experience Time",
+    "Employee Activities",
+    "Actual Experience",
+    "Prescribed Activities",
+    "Prescribed Notes",
+    "Experience Notes",
+)
+
+
+# Function to write reports in the column layout (and cell reprs) a version's export used
+def write_export(path, version, count):
+    rng = random.Random(version)
+    rows = []
+    for report in version5_reports(count):
+        row = {key: report[key] for key in COMMON}
+        row["Customer Service Rating"] = int(row["Customer Service Rating"])
+        hour, minute = map(int, report["Experience Time"].split(":"))
+        if version == "version5":
+            row["Employee Names"] = report["Employee Names"]
+            row.update({column: int(report[column]) for column in RATING_COLUMNS})
+        else:
+            # versions 1-4 exported datetime.time values
+            row["Experience Time"] = clock_time(hour, minute)
+        if version == "version1":
+            row = {"Name": report["Employee Names"].split(", ")[0], **row}
+            row["Selected Code of Conduct"] = rng.sample(CONDUCT_ITEMS, rng.randint(0, 3))
+        if version == "version4":
+            ratings = (report[f"Rating - {criterion}"] for criterion in HANDBOOK_CRITERIA)
+            row["Employee Handbook Ratings"] = dict(zip(HANDBOOK_CRITERIA, map(int, ratings)))
+        rows.append(row)
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--min-rate", type=float, default=100_000)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for version in ("version1", "version3", "version4", "version5"):
+            path = os.path.join(tmp, f"{version}.csv")
+            write_export(path, version, args.rows)
+            start = time.perf_counter()
+            detected, chunks = read_chunks(path)
+            parsed = sum(len(normalize_chunk(frame, detected, "")) for frame in chunks)
+            parse_seconds = time.perf_counter() - start
+            parse_rate = parsed / parse_seconds
+            megabytes = os.path.getsize(path) / 1e6
+            rates = {}
+            for bulk in (False, True):
+                store = SubmissionStore(os.path.join(tmp, f"{version}-{bulk}.db"))
+                start = time.perf_counter()
+                with store.bulk_load() if bulk else contextlib.nullcontext():
+                    detected, rows = import_csv(store, path)
+                rates[bulk] = rows / (time.perf_counter() - start)
+                store.close()
+            slow = [stage for stage, rate in (("parsing", parse_rate), ("bulk import", rates[True])) if rate < args.min_rate]
+            flag = f"  FAIL: {' and '.join(slow)} below {args.min_rate:,.0f} rows/s" if slow else ""
+            failed |= bool(flag)
+            print(f"{version}: {rows} rows detected as {detected}; parse {parse_rate:,.0f} rows/s"
+                  f" ({megabytes / parse_seconds:.0f} MB/s), import {rates[False]:,.0f} rows/s,"
+                  f" bulk import {rates[True]:,.0f} rows/s{flag}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Memory and export cost of ExperienceRecord versus the version5 data dict.
+
+Run: python benchmarks/bench_records.py [--records 200000]
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+import tracemalloc
+
+from synthetic import version5_reports
+
+from experience_record import ExperienceRecord
+
+
+# Function to measure the traced bytes retained by build()
+def retained_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, after - before
+
+
+# Function to time writing rows to an in-memory CSV
+def export_seconds(rows):
+    writer = csv.writer(io.StringIO(), lineterminator="\n")
+    start = time.perf_counter()
+    writer.writerows(rows)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # Ratings are the same strings in both layouts; shared free text keeps the comparison about structure
+    dicts, dict_bytes = retained_bytes(lambda: [dict(data) for data in version5_reports(args.records)])
+    records, record_bytes = retained_bytes(
+        lambda: [ExperienceRecord.from_data(data, "version5") for data in version5_reports(args.records)]
+    )
+    print(f"{args.records} reports")
+    print(f"  dict of str    {dict_bytes / args.records:7.0f} B/report")
+    print(f"  ExperienceRecord {record_bytes / args.records:5.0f} B/report ({record_bytes / dict_bytes:.0%})")
+    print(f"  CSV export: dicts {export_seconds(d.values() for d in dicts):.2f} s, "
+          f"records {export_seconds(r.csv_row() for r in records):.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
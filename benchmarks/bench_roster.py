@@ -0,0 +1,78 @@
+"""Employee roster: load time, prefix suggestions and fuzzy matches against a linear scan.
+
+Builds a statewide-sized roster of synthetic names in a fresh store, loads it the
+way the forms do (once per process), then times suggestions for typed prefixes of
+one to four letters through the bisect index and through a scan of every name,
+and a fuzzy match for a misspelled name. Exits non-zero when the two ways of
+suggesting disagree.
+
+Run: python benchmarks/bench_roster.py [--names 20000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from synthetic import EMPLOYEES
+
+from roster import Roster, name_key
+from submission_store import SubmissionStore
+
+SURNAMES = ["Anderson", "Johnson", "Nguyen", "Olson", "Vang", "Hassan", "Larson", "Thao", "Peterson", "Xiong"]
+
+
+# Function to time a call repeatedly and return the median in milliseconds
+def median_ms(call, repeat=200):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+# Suggestions as a plain list of (key, name) pairs would give them: every key checked word by word
+def scan(keyed, text, limit=8):
+    prefix = name_key(text)
+    found = [(not key.startswith(prefix), key, name) for key, name in keyed
+             if key.startswith(prefix) or f" {prefix}" in key]
+    return [name for _, _, name in sorted(found)[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    names = {f"{rng.choice(EMPLOYEES)}{rng.randrange(10 ** 4)} {rng.choice(SURNAMES)}" for _ in range(args.names)}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        for name in names:
+            store.add_to_roster(name)
+        print(f"{len(store.roster_names())} names saved in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        roster = Roster.load(store)
+        print(f"load once per process     {(time.perf_counter() - start) * 1000:8.1f} ms")
+        keyed = [(name_key(name), name) for name in roster.names()]
+        failed = False
+        for text in ("m", "ma", "mar", "marc", "ngu"):
+            # The index stops at the first eight matching entries, so compare the names it finds
+            if not set(roster.suggest(text)) <= set(scan(keyed, text, limit=len(keyed))) or not roster.suggest(text):
+                print(f"MISMATCH for {text!r}")
+                failed = True
+            indexed = median_ms(lambda: roster.suggest(text))
+            scanned = median_ms(lambda: scan(keyed, text), repeat=20)
+            print(f"suggest {text!r:<8} index {indexed:7.3f} ms | scan {scanned:8.1f} ms")
+        print(f"fuzzy 'Danelle4 Olsen'    {median_ms(lambda: roster.fuzzy('Danelle4 Olsen'), repeat=5):8.1f} ms")
+        store.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
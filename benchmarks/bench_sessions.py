@@ -0,0 +1,97 @@
+"""Session artifacts under many open tabs: resident memory with and without the budget.
+
+Simulates --tabs sessions that each hold a rendered PDF and a CSV, of which only
+--active keep rerunning while the rest sit idle, as on the shared server through a
+day. Runs once with an unbounded budget (everything stays in memory, as before)
+and once with --budget-mb, printing tracked resident bytes, process RSS growth
+and the latency of rehydrating a spilled artifact. Exits non-zero when the
+bounded run keeps more than the budget resident. The synthetic reports are
+latin-1, so their PDFs use the core font; reports that embed the Unicode font
+are about ten times larger.
+
+Run: python benchmarks/bench_sessions.py [--tabs 400] [--active 20] [--budget-mb 8]
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from synthetic import version5_reports
+
+from csv_export import record_csv
+from report_pdf import render_experience
+from session_budget import SessionArtifacts, SessionBudget
+
+IDLE_SECONDS = 0.5
+
+
+def rss_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+# Function to open every tab, then keep the active ones rerunning;
+# returns (budget, sessions, rehydration ms)
+def simulate(tabs, active, budget_bytes, idle_seconds, directory, documents):
+    budget = SessionBudget(budget_bytes, idle_seconds, directory)
+    rng = random.Random(0)
+    sessions = []
+    for number in range(tabs):
+        pdf, csv = documents[number % len(documents)]
+        session = SessionArtifacts(budget)
+        # Every session holds its own copy, as each render hands back new bytes
+        session.put("pdf", bytes(bytearray(pdf)))
+        session.put("csv", bytes(bytearray(csv)))
+        sessions.append(session)
+    # The tabs opened first go idle while the active ones keep rerunning
+    time.sleep(IDLE_SECONDS + 0.1)
+    for _ in range(2000):
+        rng.choice(sessions[-active:]).get("csv")
+    # Idle tabs coming back: their first download reads the PDF back from disk
+    timings = []
+    for session in rng.sample(sessions[:-active], 20):
+        start = time.perf_counter()
+        session.get("pdf")
+        timings.append(time.perf_counter() - start)
+    return budget, sessions, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tabs", type=int, default=400)
+    parser.add_argument("--active", type=int, default=20)
+    parser.add_argument("--budget-mb", type=float, default=8.0)
+    parser.add_argument("--documents", type=int, default=20, help="distinct reports rendered for the tabs")
+    args = parser.parse_args()
+
+    documents = [(render_experience(data), record_csv(data)) for data in version5_reports(args.documents)]
+    size = sum(len(pdf) + len(csv) for pdf, csv in documents) / len(documents)
+    print(f"{args.tabs} tabs, {args.active} active, {size / 1024:.0f} KB of artifacts per tab")
+
+    failed = False
+    # The bounded run goes first, so its RSS is not measured in memory the unbounded run freed
+    for label, budget_bytes, idle_seconds in (("budget", int(args.budget_mb * 1024 * 1024), IDLE_SECONDS),
+                                              ("unbounded", float("inf"), float("inf"))):
+        with tempfile.TemporaryDirectory() as directory:
+            before = rss_mb()
+            budget, sessions, rehydrate_ms = simulate(args.tabs, args.active, budget_bytes, idle_seconds,
+                                                      directory, documents)
+            grown = rss_mb() - before
+            stats = budget.stats()
+            print(f"  {label:<10} resident {stats['resident_bytes'] / 1e6:6.1f} MB, spilled "
+                  f"{stats['spilled_bytes'] / 1e6:6.1f} MB, RSS +{grown:6.1f} MB, "
+                  f"rehydrate {rehydrate_ms:.3f} ms")
+            if budget_bytes != float("inf") and stats["resident_bytes"] > budget_bytes:
+                print(f"  resident bytes exceed the {args.budget_mb:.0f} MB budget")
+                failed = True
+            del sessions
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Insert throughput, indexed lookup and full-text search latency of the submission store.
+
+Run: python benchmarks/bench_store.py [--rows 1000000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from synthetic import EMPLOYEES, version5_reports
+
+from submission_store import SubmissionStore
+
+
+# Function to time a query repeatedly and return the median in milliseconds
+def median_ms(query, repeat=200):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        store.add_many(version5_reports(args.rows), "version5", batch_size=20000)
+        elapsed = time.perf_counter() - start
+        print(f"generate+insert {args.rows} rows in {elapsed:.1f} s ({args.rows / elapsed:,.0f} rows/s)")
+
+        last = store.revision()
+        results = {
+            "point lookup by id": median_ms(lambda: store.get(last // 2)),
+            "week, first 50": median_ms(lambda: store.by_date_range("2024-03-01", "2024-03-07", limit=50)),
+            "one whole day": median_ms(lambda: store.by_date_range("2024-03-01", "2024-03-01"), repeat=20),
+            "employee, latest 50": median_ms(lambda: store.by_employee(EMPLOYEES[3], limit=50)),
+            "rating, latest 50": median_ms(lambda: store.by_rating(1, limit=50)),
+            # Running statistics: 16 rows however many reports name the employee
+            "scorecard, all time": median_ms(lambda: store.employee_stats(EMPLOYEES[3])),
+            "scorecard, one month": median_ms(lambda: store.employee_stats(EMPLOYEES[3], "2024-03")),
+            # Period rollups: 13 rows for a fiscal year's Incident Log, against recounting the reports
+            "incident log, FY2024": median_ms(lambda: store.fiscal_year_rollups(2024)),
+            "FY2024 by scanning": median_ms(lambda: store.query(
+                "SELECT substr(experience_date, 1, 7), customer_service_rating, COUNT(*) FROM submissions"
+                " WHERE experience_date BETWEEN '2023-07-01' AND '2024-06-30' GROUP BY 1, 2"), repeat=5),
+            # Rare terms, as incident searches are in practice
+            "rare term, ranked 20": median_ms(lambda: store.search("trespass", limit=20)),
+            "rare phrase, ranked 20": median_ms(lambda: store.search('"law enforcement"', limit=20)),
+            "rare term, 2024, 1-2": median_ms(
+                lambda: store.search("trespass", "2024-01-01", "2024-12-31", max_rating=2, limit=20)),
+            # A phrase in an eighth of all reports: ranking has to score every match
+            "common, newest 20": median_ms(lambda: store.search("suspension", limit=20, newest_first=True)),
+            "common, ranked 20": median_ms(lambda: store.search("suspension", limit=20), repeat=10),
+        }
+        for label, ms in results.items():
+            print(f"{label:<24} {ms:8.3f} ms")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
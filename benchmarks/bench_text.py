@@ -0,0 +1,82 @@
+"""Narrative text analytics: tokenizing, scoring and snapshot reuse at scale.
+
+Builds the term-document matrix of --reports synthetic version5 narratives (rows
+shaped as the store returns them, so the store itself is not part of the timing),
+scores every term against low customer service ratings and against one handbook
+criterion, saves and reloads the snapshot, and appends another 1% of reports as
+an incremental run would. Exits non-zero when the full build and score take
+longer than --max-seconds.
+
+Run: python benchmarks/bench_text.py [--reports 1000000] [--max-seconds 300]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import version5_reports
+
+from experience_record import HANDBOOK_CRITERIA, TEXT_FIELDS
+from submission_store import normalize_record
+from text_analytics import TextIndex
+
+
+# Function to generate submissions rows (id, customer_service_rating, handbook_ratings, *TEXT_FIELDS)
+def narrative_rows(count, first_id=1, seed=0):
+    for row_id, data in enumerate(version5_reports(count, seed=seed), start=first_id):
+        row = normalize_record(data, "version5")
+        yield (row_id, row["customer_service_rating"], row["handbook_ratings"], *(row[field] for field in TEXT_FIELDS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=1_000_000)
+    parser.add_argument("--max-seconds", type=float, default=300.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = list(narrative_rows(args.reports))
+    print(f"generated {len(rows)} narratives in {time.perf_counter() - start:.1f} s (not counted)")
+
+    index = TextIndex()
+    start = time.perf_counter()
+    index.add_rows(rows)
+    built = time.perf_counter() - start
+    del rows
+    print(f"tokenize + CSR   {built:7.1f} s ({args.reports / built:,.0f} reports/s), {len(index.terms)} terms, "
+          f"{len(index.indices) / 1e6:.1f}M entries, {(index.indices.nbytes + index.counts.nbytes) / 1e6:.0f} MB")
+
+    start = time.perf_counter()
+    service = index.associations()
+    scored = time.perf_counter() - start
+    print(f"score service    {scored:7.1f} s, {len(service)} terms kept")
+    start = time.perf_counter()
+    index.associations(HANDBOOK_CRITERIA[1])
+    print(f"score criterion  {time.perf_counter() - start:7.1f} s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "text_index.npz")
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        index = TextIndex.load(path)
+        print(f"snapshot save {saved:.1f} s, load {time.perf_counter() - start:.1f} s, "
+              f"{os.path.getsize(path) / 1e6:.0f} MB")
+
+    extra = list(narrative_rows(max(args.reports // 100, 1), first_id=args.reports + 1, seed=1))
+    start = time.perf_counter()
+    index.add_rows(extra)
+    index.associations()
+    print(f"append 1% + rescore {time.perf_counter() - start:6.1f} s")
+
+    total = built + scored
+    if total > args.max_seconds:
+        print(f"build and score took {total:.0f} s, over the {args.max_seconds:.0f} s limit")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Per-render cost of the Unicode (embedded TrueType) PDF path against the latin-1 core font path.
+
+Renders the same version5 reports, with curly quotes, dashes and non-Latin names
+in the free text, three ways: the core Arial font (text substituted to latin-1),
+ReportPDF with the process-wide cached TTF subset, and plain FPDF add_font(uni=True)
+re-parsing and re-subsetting the font for every document.
+
+Run: python benchmarks/bench_unicode_pdf.py [--font /path/to/DejaVuSans.ttf] [--reports 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from synthetic import version5_reports
+
+import fpdf
+from report_pdf import TTF_PATHS, ReportPDF, render_experience
+
+UNICODE_TEXT = "Customer said “great service” — Łukasz, Zoë and Nguyễn helped… "
+
+
+class Latin1PDF(ReportPDF):
+    ttf_paths = {}
+
+
+# add_font() on every instance, without fpdf's on-disk metrics cache
+class UncachedUnicodePDF(ReportPDF):
+    ttf_paths = {}
+
+    def __init__(self, data=None):
+        super().__init__(data)
+        self.font_name = 'uncached'
+        for style in ('', 'B', 'I'):
+            self.add_font(self.font_name, style, UncachedUnicodePDF.font_path, uni=True)
+
+    def _putfonts(self):
+        fpdf.FPDF._putfonts(self)
+
+    def chapter_body(self, body):
+        self.set_font(self.font_name, '', 12)
+        self.multi_cell(0, 10, body)
+        self.ln()
+
+
+def unicode_reports(count):
+    for data in version5_reports(count):
+        data["Customer Service Feedback"] = UNICODE_TEXT * 8
+        data["Employee Names"] = "Łukasz, Zoë, Nguyễn"
+        yield data
+
+
+def per_render_ms(pdf_class, reports):
+    timings = []
+    size = 0
+    for data in reports:
+        start = time.perf_counter()
+        size += len(render_experience(data, pdf_class))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, size / len(reports)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--font", default=TTF_PATHS[''], help="TrueType file with Unicode coverage")
+    parser.add_argument("--reports", type=int, default=200)
+    args = parser.parse_args()
+    if not args.font:
+        parser.error("--font is required without BEC_PDF_FONT or an installed DejaVu Sans")
+
+    fpdf.set_global("FPDF_CACHE_MODE", 1)
+    UncachedUnicodePDF.font_path = args.font
+
+    class UnicodePDF(ReportPDF):
+        ttf_paths = {'': args.font}
+
+    reports = list(unicode_reports(args.reports))
+    start = time.perf_counter()
+    render_experience(reports[0], UnicodePDF)
+    first_ms = (time.perf_counter() - start) * 1000
+
+    latin1_ms, latin1_size = per_render_ms(Latin1PDF, reports)
+    unicode_ms, unicode_size = per_render_ms(UnicodePDF, reports)
+    uncached_ms, uncached_size = per_render_ms(UncachedUnicodePDF, reports[:20])
+
+    print(f"{args.reports} reports, font {os.path.basename(args.font)} ({os.path.getsize(args.font) / 1024:.0f} KB)")
+    print(f"  latin-1 core font     {latin1_ms:7.2f} ms/render  {latin1_size / 1024:6.1f} KB")
+    print(f"  cached TTF subset     {unicode_ms:7.2f} ms/render  {unicode_size / 1024:6.1f} KB"
+          f"  ({unicode_ms / latin1_ms:.2f}x latin-1; first render {first_ms:.0f} ms)")
+    print(f"  add_font per PDF      {uncached_ms:7.2f} ms/render  {uncached_size / 1024:6.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
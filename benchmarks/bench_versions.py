@@ -0,0 +1,155 @@
+"""Rerun latency, CSV and PDF cost of every entry script, with regression thresholds.
+
+Times a full headless init_main() rerun of version1.py to version5.py through
+Streamlit's AppTest, then microbenchmarks each version's convert_df_to_csv and
+download_pdf on three payloads: empty fields, 10 KB free text in every text
+field, and all 13 code-of-conduct items selected (versions 1 and 2 only). That the
+CSV bytes match pandas' DataFrame.to_csv, which they replaced, is checked by
+tests/test_versions.py, along with each version's import-time budget.
+
+Results go to a JSON file. Any metric slower than its entry in the thresholds
+file makes the script exit non-zero.
+
+Run: python benchmarks/bench_versions.py [--output bench_results.json]
+     python benchmarks/bench_versions.py --write-thresholds   # re-baseline
+"""
+import argparse
+import importlib
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import date, time as clock_time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from conduct_catalog import CURRENT_CATALOG, conduct_mask  # noqa: E402
+from experience_record import HANDBOOK_CRITERIA  # noqa: E402
+
+VERSIONS = ("version1", "version2", "version3", "version4", "version5")
+THRESHOLDS = Path(__file__).resolve().parent / "thresholds.json"
+TEXT_FIELDS = (
+    "Customer Service Feedback",
+    "Employee Activities",
+    "Actual Experience",
+    "Prescribed Activities",
+    "Prescribed Notes",
+    "Experience Notes",
+)
+TEN_KB = ("The resource area was busy but staff checked in with every customer. " * 150)[:10 * 1024]
+
+
+# Function to build the data dict a version's init_main() would export for a payload
+def make_data(module, payload):
+    text = TEN_KB if payload == "10kb" else ""
+    fields = {
+        "Customer Service Rating": 3,
+        "Customer Service Feedback": text,
+        "Experience Date": date(2024, 3, 1),
+        "Experience Time": clock_time(10, 30),
+        **{field: text for field in TEXT_FIELDS[1:]},
+    }
+    name = module.__name__
+    if name == "version5":
+        data = {key: str(value) for key, value in fields.items()}
+        data["Experience Time"] = "10:30"
+        data["Employee Names"] = "Danielle"
+        data.update({f"Rating - {criterion}": "5" for criterion in HANDBOOK_CRITERIA})
+        return data
+    data = {key: [value] for key, value in fields.items()}
+    if name in ("version1", "version2"):
+        selected = list(module.code_of_conduct_items) if payload == "all_conduct" else []
+        data = {
+            "Name": ["Danielle"],
+            **data,
+            "Code of Conduct Mask": [conduct_mask(selected)],
+            "Conduct Catalog": [CURRENT_CATALOG],
+        }
+    if name == "version4":
+        data["Employee Handbook Ratings"] = [{criterion: 5 for criterion in HANDBOOK_CRITERIA}]
+    return data
+
+
+# Function to return the median wall time of fn in milliseconds
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def bench_rerun(version, repeat):
+    at = AppTest.from_file(str(ROOT / f"{version}.py"), default_timeout=60)
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{version} raised: {at.exception}")
+    return median_ms(at.run, repeat)
+
+
+def bench_exports(version, repeat):
+    module = importlib.import_module(version)
+    results = {}
+    for payload in ("empty", "10kb", "all_conduct"):
+        if payload == "all_conduct" and not hasattr(module, "code_of_conduct_items"):
+            continue
+        data = make_data(module, payload)
+        results[f"{version}.csv.{payload}"] = median_ms(lambda: module.convert_df_to_csv(data), repeat)
+        results[f"{version}.pdf.{payload}"] = median_ms(lambda: module.download_pdf(data), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--thresholds", default=str(THRESHOLDS))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--write-thresholds", action="store_true",
+                        help="store the measured times, with --headroom, as the new thresholds")
+    parser.add_argument("--headroom", type=float, default=2.0)
+    parser.add_argument("--min-threshold", type=float, default=5.0,
+                        help="floor for written thresholds, so sub-millisecond timings are not flaky")
+    args = parser.parse_args()
+
+    metrics = {}
+    for version in VERSIONS:
+        metrics[f"{version}.rerun"] = bench_rerun(version, args.repeat)
+        metrics.update(bench_exports(version, args.repeat))
+
+    thresholds = {}
+    if Path(args.thresholds).exists():
+        thresholds = json.loads(Path(args.thresholds).read_text())
+    regressions = {name: (ms, thresholds[name]) for name, ms in metrics.items()
+                   if name in thresholds and ms > thresholds[name]}
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "unit": "ms",
+        "metrics": metrics,
+        "thresholds": thresholds,
+        "regressions": sorted(regressions),
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    for name, ms in metrics.items():
+        limit = thresholds.get(name)
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<28} {ms:9.2f} ms" + (f"  (limit {limit:.2f}){flag}" if limit else ""))
+
+    if args.write_thresholds:
+        baseline = {name: round(max(ms * args.headroom, args.min_threshold), 2) for name, ms in metrics.items()}
+        Path(args.thresholds).write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"wrote thresholds to {args.thresholds}")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Load generator for the headless JSON API: throughput and latency per endpoint.
+
+Starts api_server.py on a free local port with a fresh store (or targets a running
+server with --port), then keeps --connections keep-alive connections busy, each
+pipelining up to --depth requests of synthetic version5 reports, for --seconds per
+endpoint. Prints requests/s and p50/p99 latency, and exits non-zero on any
+unexpected status or when an endpoint stays below --min-rate requests/s.
+
+Run: python benchmarks/load_api.py [--endpoints csv pdf reports] [--connections 16] [--depth 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import version5_reports
+
+ROOT = Path(__file__).resolve().parent.parent
+PATHS = {"csv": ("/reports.csv", 200), "pdf": ("/reports.pdf", 200), "reports": ("/reports", 201)}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)] * 1000
+
+
+# Function to read one response off the stream: (status, body)
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    length = next(int(line.split(":", 1)[1]) for line in lines if line.lower().startswith("content-length:"))
+    return int(lines[0].split(" ")[1]), await reader.readexactly(length)
+
+
+# Function to drive one pipelined connection until the deadline; appends latencies and failures
+async def connection(port, path, expected, bodies, depth, deadline, latencies, failures):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    slots = asyncio.Semaphore(depth)
+    sent = asyncio.Queue()
+    stop = object()
+
+    async def send():
+        for body in bodies:
+            await slots.acquire()
+            if time.perf_counter() >= deadline:
+                break
+            writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            sent.put_nowait(time.perf_counter())
+            await writer.drain()
+        sent.put_nowait(stop)
+
+    async def receive():
+        while True:
+            started = await sent.get()
+            if started is stop:
+                return
+            status, body = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != expected:
+                failures.append(f"{status} {body[:200]!r}")
+            slots.release()
+
+    await asyncio.gather(send(), receive())
+    writer.close()
+
+
+async def run_endpoint(port, name, connections, depth, seconds, payloads):
+    path, expected = PATHS[name]
+    latencies, failures = [], []
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(
+        connection(port, path, expected, (payloads[(number * 7919 + i) % len(payloads)] for i in range(10 ** 9)),
+                   depth, deadline, latencies, failures)
+        for number in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies, failures
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+async def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            status, _ = await read_response(reader)
+            writer.close()
+            if status == 200:
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.1)
+
+
+async def main_async(args, port):
+    await wait_ready(port)
+    # Distinct reports, so PDF requests mostly miss the server's render cache
+    payloads = [json.dumps(data).encode() for data in version5_reports(args.payloads, seed=1)]
+    failed = False
+    for name in args.endpoints:
+        rate, latencies, failures = await run_endpoint(port, name, args.connections, args.depth, args.seconds, payloads)
+        slow = rate < args.min_rate
+        failed |= bool(failures) or slow
+        print(f"{name:<8} {rate:8.0f} requests/s | p50 {percentile(latencies, 50):7.1f} ms "
+              f"p99 {percentile(latencies, 99):7.1f} ms | {len(latencies)} requests, {len(failures)} failed"
+              + ("  BELOW MIN RATE" if slow else ""))
+        for failure in failures[:3]:
+            print(f"    {failure}")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", nargs="+", choices=tuple(PATHS), default=list(PATHS))
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--depth", type=int, default=8, help="requests in flight per connection")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per endpoint")
+    parser.add_argument("--payloads", type=int, default=20000, help="distinct synthetic reports to cycle through")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="PDF workers of the started server")
+    parser.add_argument("--port", type=int, help="load a server already running on this port")
+    parser.add_argument("--min-rate", type=float, default=200.0)
+    args = parser.parse_args()
+
+    if args.port:
+        return asyncio.run(main_async(args, args.port))
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, BEC_STORE_PATH=os.path.join(tmp, "load.db"))
+        server = subprocess.Popen([sys.executable, str(ROOT / "api_server.py"), "--port", str(port),
+                                   "--workers", str(args.workers)], env=env)
+        try:
+            return asyncio.run(main_async(args, port))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
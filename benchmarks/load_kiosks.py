@@ -0,0 +1,151 @@
+"""Concurrent kiosks saving reports: submit latency and throughput of the store write path.
+
+Runs N headless AppTest sessions of version5.py's init_main() on threads of one
+process, as one Streamlit server would host them, each filling in and submitting
+reports back to back into a fresh store. Reports p50/p99 of the submit rerun and
+of the save itself, and saved records per second, for saves through the single
+batching writer (write_queue) and for every session writing to the store itself.
+
+AppTest keeps process-wide state while a script runs, so the script bodies take
+turns; a session hands over its turn while it waits for its save to commit, which
+is where the sessions contend.
+
+Run: python benchmarks/load_kiosks.py [--kiosks 8] [--reports 25] [--mode both]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest
+
+import synthetic  # noqa: F401  (puts the repository root on sys.path)
+import submission_store
+import write_queue
+
+SCRIPT = str(Path(__file__).resolve().parent.parent / "version5.py")
+
+
+# AppTest installs a mock Runtime for each run and clears it when the run ends, which assumes one
+# run at a time. With sessions running concurrently, keep the latest mock visible to all of them.
+def _share_runtime():
+    instance = Runtime.instance.__func__
+    latest = []
+
+    def shared_instance(cls):
+        if cls._instance is not None:
+            latest[:] = [cls._instance]
+        elif latest:
+            return latest[0]
+        return instance(cls)
+
+    Runtime.instance = classmethod(shared_instance)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)] * 1000
+
+
+# Held while a session's script runs, except while it waits for a save
+_script_turn = threading.Lock()
+
+
+# Function to run one kiosk: fill in and submit reports, returning each submit rerun's seconds
+def kiosk(number, reports, start_barrier):
+    at = AppTest.from_file(SCRIPT, default_timeout=120)
+    with _script_turn:
+        at.run()
+    timings = []
+    start_barrier.wait()
+    for report in range(reports):
+        for text_area in at.text_area:
+            text_area.set_value(f"Kiosk {number}, report {report}: staff walked me through the job search tools.")
+        next(button for button in at.button if button.label == "Submit report").click()
+        start = time.perf_counter()
+        with _script_turn:
+            at.run()
+        timings.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"kiosk {number}: {at.exception}")
+    return timings
+
+
+def run(mode, kiosks, reports, directory):
+    submission_store._store = submission_store.SubmissionStore(os.path.join(directory, f"{mode}.db"))
+    write_queue._queue = None
+    write_queue.QUEUED_WRITES = mode == "queue"
+
+    # Time the save itself inside every submit, letting other sessions run meanwhile
+    saves = []
+    commit_report = write_queue.commit_report
+
+    def timed_commit(*args, **kwargs):
+        _script_turn.release()
+        start = time.perf_counter()
+        try:
+            return commit_report(*args, **kwargs)
+        finally:
+            saves.append(time.perf_counter() - start)
+            _script_turn.acquire()
+
+    write_queue.commit_report = timed_commit
+    results = [None] * kiosks
+    errors = []
+    barrier = threading.Barrier(kiosks + 1)
+
+    def worker(number):
+        try:
+            results[number] = kiosk(number, reports, barrier)
+        except BaseException as error:
+            errors.append(error)
+            barrier.abort()
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(kiosks)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    write_queue.commit_report = commit_report
+    if errors:
+        raise errors[0]
+
+    stored = submission_store._store.count()
+    submits = [seconds for timings in results for seconds in timings]
+    line = (f"{mode:<6} {kiosks} kiosks x {reports}: {stored} saved, {stored / elapsed:7.1f} records/s | "
+            f"submit p50 {percentile(submits, 50):6.1f} ms p99 {percentile(submits, 99):6.1f} ms | "
+            f"save p50 {percentile(saves, 50):6.2f} ms p99 {percentile(saves, 99):6.2f} ms")
+    if mode == "queue":
+        writer = write_queue._queue
+        line += f" | {writer.batches} batches, {statistics.fmean([writer.written / max(writer.batches, 1)]):.1f}/batch"
+        writer.close()
+    print(line)
+    submission_store._store.close()
+    if stored != kiosks * reports:
+        raise RuntimeError(f"expected {kiosks * reports} stored reports, found {stored}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kiosks", type=int, default=8)
+    parser.add_argument("--reports", type=int, default=25, help="reports submitted by each kiosk")
+    parser.add_argument("--mode", choices=("queue", "direct", "both"), default="both")
+    args = parser.parse_args()
+
+    _share_runtime()
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in (("direct", "queue") if args.mode == "both" else (args.mode,)):
+            run(mode, args.kiosks, args.reports, directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
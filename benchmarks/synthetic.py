@@ -0,0 +1,52 @@
+"""Synthetic reports shared by the benchmark scripts."""
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from experience_record import HANDBOOK_CRITERIA  # noqa: E402
+
+EMPLOYEES = ["LeRoy", "Danielle", "Sarah", "Marcus", "Ana", "Tou", "Fatima", "Greg"]
+
+PHRASES = [
+    "staff greeted me right away",
+    "the web blocking software stopped a site",
+    "waited a long time for help",
+    "resume review was very helpful",
+    "a suspension notice was issued",
+    "the computer lab was crowded",
+    "the workshop on interviews was useful",
+    "nobody answered my question",
+]
+
+# Rare incident narratives, so searches for them behave like searches of real reports
+INCIDENTS = [
+    "law enforcement was contacted and a Violence/Threat Report Form was completed",
+    "a customer received a suspension from the resource area for six months",
+    "a trespass notice was issued after a verbal threat",
+]
+
+
+# Function to generate version5-shaped reports spread over a date range
+def version5_reports(count, seed=0, start=date(2023, 7, 1), days=730):
+    rng = random.Random(seed)
+    for _ in range(count):
+        names = rng.sample(EMPLOYEES, rng.randint(1, 2))
+        data = {
+            "Customer Service Rating": str(rng.randint(1, 5)),
+            "Customer Service Feedback": rng.choice(PHRASES),
+            "Experience Date": str(start + timedelta(days=rng.randrange(days))),
+            "Experience Time": f"{rng.randint(8, 17):02}:{rng.randint(0, 59):02}",
+            "Employee Activities": rng.choice(PHRASES),
+            "Actual Experience": " ".join(rng.sample(PHRASES, 2)),
+            "Prescribed Activities": rng.choice(PHRASES),
+            "Prescribed Notes": "",
+            "Experience Notes": rng.choice(PHRASES),
+            "Employee Names": ", ".join(names),
+        }
+        data.update({f"Rating - {criterion}": str(rng.randint(0, 10)) for criterion in HANDBOOK_CRITERIA})
+        if rng.random() < 0.001:
+            data["Experience Notes"] = rng.choice(INCIDENTS)
+        yield data
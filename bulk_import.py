@@ -0,0 +1,238 @@
+import argparse
+import ast
+import contextlib
+import re
+import sys
+import time
+from datetime import date, time as clock_time
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from conduct_catalog import LEGACY_CATALOG, conduct_mask
+from experience_record import HANDBOOK_CRITERIA, RATING_COLUMNS, TEXT_FIELDS
+from rating_stats import RATING_VALUES
+from submission_store import DEFAULT_STORE_PATH, INSERT_COLUMNS, SubmissionStore, utc_now
+
+# Rows per pandas chunk and per store transaction
+DEFAULT_CHUNK_SIZE = 50000
+
+# A version4 ratings dict repr with its numbers removed; every row of a version4 export has this shape
+_HANDBOOK_SKELETON = re.sub(r"\d+", "", repr(dict.fromkeys(HANDBOOK_CRITERIA, 0))).encode("utf-8")
+_DIGITS = b"0123456789"
+_NOT_NUMBERS = bytes(byte for byte in range(256) if byte not in b"0123456789,\n")
+
+
+# Function to tell which version wrote a CSV export from its header
+def detect_version(columns):
+    columns = set(columns)
+    if set(RATING_COLUMNS) <= columns:
+        return "version5"
+    if "Employee Handbook Ratings" in columns:
+        return "version4"
+    if {"Code of Conduct Mask", "Selected Code of Conduct"} & columns:
+        # version2 exports have the same layout as version1
+        return "version1"
+    if {"Customer Service Rating", "Experience Date"} <= columns:
+        return "version3"
+    raise ValueError(f"not a recognized report export; columns: {sorted(columns)}")
+
+
+# Function to raise for the first row of a chunk flagged by a boolean array, naming the CSV line
+# it was read from (the header is line 1)
+def _reject(index, flagged, problem):
+    raise ValueError(f"row {index[np.flatnonzero(flagged)[0]] + 2}: {problem}")
+
+
+# Function to parse each distinct value of a column once and broadcast the results to every row
+def _per_unique(series, parse):
+    codes, uniques = pd.factorize(series)
+    parsed = np.empty(len(uniques), dtype=object)
+    for position, value in enumerate(uniques):
+        try:
+            parsed[position] = parse(value)
+        except (ValueError, SyntaxError) as error:
+            _reject(series.index, codes == position, f"{series.name}: {error}")
+    return parsed[codes].tolist()
+
+
+def _parse_rating(text):
+    return int(text) if text else None
+
+
+def _parse_date(text):
+    return date.fromisoformat(text).isoformat() if text else None
+
+
+def _parse_time(text):
+    return clock_time.fromisoformat(text).isoformat() if text else None
+
+
+def _parse_names(text):
+    names = [name.strip() for name in text.split(",") if name.strip() and name.strip() != "None"]
+    return ", ".join(names) or None
+
+
+# Selected Code of Conduct list repr (exports written before the bitmask) -> conduct mask
+def _parse_conduct(text):
+    items = ast.literal_eval(text) if text else []
+    if not isinstance(items, list):
+        raise ValueError(f"not a list: {text[:80]!r}")
+    return conduct_mask(items)
+
+
+# Employee Handbook Ratings dict repr -> 16 packed rating bytes; every criterion must be rated 0-10
+def _parse_handbook_dict(text):
+    if not text:
+        return None
+    ratings = ast.literal_eval(text)
+    if not isinstance(ratings, dict):
+        raise ValueError(f"not a dict: {text[:80]!r}")
+    missing = [criterion for criterion in HANDBOOK_CRITERIA if ratings.get(criterion) is None]
+    if missing:
+        raise ValueError(f"no rating for {', '.join(missing)}")
+    invalid = {criterion: ratings[criterion] for criterion in HANDBOOK_CRITERIA
+               if type(ratings[criterion]) is not int or not 0 <= ratings[criterion] < RATING_VALUES}
+    if invalid:
+        raise ValueError(f"ratings run from 0 to {RATING_VALUES - 1}, got {invalid}")
+    return bytes(ratings[criterion] for criterion in HANDBOOK_CRITERIA)
+
+
+# Function to split a list of byte strings into fixed-width slices
+def _slices(blob, width):
+    return [blob[start:start + width] for start in range(0, len(blob), width)]
+
+
+# A whole column of version4 ratings dict reprs -> packed rating bytes, parsed in one pass: once every
+# row is the expected repr with only its numbers differing, the numbers are all that is left to read
+def _pack_handbook_dicts(series):
+    texts = series.tolist()
+    if not all(texts):
+        return _per_unique(series, _parse_handbook_dict)
+    joined = "\n".join(texts).encode("utf-8")
+    if joined.translate(None, _DIGITS) != b"\n".join([_HANDBOOK_SKELETON] * len(texts)):
+        return _per_unique(series, _parse_handbook_dict)
+    # Only the numbers and their separators are left; each row's 16 numbers read as one list
+    numbers = joined.translate(None, _NOT_NUMBERS).replace(b"\n", b",")
+    values = np.fromstring(numbers, dtype=np.int64, sep=",")
+    if values.size != len(texts) * len(HANDBOOK_CRITERIA) or values.max() >= RATING_VALUES:
+        # The per-value parse says which row is off
+        return _per_unique(series, _parse_handbook_dict)
+    return _slices(values.astype(np.uint8).tobytes(), len(HANDBOOK_CRITERIA))
+
+
+# version5's flattened rating columns (read as float32, NaN when empty) -> 16 packed rating bytes per
+# row; a row rates every criterion 0-10 or none of them
+def _pack_rating_columns(frame):
+    values = frame[list(RATING_COLUMNS)].to_numpy()
+    empty = np.isnan(values)
+    missing = empty.all(axis=1)
+    partial = empty.any(axis=1) & ~missing
+    if partial.any():
+        row = np.flatnonzero(partial)[0]
+        _reject(frame.index, partial, f"no rating for {', '.join(np.array(RATING_COLUMNS)[empty[row]])}")
+    invalid = ~empty & ((values < 0) | (values >= RATING_VALUES) | (values != np.round(values)))
+    if invalid.any():
+        row, column = np.argwhere(invalid)[0]
+        _reject(frame.index, invalid.any(axis=1),
+                f"{RATING_COLUMNS[column]} is {values[row, column]:g}; ratings run from 0 to {RATING_VALUES - 1}")
+    packed = _slices(np.nan_to_num(values).astype(np.uint8).tobytes(), len(RATING_COLUMNS))
+    if missing.any():
+        for index in np.flatnonzero(missing):
+            packed[index] = None
+    return packed
+
+
+# Function to turn one chunk of an export into store rows (tuples in INSERT_COLUMNS order)
+def normalize_chunk(frame, version, submitted_at):
+    count = len(frame)
+    columns = {
+        "version": repeat(version, count),
+        "submitted_at": repeat(submitted_at, count),
+        "experience_date": _per_unique(frame["Experience Date"], _parse_date),
+        "experience_time": _per_unique(frame["Experience Time"], _parse_time),
+        "employee_name": repeat(None, count),
+        "customer_service_rating": _per_unique(frame["Customer Service Rating"], _parse_rating),
+        "conduct_mask": repeat(None, count),
+        "conduct_catalog": repeat(None, count),
+        "handbook_ratings": repeat(None, count),
+    }
+    for attribute, key in TEXT_FIELDS.items():
+        columns[attribute] = frame[key].tolist() if key in frame else repeat("", count)
+    for key in ("Name", "Employee Names"):
+        if key in frame:
+            columns["employee_name"] = _per_unique(frame[key], _parse_names)
+    if "Code of Conduct Mask" in frame:
+        columns["conduct_mask"] = _per_unique(frame["Code of Conduct Mask"], _parse_rating)
+        columns["conduct_catalog"] = _per_unique(frame["Conduct Catalog"], _parse_rating)
+    elif "Selected Code of Conduct" in frame:
+        columns["conduct_mask"] = _per_unique(frame["Selected Code of Conduct"], _parse_conduct)
+        columns["conduct_catalog"] = repeat(LEGACY_CATALOG, count)
+    if "Employee Handbook Ratings" in frame:
+        columns["handbook_ratings"] = _pack_handbook_dicts(frame["Employee Handbook Ratings"])
+    elif set(RATING_COLUMNS) <= set(frame.columns):
+        # Chosen by the header rather than the version, which --version may have set to another label
+        columns["handbook_ratings"] = _pack_rating_columns(frame)
+    return list(zip(*(columns[column] for column in INSERT_COLUMNS)))
+
+
+# Function to detect an export's version from its header and open it as chunks of DataFrames
+def read_chunks(path, version=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    header = pd.read_csv(path, nrows=0).columns
+    version = version or detect_version(header)
+    # Text stays as read (empty fields are ""); version5 rating columns parse straight to numbers
+    numeric = [column for column in header if column in RATING_COLUMNS]
+    chunks = pd.read_csv(
+        path,
+        dtype={column: np.float32 if column in numeric else object for column in header},
+        keep_default_na=False,
+        na_values={column: [""] for column in numeric},
+        chunksize=chunk_size,
+    )
+    return version, chunks
+
+
+# Function to import one historical export into the store; returns (version, rows imported)
+def import_csv(store, path, version=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    submitted_at = utc_now()
+    imported = 0
+    version, chunks = read_chunks(path, version, chunk_size)
+    for frame in chunks:
+        try:
+            rows = normalize_chunk(frame, version, submitted_at)
+        except (KeyError, ValueError, SyntaxError) as error:
+            # Row checks name the row (see _reject); anything else is placed within the chunk
+            where = "" if str(error).startswith("row ") else f"rows {imported + 2}-{imported + len(frame) + 1}: "
+            raise ValueError(f"{path}: {where}{error}") from error
+        store.insert_rows(rows)
+        imported += len(rows)
+    return version, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import historical CSV exports from any version into the store.")
+    parser.add_argument("files", nargs="+", help="CSV files written by version1-version5")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--version", help="label the rows with this version instead of detecting it")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--bulk", action="store_true",
+                        help="load every file in one transaction, updating indexes and aggregates once at the end")
+    args = parser.parse_args(argv)
+
+    store = SubmissionStore(args.store)
+    with store.bulk_load() if args.bulk else contextlib.nullcontext():
+        start = time.perf_counter()
+        total = 0
+        for path in args.files:
+            version, rows = import_csv(store, path, args.version, args.chunk_size)
+            total += rows
+            print(f"{path}: {rows} {version} rows")
+    elapsed = time.perf_counter() - start
+    print(f"{total} rows in {elapsed:.1f} s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import argparse
+import csv
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from csv_export import LINE_TERMINATOR
+from experience_record import EXPORT_COLUMNS, ExperienceRecord
+from render_cache import DEFAULT_DISK_DIR, DiskCache, stable_hash
+from report_pdf import TTF_PATHS, render_sections
+from submission_store import DEFAULT_STORE_PATH, SubmissionStore
+
+# Name of the combined CSV inside the bundle, written after the PDFs
+CSV_NAME = "reports.csv"
+# Cache keys cover the font configuration, since the same record renders differently under another font
+NAMESPACE = "experience_pdf:" + "|".join(path or "" for path in TTF_PATHS.values())
+
+
+# Function to render one report's sections into the disk cache; runs in a worker process
+def render_task(task):
+    name, key, sections, directory = task
+    start = time.perf_counter()
+    payload = render_sections(sections)
+    DiskCache(directory).put(key, payload)
+    return name, key, time.perf_counter() - start
+
+
+def _pdf_info(name):
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    # PDF content streams are already deflated
+    info.compress_type = zipfile.ZIP_STORED
+    return info
+
+
+# Function to copy one finished PDF from the cache into the archive in fixed-size blocks; returns
+# False when a prune (from another export) deleted it first, before anything is written
+def _add_pdf(archive, name, path):
+    try:
+        source = open(path, "rb")
+    except FileNotFoundError:
+        return False
+    # An open file stays readable when it is deleted, so the copy cannot fail halfway
+    with source:
+        info = _pdf_info(name)
+        info.file_size = os.fstat(source.fileno()).st_size
+        with archive.open(info, "w") as entry:
+            shutil.copyfileobj(source, entry)
+    return True
+
+
+# Function to write every report with an Experience Date in [start, end] to output (a path or a
+# writable binary stream, which need not be seekable) as a ZIP of one PDF per report plus CSV_NAME.
+# PDFs missing from the cache render in parallel and are added in the order they finish; no more
+# than a few per worker are in flight, and the CSV rows wait in a temporary file, not in memory.
+def write_bundle(store, output, start=None, end=None, workers=None, cache=None, on_done=None):
+    cache = cache or DiskCache()
+    workers = workers or os.cpu_count() or 1
+    reports = rendered = 0
+    pending = {}
+
+    def finish(done):
+        nonlocal rendered
+        for future in done:
+            name, key, seconds = future.result()
+            sections = pending.pop(future)
+            if not _add_pdf(archive, name, cache.path(key)):
+                archive.writestr(_pdf_info(name), render_sections(sections))
+            rendered += 1
+            if on_done:
+                on_done(name, seconds, False)
+
+    with tempfile.TemporaryFile() as rows, zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        text = io.TextIOWrapper(rows, encoding="utf-8", newline="", write_through=True)
+        # Same dialect as csv_export, so the bundled CSV matches a plain export of the range
+        writer = csv.writer(text, lineterminator=LINE_TERMINATOR)
+        writer.writerow(EXPORT_COLUMNS)
+        for chunk in store.iter_chunks(start, end, chunk_size=2000):
+            for row in chunk:
+                record = ExperienceRecord.from_row(row)
+                writer.writerow(record.csv_row())
+                name = f"report-{row['id']:07d}.pdf"
+                # The record's own sections, so each version keeps its conduct selection and
+                # only rated reports list handbook ratings
+                sections = record.pdf_sections()
+                key = stable_hash(sections, NAMESPACE)
+                reports += 1
+                path = cache.get(key)
+                if path is not None and _add_pdf(archive, name, path):
+                    if on_done:
+                        on_done(name, 0.0, True)
+                    continue
+                if len(pending) >= workers * 4:
+                    finish(wait(pending, return_when=FIRST_COMPLETED).done)
+                pending[executor.submit(render_task, (name, key, sections, cache.directory))] = sections
+        finish(wait(pending).done)
+
+        text.detach()
+        info = zipfile.ZipInfo(CSV_NAME, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.file_size = rows.tell()
+        rows.seek(0)
+        with archive.open(info, "w") as entry:
+            shutil.copyfileobj(rows, entry)
+    return reports, rendered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the reports in a date range as one ZIP of PDFs and a CSV.")
+    parser.add_argument("output", help="ZIP file to write, or - for stdout")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--start", help="first Experience Date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last Experience Date (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-dir", default=DEFAULT_DISK_DIR, help="directory of the content-addressed PDF cache")
+    args = parser.parse_args(argv)
+
+    store = SubmissionStore(args.store)
+    cache = DiskCache(args.cache_dir)
+    start = time.perf_counter()
+    output = sys.stdout.buffer if args.output == "-" else args.output
+    reports, rendered = write_bundle(store, output, args.start, args.end, args.workers, cache)
+    elapsed = time.perf_counter() - start
+    pruned = cache.prune()
+    print(f"bundled {reports} reports ({rendered} rendered, {reports - rendered} from the cache) in {elapsed:.1f} s"
+          + (f"; pruned {pruned} cached PDFs" if pruned else ""), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
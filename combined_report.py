@@ -0,0 +1,167 @@
+import argparse
+import sys
+import zlib
+
+from experience_record import ExperienceRecord
+from report_pdf import ReportPDF
+from submission_store import DEFAULT_STORE_PATH, SubmissionStore
+
+TOC_LINE_HEIGHT = 8
+
+
+# Stands in for FPDF.buffer: document-level output goes straight to disk and len() is the file offset
+class _FileBuffer:
+    def __init__(self, stream):
+        self.stream = stream
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iadd__(self, text):
+        data = text.encode('latin1')
+        self.stream.write(data)
+        self.size += len(data)
+        return self
+
+
+# Function to render the table of contents; page numbers are shifted by the TOC length
+def _render_toc(pdf, entries, offset):
+    pdf.section = "Table of Contents"
+    pdf.add_page()
+    pdf.chapter_title("Table of Contents")
+    pdf.set_font(pdf.font_name, '', 10)
+    number_width = 20
+    label_width = pdf.w - pdf.l_margin - pdf.r_margin - number_width
+    for label, page in entries:
+        pdf.cell(label_width, TOC_LINE_HEIGHT, label, 0, 0, 'L')
+        pdf.cell(number_width, TOC_LINE_HEIGHT, str(page + offset), 0, 1, 'R')
+
+
+# Header that also names the section each page belongs to
+class _SectionHeaderMixin:
+    section = ""
+
+    def header(self):
+        super().header()
+        if self.section:
+            self.set_font(self.font_name, 'I', 9)
+            self.cell(0, 6, self.section, 0, 1, 'R')
+
+
+class _TocLayoutPDF(_SectionHeaderMixin, ReportPDF):
+    pass
+
+
+# Combined report that writes each page to disk as soon as it is complete
+class CombinedReportPDF(_SectionHeaderMixin, ReportPDF):
+    def __init__(self, stream):
+        super().__init__()
+        # No OpenAction: it would point at the first rendered page rather than the contents
+        self.set_display_mode('default')
+        self.buffer = _FileBuffer(stream)
+        self.toc = []
+        self._page_objects = []
+        self._content_pages = None
+        self._out('%PDF-' + self.pdf_version)
+
+    # Start a new experience on its own page and record it in the table of contents
+    def add_section(self, label, record):
+        self.section = label
+        self.add_page()
+        self.toc.append((label, self.page))
+        self.chapter_title(label)
+        self.add_record(record)
+
+    # Append the table of contents, put it first in page order and close the document
+    def finish(self):
+        self._content_pages = self.page
+        # The TOC's page count does not depend on the numbers printed in it, so lay it out once to count it
+        dry_run = _TocLayoutPDF()
+        _render_toc(dry_run, self.toc, 0)
+        _render_toc(self, self.toc, dry_run.page)
+        self.close()
+
+    def _endpage(self):
+        super()._endpage()
+        # Write the finished page and its content stream, then drop the content from memory
+        content = self.pages[self.page].encode('latin1')
+        stream_filter = ''
+        if self.compress:
+            content = zlib.compress(content)
+            stream_filter = '/Filter /FlateDecode '
+        self._newobj()
+        self._page_objects.append(self.n)
+        self._out('<</Type /Page')
+        self._out('/Parent 1 0 R')
+        self._out('/Resources 2 0 R')
+        if self.pdf_version > '1.3':
+            self._out('/Group <</Type /Group /S /Transparency /CS /DeviceRGB>>')
+        self._out('/Contents ' + str(self.n + 1) + ' 0 R>>')
+        self._out('endobj')
+        self._newobj()
+        self._out('<<' + stream_filter + '/Length ' + str(len(content)) + '>>')
+        self._putstream(content)
+        self._out('endobj')
+        self.pages[self.page] = ''
+
+    def _putheader(self):
+        # Written when the stream was opened
+        pass
+
+    def _putpages(self):
+        # Pages were written as they completed; only the page tree remains
+        kids = self._page_objects
+        if self._content_pages is not None:
+            kids = kids[self._content_pages:] + kids[:self._content_pages]
+        self.offsets[1] = len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ''.join(str(n) + ' 0 R ' for n in kids) + ']')
+        self._out('/Count ' + str(len(kids)))
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (self.fw_pt, self.fh_pt))
+        self._out('>>')
+        self._out('endobj')
+
+
+# Function to label an experience in the table of contents and section headers
+def section_label(number, record):
+    day = record.experience_date.isoformat() if record.experience_date else ""
+    label = f"Experience {number}: {day} {record.time_text()}"
+    if record.employee_names:
+        label += f" - {record.employee_text}"
+    return label
+
+
+# Function to write many experiences (ExperienceRecords of any version) to one PDF file with bounded memory
+def write_combined_report(records, path):
+    with open(path, 'wb') as stream:
+        pdf = CombinedReportPDF(stream)
+        for number, record in enumerate(records, start=1):
+            pdf.add_section(section_label(number, record), record)
+        pdf.finish()
+        return pdf.page
+
+
+# Function to stream stored reports for a date range as records
+def stored_records(store, start=None, end=None):
+    for rows in store.iter_chunks(start, end):
+        for row in rows:
+            yield ExperienceRecord.from_row(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render stored reports into one combined PDF.")
+    parser.add_argument("output", help="PDF file to write")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--start", help="first Experience Date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last Experience Date (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    pages = write_combined_report(stored_records(SubmissionStore(args.store), args.start, args.end), args.output)
+    print(f"wrote {pages} pages to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# Selections are stored as a 16-bit mask, one bit per catalog item
+MASK_BITS = 16
+
+# Every Code of Conduct item ever offered, in bit order. Bits are never reused: a retired item keeps
+# its bit and a new item takes the next free one, so a stored mask decodes the same under every version
+CONDUCT_ITEMS = (
+    "The Customer Code of Conduct and Employee Code of Conduct documents must be clearly posted in various, easy-to-view locations in all Resource Areas.",
+    "All resource area staff will read the employee pledge found on the Employee Code of Conduct and will strive each day to provide service in accordance with the Employee Code of Conduct.",
+    "The Customer Code of Conduct and Employee Code of Conduct may not be changed or modified by WFC staff or managers or by partner employees.",
+    "The Customer Code of Conduct and Employee Code of Conduct are accessible to customers using a screen reader.",
+    "WFCs that previously used the Policy Acknowledgment Form may ask customers to sign the Customer Code of Conduct. It is optional.",
+    "If staff observe a customer on an inappropriate website that was not caught by the web-blocking software, submit a Web Blocking Request.",
+    "All WorkForce Center managers, reception staff, and Resource Area staff must be familiar with the Violations Table and Corrective Actions document.",
+    "The Notice of Suspension from Resource Area document must be used for all suspensions greater than one day and less than six months.",
+    "For all suspensions greater than six months, a letter will be mailed to the customer from the WorkForce Development Division Director.",
+    "If law enforcement are contacted during an incident at the WorkForce Center, a Violence/Threat Report Form must be completed and submitted to the DEED HR Safety Officer.",
+    "The Violence/Threat Report Form is required for all incidents involving theft, property damage, or violence.",
+    "An Incident Log must be kept up to date and submitted to the WorkForce Development Division Equal Opportunity Officer at the close of each state fiscal year or upon request.",
+    "Mandatory training on various policies and forms will be provided to all resource area staff and managers.",
+)
+_CONDUCT_BITS = {item: 1 << bit for bit, item in enumerate(CONDUCT_ITEMS)}
+
+# Catalog version -> bits offered on the form under that version
+CATALOGS = {
+    1: tuple(range(13)),
+}
+CURRENT_CATALOG = max(CATALOGS)
+
+# Exports that list the selected items as text were written before catalogs were versioned
+LEGACY_CATALOG = 1
+
+
+# Function to list the items offered on the form under a catalog version, in display order
+def catalog_items(version=CURRENT_CATALOG):
+    return [CONDUCT_ITEMS[bit] for bit in CATALOGS[version]]
+
+
+# Function to encode selected conduct items as a bitmask
+def conduct_mask(items):
+    mask = 0
+    for item in items:
+        bit = _CONDUCT_BITS.get(item)
+        if bit is None:
+            raise ValueError(f"unknown Code of Conduct item: {item!r}")
+        mask |= bit
+    return mask
+
+
+# Function to decode a bitmask back into the selected conduct items
+def conduct_items(mask):
+    return [item for item, bit in _CONDUCT_BITS.items() if mask & bit]
+
+
+# The counting functions below import numpy on first use, so the forms can encode and decode
+# masks without loading it
+
+# Function to count each distinct mask once: (masks, reports) with the masks ascending
+def mask_histogram(masks):
+    import numpy as np
+
+    counts = np.bincount(np.asarray(masks, dtype=np.uint16), minlength=1 << MASK_BITS)
+    present = np.flatnonzero(counts)
+    return present, counts[present]
+
+
+# Function to expand masks into one 0/1 column per bit: (masks, MASK_BITS) uint8
+def mask_bits(masks):
+    import numpy as np
+
+    pairs = np.asarray(masks, dtype="<u2").view(np.uint8).reshape(-1, 2)
+    return np.unpackbits(pairs, axis=1, bitorder="little")
+
+
+# Function to count the reports citing each item; reports gives a count per mask when masks
+# is a histogram (e.g. from mask_histogram or a GROUP BY), otherwise every mask is one report
+def item_counts(masks, reports=None):
+    import numpy as np
+
+    if reports is None:
+        masks, reports = mask_histogram(masks)
+    counts = np.asarray(reports, dtype=np.int64) @ mask_bits(masks).astype(np.int64)
+    return counts[:len(CONDUCT_ITEMS)]
+
+
+# Function to count the reports citing each pair of items: (items, items), item counts on the diagonal
+def co_occurrence(masks, reports=None):
+    import numpy as np
+
+    if reports is None:
+        masks, reports = mask_histogram(masks)
+    bits = mask_bits(masks)[:, :len(CONDUCT_ITEMS)].astype(np.int64)
+    return bits.T @ (bits * np.asarray(reports, dtype=np.int64)[:, None])
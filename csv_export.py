@@ -0,0 +1,89 @@
+import argparse
+import csv
+import io
+import math
+import os
+import sys
+from datetime import date, datetime, time
+
+from experience_record import EXPORT_COLUMNS, ExperienceRecord
+
+# Row terminator of every export; pandas' to_csv ends rows with os.linesep, so both writers do too
+LINE_TERMINATOR = os.linesep
+# Cell types record_csv formats itself; anything else goes through pandas
+_PLAIN_TYPES = (str, int, float, type(None), date, time, dict)
+
+
+# Function to format one cell the way pandas' to_csv does for a one-row frame
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return "" if math.isnan(value) else repr(value)
+    return str(value)
+
+
+# Function to export one report's data dict (one-element lists in versions 1-4, scalars in version5)
+# as a header and one row, the same bytes pandas' DataFrame.to_csv(index=False) writes, without pandas
+def record_csv(data):
+    values = [value[0] if isinstance(value, list) and len(value) == 1 else value for value in data.values()]
+    # pandas turns datetimes into datetime64 columns and lists into extra rows; leave those to it
+    if not all(isinstance(value, _PLAIN_TYPES) and not isinstance(value, datetime) for value in values):
+        import pandas as pd
+
+        frame = pd.DataFrame(data) if any(isinstance(value, list) for value in data.values()) else pd.DataFrame([data])
+        return frame.to_csv(index=False).encode("utf-8")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=LINE_TERMINATOR)
+    writer.writerow(data)
+    writer.writerow(map(_cell, values))
+    return buffer.getvalue().encode("utf-8")
+
+
+# Function to stream stored reports as encoded CSV chunks; memory is bounded by chunk_size, not row count
+def stream_csv(store, start=None, end=None, chunk_size=2000):
+    buffer = io.StringIO()
+    # Same dialect pandas' to_csv writes, so rows match record_csv byte for byte
+    writer = csv.writer(buffer, lineterminator=LINE_TERMINATOR)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in store.iter_chunks(start, end, chunk_size):
+        writer.writerows(ExperienceRecord.from_row(row).csv_row() for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+# Function to write the streamed export to a file and return the number of bytes written
+def write_csv(store, path, start=None, end=None, chunk_size=2000):
+    written = 0
+    with open(path, "wb") as output:
+        for chunk in stream_csv(store, start, end, chunk_size):
+            output.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def main(argv=None):
+    from submission_store import DEFAULT_STORE_PATH, SubmissionStore
+
+    parser = argparse.ArgumentParser(description="Export stored reports as one CSV file.")
+    parser.add_argument("output", help="CSV file to write, or - for stdout")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--start", help="first Experience Date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last Experience Date (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    store = SubmissionStore(args.store)
+    if args.output == "-":
+        for chunk in stream_csv(store, args.start, args.end, args.chunk_size):
+            sys.stdout.buffer.write(chunk)
+    else:
+        write_csv(store, args.output, args.start, args.end, args.chunk_size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
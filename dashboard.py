@@ -0,0 +1,120 @@
+import pandas as pd
+import streamlit as st
+
+from conduct_catalog import CONDUCT_ITEMS, co_occurrence, item_counts
+from experience_record import HANDBOOK_CRITERIA
+from period_rollups import incident_log_frame
+from rating_stats import ALL_TIME, scorecard_frame
+from ratings_analytics import get_ratings_matrix
+from submission_store import get_store
+from text_analytics import SERVICE, get_text_index
+
+
+# Charts of the handbook ratings, filtered by date, customer service rating and employee
+def handbook_ratings(store, matrix, start, end, min_service, max_service):
+    employees = tuple(st.multiselect("Employees", options=sorted(matrix.employees)))
+    filters = dict(start=start, end=end, min_service=min_service, max_service=max_service, employees=employees)
+
+    summary = matrix.criterion_summary(**filters)
+    st.metric("Reports", int(summary["Reports"].max()))
+
+    st.subheader("Handbook criteria")
+    st.dataframe(summary.style.format(precision=2))
+
+    st.subheader("Rating distribution")
+    st.bar_chart(matrix.distribution(**filters).T)
+
+    st.subheader("Monthly averages")
+    st.line_chart(matrix.period_means(**filters).drop(columns="Reports").to_timestamp())
+
+    st.subheader("Employees")
+    st.dataframe(matrix.employee_means(**filters).style.format(precision=2))
+
+    # Running statistics kept up to date on every write, so a scorecard never rescans the reports
+    st.subheader("Employee scorecard")
+    employee = st.selectbox("Employee", sorted(store.stats_employees()))
+    if employee:
+        period = st.selectbox("Period", store.stats_periods(employee),
+                              format_func=lambda key: "All time" if key == ALL_TIME else key)
+        st.dataframe(scorecard_frame(store.employee_stats(employee, period)).style.format(precision=2))
+
+
+# Main function to run the supervisor dashboard
+def init_main():
+    st.title("CareerForce Employee Performance Dashboard")
+
+    store = get_store()
+    first, last = store.date_bounds()
+    if first is None:
+        st.info("No reports have been submitted yet.")
+        return
+
+    # Filters, over the dates of every report (only versions 4 and 5 carry handbook ratings)
+    date_range = st.date_input("Experience dates", value=(first, last), min_value=first, max_value=last)
+    start, end = (date_range[0], date_range[-1]) if date_range else (None, None)
+    min_service, max_service = st.slider("Customer service rating", 1, 5, (1, 5))
+
+    matrix = get_ratings_matrix(store)
+    if len(matrix):
+        handbook_ratings(store, matrix, start, end, min_service, max_service)
+    else:
+        st.info("No handbook ratings have been submitted yet.")
+
+    # Code of Conduct items cited on version1/version2 reports in the date range
+    masks, reports = store.conduct_histogram(start, end)
+    if len(masks):
+        st.subheader("Code of Conduct citations")
+        counts = item_counts(masks, reports)
+        total = int(reports.sum())
+        st.dataframe(
+            pd.DataFrame({"Item": CONDUCT_ITEMS, "Reports": counts, "Share": counts / total},
+                         index=range(1, len(CONDUCT_ITEMS) + 1)).style.format({"Share": "{:.1%}"})
+        )
+        st.caption(f"Reports citing both items (of {total} reports with a selection)")
+        labels = list(range(1, len(CONDUCT_ITEMS) + 1))
+        st.dataframe(pd.DataFrame(co_occurrence(masks, reports), index=labels, columns=labels))
+
+    # Incident Log for the EO Officer, read from the fiscal-year and monthly rollups kept on every write
+    fiscal_years = store.rollup_fiscal_years()
+    if fiscal_years:
+        st.subheader("Incident Log")
+        year = st.selectbox("State fiscal year", fiscal_years,
+                            format_func=lambda year: f"FY{year} (July {year - 1} – June {year})")
+        log = incident_log_frame(year, store.fiscal_year_rollups(year))
+        st.dataframe(log.style.format(precision=2))
+        st.download_button("Download Incident Log (CSV)", log.to_csv(), file_name=f"incident_log_FY{year}.csv",
+                           mime="text/csv")
+
+    # Words and phrases of the narratives that go with low ratings, over every stored report; the
+    # index is loaded from its snapshot (see text_analytics.py) and brought up to date when shown
+    st.subheader("Terms in low-rated reports")
+    if st.toggle("Relate narrative terms to low ratings"):
+        rating = st.selectbox("Rating", (SERVICE, *HANDBOOK_CRITERIA))
+        terms = get_text_index(store).associations(rating)
+        st.caption(f"{len(terms)} terms in at least 20 rated reports, most associated with low ratings "
+                   f"({'1-2' if rating == SERVICE else '0-3'}) first")
+        st.dataframe(terms.head(50).style.format(precision=2), hide_index=True)
+
+    # Full-text search of the qualitative fields, within the same date and rating filters
+    st.subheader("Search feedback and notes")
+    text = st.text_input('Words, prefix* or "an exact phrase"')
+    if text:
+        newest_first = st.toggle("Newest first")
+        results = store.search(text, start, end, min_service, max_service, limit=50, newest_first=newest_first)
+        st.caption(f"{len(results)} matching reports" + (" (first 50)" if len(results) == 50 else ""))
+        st.dataframe(
+            [
+                {
+                    "Date": row["experience_date"],
+                    "Employees": row["employee_name"],
+                    "Rating": row["customer_service_rating"],
+                    "Match": row["snippet"],
+                }
+                for row in results
+            ],
+            hide_index=True,
+        )
+
+
+if __name__ == '__main__':
+    init_main()
@@ -0,0 +1,253 @@
+from datetime import date, time
+
+from conduct_catalog import CURRENT_CATALOG, conduct_items, conduct_mask
+
+# Criteria from Employee Handbook for grading, in the order ratings are stored
+HANDBOOK_CRITERIA = (
+    "Act Professional and with Integrity",
+    "Treat all people with respect",
+    "Develop and maintain positive relationships",
+    "Handle situations with integrity",
+    "Maintain confidences and share credit",
+    "Provide Customer Service",
+    "Greet customers positively",
+    "Provide timely and courteous assistance",
+    "Communicate clearly",
+    "Actively listen and respond with empathy",
+    "Ensure customer satisfaction",
+    "Ask for feedback from customers",
+    "Contribute to Organizational Goals",
+    "Adjust positively to changes",
+    "Support organizational goals",
+    "Identify self-development areas",
+)
+
+# Flattened version5 column names for the handbook ratings
+RATING_COLUMNS = tuple(f"Rating - {criterion}" for criterion in HANDBOOK_CRITERIA)
+
+# Free-text fields shared by every version: attribute/column name -> data key
+TEXT_FIELDS = {
+    "customer_service_feedback": "Customer Service Feedback",
+    "employee_activities": "Employee Activities",
+    "actual_experience": "Actual Experience",
+    "prescribed_activities": "Prescribed Activities",
+    "prescribed_notes": "Prescribed Notes",
+    "experience_notes": "Experience Notes",
+}
+
+# Column layout of the version5 single-report export
+EXPORT_COLUMNS = (
+    "Customer Service Rating",
+    "Customer Service Feedback",
+    "Experience Date",
+    "Experience Time",
+    "Employee Activities",
+    "Actual Experience",
+    "Prescribed Activities",
+    "Prescribed Notes",
+    "Experience Notes",
+    "Employee Names",
+    *RATING_COLUMNS,
+)
+
+# Text of each rating byte, so exports do not call str() per value
+_RATING_TEXT = tuple(str(value) for value in range(256))
+_NO_RATINGS = ("",) * len(HANDBOOK_CRITERIA)
+# "HH:MM" text for every minute of the day (strftime is the slowest part of an export row)
+_HOUR_MINUTE_TEXT = tuple(f"{hour:02}:{minute:02}" for hour in range(24) for minute in range(60))
+
+
+# Function to read a field from either record shape (one-element lists in versions 1-4, scalars in version5)
+def _field(data, key):
+    value = data.get(key)
+    if isinstance(value, list) and len(value) == 1:
+        return value[0]
+    return value
+
+
+# Function to read the individual names from the employee field. A list holds the names as
+# given (a name may contain a comma, as "Smith, John" does); text is split at commas.
+def employee_names(data):
+    names = data.get("Name") or data.get("Employee Names")
+    if isinstance(names, (list, tuple)):
+        return [str(name).strip() for name in names if str(name).strip() not in ("", "None")]
+    if not names or names == "None":
+        return []
+    return [name.strip() for name in str(names).split(",") if name.strip()]
+
+
+# Function to pack the 16 handbook ratings into one byte per criterion
+def pack_ratings(data):
+    ratings = _field(data, "Employee Handbook Ratings")
+    if isinstance(ratings, dict):
+        values = [ratings.get(criterion) for criterion in HANDBOOK_CRITERIA]
+    else:
+        values = [data.get(column) for column in RATING_COLUMNS]
+    if all(value is None for value in values):
+        return None
+    return bytes(int(value or 0) for value in values)
+
+
+# Function to unpack stored handbook ratings back into a criterion -> rating dict
+def unpack_ratings(blob):
+    if blob is None:
+        return None
+    return dict(zip(HANDBOOK_CRITERIA, blob))
+
+
+def _parse_date(value):
+    if value is None or value == "" or isinstance(value, date):
+        return value or None
+    return date.fromisoformat(str(value))
+
+
+def _parse_time(value):
+    if value is None or value == "" or isinstance(value, time):
+        return value or None
+    return time.fromisoformat(str(value))
+
+
+# One experience report in a compact, version-independent form
+class ExperienceRecord:
+    __slots__ = (
+        "version",
+        "customer_service_rating",
+        "experience_date",
+        "experience_time",
+        "employee_names",
+        *TEXT_FIELDS,
+        "conduct_mask",
+        "conduct_catalog",
+        "ratings",
+    )
+
+    def __init__(self, version, customer_service_rating=None, experience_date=None, experience_time=None,
+                 employee_names=(), conduct_mask=None, conduct_catalog=None, ratings=None, **texts):
+        self.version = version
+        self.customer_service_rating = customer_service_rating
+        self.experience_date = experience_date
+        self.experience_time = experience_time
+        # Tuple of the individual names; () when none were given
+        self.employee_names = tuple(employee_names)
+        # None when the version has no conduct selection, otherwise a bitmask over CONDUCT_ITEMS
+        self.conduct_mask = conduct_mask
+        # Catalog version of the form the selection was made on (see conduct_catalog)
+        self.conduct_catalog = conduct_catalog
+        # None when the version has no handbook ratings, otherwise 16 bytes in HANDBOOK_CRITERIA order
+        self.ratings = ratings
+        for attribute in TEXT_FIELDS:
+            setattr(self, attribute, texts.get(attribute) or "")
+
+    def __eq__(self, other):
+        if not isinstance(other, ExperienceRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"ExperienceRecord({self.version!r}, {self.experience_date}, {self.employee_names!r})"
+
+    # The names joined with ", ", as version5 displays them
+    @property
+    def employee_text(self):
+        names = self.employee_names
+        return names[0] if len(names) == 1 else ", ".join(names)
+
+    # Build a record from any version's data dict
+    @classmethod
+    def from_data(cls, data, version):
+        rating = _field(data, "Customer Service Rating")
+        mask = _field(data, "Code of Conduct Mask")
+        catalog = _field(data, "Conduct Catalog")
+        selected = _field(data, "Selected Code of Conduct")
+        if mask is None and selected is not None:
+            # Earlier data dicts listed the selected items as text
+            mask = conduct_mask(selected)
+        return cls(
+            version,
+            customer_service_rating=int(rating) if rating not in (None, "") else None,
+            experience_date=_parse_date(_field(data, "Experience Date")),
+            experience_time=_parse_time(_field(data, "Experience Time")),
+            employee_names=employee_names(data),
+            conduct_mask=int(mask) if mask is not None else None,
+            conduct_catalog=int(catalog or CURRENT_CATALOG) if mask is not None else None,
+            ratings=pack_ratings(data),
+            **{attribute: _field(data, key) for attribute, key in TEXT_FIELDS.items()},
+        )
+
+    # Build a record from a submissions row, whose employee_name column holds the names as display
+    # text (the individual names are in submission_employees), so the record is for display only
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row["version"],
+            customer_service_rating=row["customer_service_rating"],
+            experience_date=_parse_date(row["experience_date"]),
+            experience_time=_parse_time(row["experience_time"]),
+            employee_names=(row["employee_name"],) if row["employee_name"] else (),
+            conduct_mask=row["conduct_mask"],
+            conduct_catalog=row["conduct_catalog"],
+            ratings=row["handbook_ratings"],
+            **{attribute: row[attribute] for attribute in TEXT_FIELDS},
+        )
+
+    # Columns of a submissions row (without id and submitted_at); employee_name is the tuple of
+    # names, which the store joins for the column and writes one by one to submission_employees
+    def store_row(self):
+        return {
+            "version": self.version,
+            "experience_date": self.experience_date.isoformat() if self.experience_date else None,
+            "experience_time": self.experience_time.isoformat() if self.experience_time else None,
+            "employee_name": self.employee_names or None,
+            "customer_service_rating": self.customer_service_rating,
+            **{attribute: getattr(self, attribute) for attribute in TEXT_FIELDS},
+            "conduct_mask": self.conduct_mask,
+            "conduct_catalog": self.conduct_catalog,
+            "handbook_ratings": self.ratings,
+        }
+
+    # Experience Time as the export writes it
+    def time_text(self):
+        if self.experience_time is None:
+            return ""
+        # version5 collects hours and minutes only
+        if self.version == "version5":
+            return _HOUR_MINUTE_TEXT[self.experience_time.hour * 60 + self.experience_time.minute]
+        return self.experience_time.isoformat()
+
+    # Values in EXPORT_COLUMNS order, as version5's convert_df_to_csv writes them
+    def csv_row(self):
+        rating = self.customer_service_rating
+        row = [
+            _RATING_TEXT[rating] if rating is not None else "",
+            self.customer_service_feedback,
+            self.experience_date.isoformat() if self.experience_date else "",
+            self.time_text(),
+            self.employee_activities,
+            self.actual_experience,
+            self.prescribed_activities,
+            self.prescribed_notes,
+            self.experience_notes,
+            self.employee_text or "None",
+        ]
+        row.extend(map(_RATING_TEXT.__getitem__, self.ratings) if self.ratings else _NO_RATINGS)
+        return row
+
+    # The flat version5 data dict
+    def to_flat(self):
+        return dict(zip(EXPORT_COLUMNS, self.csv_row()))
+
+    # (title, body) sections for the PDF, the conduct selection last
+    def pdf_sections(self):
+        sections = list(zip(EXPORT_COLUMNS, self.csv_row()))
+        if self.ratings is None:
+            sections = sections[:len(EXPORT_COLUMNS) - len(RATING_COLUMNS)]
+        if self.conduct_mask is not None:
+            sections.append(("Selected Code of Conduct Items", "\n".join(conduct_items(self.conduct_mask))))
+        return sections
+
+
+# Function to build a DataFrame with one row per record in the export layout
+def records_frame(records):
+    import pandas as pd
+
+    return pd.DataFrame([record.csv_row() for record in records], columns=list(EXPORT_COLUMNS))
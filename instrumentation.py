@@ -0,0 +1,183 @@
+import functools
+import os
+import threading
+import time
+
+# Collection is opt-in; when disabled every hook below is a shared no-op
+ENABLED = os.environ.get("BEC_METRICS", "0") == "1"
+METRICS_FILE = os.environ.get("BEC_METRICS_FILE", "metrics.prom")
+FLUSH_INTERVAL = 1.0
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+        self.last = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.count += 1
+        self.last = seconds
+
+    # Estimate a quantile as the upper bound of the bucket that reaches it
+    def quantile(self, q):
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= target and count:
+                return bound
+        return float("nan")
+
+
+# Process-wide phase histograms and gauges
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+        # Held while the metrics file is written; guards _flushed too
+        self._flush_lock = threading.Lock()
+        self._flushed = 0.0
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            histogram = self.histograms.get(phase)
+            if histogram is None:
+                histogram = self.histograms[phase] = Histogram()
+            histogram.observe(seconds)
+
+    # labels is a tuple of (name, value) pairs
+    def set_gauge(self, name, value, labels=()):
+        with self._lock:
+            self.gauges[(name, labels)] = value
+
+    def remove_gauge(self, name, labels=()):
+        with self._lock:
+            self.gauges.pop((name, labels), None)
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP bec_phase_seconds Time spent in each phase of an init_main() rerun.",
+            "# TYPE bec_phase_seconds histogram",
+        ]
+        with self._lock:
+            for phase, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'bec_phase_seconds_bucket{{phase="{phase}",le="{le}"}} {cumulative}')
+                lines.append(f'bec_phase_seconds_sum{{phase="{phase}"}} {histogram.total:.6f}')
+                lines.append(f'bec_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+            typed = set()
+            for (name, labels), value in sorted(self.gauges.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} gauge")
+                    typed.add(name)
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    # Write the Prometheus text file, at most once per FLUSH_INTERVAL unless forced. One thread
+    # writes at a time; a rerun that finds another flush under way leaves the file to it.
+    def flush(self, path=METRICS_FILE, force=False):
+        if not self._flush_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if not force and now - self._flushed < FLUSH_INTERVAL:
+                return
+            self._flushed = now
+            # Unique per thread as well as per process, as in render_cache.DiskCache.put
+            partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(partial, "w") as output:
+                output.write(self.prometheus_text())
+            os.replace(partial, path)
+        finally:
+            self._flush_lock.release()
+
+
+registry = Registry()
+
+
+# Sequential phase timer for one rerun: each mark() closes the phase since the previous mark
+class PhaseTimer:
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        registry.observe(phase, now - self._last)
+        self._last = now
+
+    def finish(self):
+        registry.observe("rerun_total", time.perf_counter() - self.started)
+        registry.flush()
+        debug_sidebar()
+
+
+class _NoopPhaseTimer:
+    def mark(self, phase):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NOOP_TIMER = _NoopPhaseTimer()
+
+
+# Function to start timing the phases of one rerun
+def rerun_timer():
+    return PhaseTimer() if ENABLED else _NOOP_TIMER
+
+
+# Decorator timing every call of a function as its own phase; returns the function untouched when disabled
+def timed(phase):
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.observe(phase, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+# Function to show the phase histograms in the Streamlit sidebar
+def debug_sidebar():
+    import streamlit as st
+
+    with registry._lock:
+        rows = [
+            {
+                "phase": phase,
+                "count": histogram.count,
+                "mean ms": histogram.total / histogram.count * 1000,
+                "p50 ms ≤": histogram.quantile(0.5) * 1000,
+                "p95 ms ≤": histogram.quantile(0.95) * 1000,
+                "last ms": histogram.last * 1000,
+            }
+            for phase, histogram in sorted(registry.histograms.items())
+        ]
+    with st.sidebar:
+        st.subheader("Rerun timings")
+        st.dataframe(rows, hide_index=True)
+        st.caption(f"Prometheus metrics: {METRICS_FILE}")
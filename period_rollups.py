@@ -0,0 +1,121 @@
+import argparse
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+from conduct_catalog import CONDUCT_ITEMS, MASK_BITS, mask_bits
+from experience_record import HANDBOOK_CRITERIA
+
+# Minnesota's state fiscal year runs July to June and is named by the calendar year it ends in
+FISCAL_YEAR_START_MONTH = 7
+
+RATING_COUNT_COLUMNS = tuple(f"rating_{value}" for value in range(1, 6))
+CONDUCT_COLUMNS = tuple(f"conduct_{bit}" for bit in range(MASK_BITS))
+CRITERION_SUM_COLUMNS = tuple(f"criterion_sum_{criterion}" for criterion in range(len(HANDBOOK_CRITERIA)))
+# Columns of a period_rollups row after its period key. Every column is a count or a sum, so rollups
+# of a batch are simply added (or, for corrected and retracted reports, subtracted).
+# conduct_reports counts reports from forms with a Code of Conduct selection (versions 1 and 2),
+# rated_reports those with handbook ratings (versions 4 and 5), the denominators of the averages.
+ROLLUP_COLUMNS = (
+    "reports", *RATING_COUNT_COLUMNS, "conduct_reports", *CONDUCT_COLUMNS, "rated_reports", *CRITERION_SUM_COLUMNS,
+)
+_RATINGS = slice(1, 1 + len(RATING_COUNT_COLUMNS))
+_CONDUCT_REPORTS = ROLLUP_COLUMNS.index("conduct_reports")
+_CONDUCT = slice(_CONDUCT_REPORTS + 1, _CONDUCT_REPORTS + 1 + MASK_BITS)
+_RATED_REPORTS = ROLLUP_COLUMNS.index("rated_reports")
+_CRITERIA = slice(_RATED_REPORTS + 1, None)
+
+
+def fiscal_year(day):
+    return day.year + 1 if day.month >= FISCAL_YEAR_START_MONTH else day.year
+
+
+def fiscal_year_key(year):
+    return f"FY{year}"
+
+
+# First and last day of a fiscal year
+def fiscal_year_bounds(year):
+    return date(year - 1, FISCAL_YEAR_START_MONTH, 1), date(year, FISCAL_YEAR_START_MONTH, 1) - timedelta(days=1)
+
+
+# Month keys ("YYYY-MM") of a fiscal year, July first
+def fiscal_year_months(year):
+    return [f"{year - (month >= FISCAL_YEAR_START_MONTH)}-{month:02d}"
+            for month in (*range(FISCAL_YEAR_START_MONTH, 13), *range(1, FISCAL_YEAR_START_MONTH))]
+
+
+# Function to aggregate a batch of stored rows, given as (experience_date, customer_service_rating,
+# conduct_mask, handbook_ratings) tuples, into a list of period keys (fiscal years and months) and
+# a block of their ROLLUP_COLUMNS, one row per key; rows without an experience date are skipped
+def aggregate(rows):
+    rows = [row for row in rows if row[0]]
+    if not rows:
+        return [], np.zeros((0, len(ROLLUP_COLUMNS)), dtype=np.int64)
+    dates, ratings, masks, blobs = zip(*rows)
+    month_index = {}
+    month_codes = np.fromiter((month_index.setdefault(day[:7], len(month_index)) for day in dates),
+                              dtype=np.intp, count=len(dates))
+
+    vectors = np.zeros((len(rows), len(ROLLUP_COLUMNS)), dtype=np.int64)
+    vectors[:, 0] = 1
+    vectors[:, _RATINGS] = np.array([rating or 0 for rating in ratings])[:, None] == np.arange(1, len(RATING_COUNT_COLUMNS) + 1)
+    vectors[:, _CONDUCT_REPORTS] = [mask is not None for mask in masks]
+    vectors[:, _CONDUCT] = mask_bits([mask or 0 for mask in masks])
+    rated = np.array([blob is not None for blob in blobs])
+    vectors[:, _RATED_REPORTS] = rated
+    if rated.any():
+        vectors[rated, _CRITERIA] = np.frombuffer(b"".join(blob for blob in blobs if blob is not None),
+                                                  dtype=np.uint8).reshape(-1, len(HANDBOOK_CRITERIA))
+    # Every report counts once in its month, and every month once in its fiscal year
+    months = np.zeros((len(month_index), len(ROLLUP_COLUMNS)), dtype=np.int64)
+    np.add.at(months, month_codes, vectors)
+    month_years = [fiscal_year_key(int(month[:4]) + (int(month[5:7]) >= FISCAL_YEAR_START_MONTH))
+                   for month in month_index]
+    year_keys = list(dict.fromkeys(month_years))
+    years = np.zeros((len(year_keys), len(ROLLUP_COLUMNS)), dtype=np.int64)
+    np.add.at(years, [year_keys.index(key) for key in month_years], months)
+    return [*year_keys, *month_index], np.concatenate([years, months])
+
+
+# Function to lay out a fiscal year's Incident Log from its rollups (period -> {column: value}):
+# one row per month with reports, July first, then the year's total
+def incident_log_frame(year, rollups):
+    import pandas as pd
+
+    periods = [month for month in fiscal_year_months(year) if month in rollups]
+    if fiscal_year_key(year) in rollups:
+        periods.append(fiscal_year_key(year))
+    rows = []
+    for period in periods:
+        rollup = rollups[period]
+        row = {"Reports": rollup["reports"]}
+        row.update({f"Rating {value}": rollup[column] for value, column in enumerate(RATING_COUNT_COLUMNS, start=1)})
+        row["Reports with a conduct selection"] = rollup["conduct_reports"]
+        row.update({f"Item {bit + 1}": rollup[CONDUCT_COLUMNS[bit]] for bit in range(len(CONDUCT_ITEMS))})
+        rated = rollup["rated_reports"]
+        row.update({criterion: rollup[column] / rated if rated else None
+                    for criterion, column in zip(HANDBOOK_CRITERIA, CRITERION_SUM_COLUMNS)})
+        rows.append(row)
+    return pd.DataFrame(rows, index=pd.Index(periods, name="Period"))
+
+
+def main(argv=None):
+    from submission_store import DEFAULT_STORE_PATH, SubmissionStore
+
+    parser = argparse.ArgumentParser(description="Write a state fiscal year's Incident Log as CSV.")
+    parser.add_argument("output", help="CSV file to write, or - for stdout")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--fiscal-year", type=int, default=fiscal_year(date.today()),
+                        help="year the fiscal year ends in (default: the current one)")
+    args = parser.parse_args(argv)
+
+    store = SubmissionStore(args.store)
+    log = incident_log_frame(args.fiscal_year, store.fiscal_year_rollups(args.fiscal_year))
+    log.to_csv(sys.stdout if args.output == "-" else args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import numpy as np
+
+from experience_record import HANDBOOK_CRITERIA
+
+CRITERIA_COUNT = len(HANDBOOK_CRITERIA)
+RATING_VALUES = 11  # handbook sliders run from 0 to 10
+# Period key of the all-time aggregate; monthly aggregates are keyed "YYYY-MM"
+ALL_TIME = "all"
+
+HISTOGRAM_COLUMNS = tuple(f"h{value}" for value in range(RATING_VALUES))
+# Columns of a rating_stats row, after its (employee_name, criterion, period) key
+STAT_COLUMNS = ("reports", "mean", "m2", "min", "max", *HISTOGRAM_COLUMNS)
+_REPORTS, _MEAN, _M2, _MIN, _MAX = range(5)
+_HISTOGRAM = slice(5, None)
+_VALUES = np.arange(RATING_VALUES, dtype=np.float64)
+
+
+# Running count, mean, variance (Welford's M2), min/max and 0-10 histogram of one
+# employee's ratings for one criterion over one period
+class RunningStats:
+    __slots__ = ("reports", "mean", "m2", "minimum", "maximum", "histogram")
+
+    def __init__(self, reports=0, mean=0.0, m2=0.0, minimum=None, maximum=None, histogram=None):
+        self.reports = reports
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.histogram = list(histogram) if histogram is not None else [0] * RATING_VALUES
+
+    def __repr__(self):
+        return f"RunningStats(reports={self.reports}, mean={self.mean:.3f}, variance={self.variance:.3f})"
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["reports"], row["mean"], row["m2"], row["min"], row["max"],
+                   [row[column] for column in HISTOGRAM_COLUMNS])
+
+    # Statistics from one row of a block (see block_from_histograms)
+    @classmethod
+    def from_block_row(cls, values):
+        reports = int(values[_REPORTS])
+        if not reports:
+            return cls()
+        return cls(reports, float(values[_MEAN]), float(values[_M2]), int(values[_MIN]), int(values[_MAX]),
+                   [int(count) for count in values[_HISTOGRAM]])
+
+    # Values in STAT_COLUMNS order
+    def row(self):
+        return (self.reports, self.mean, self.m2, self.minimum, self.maximum, *self.histogram)
+
+    # Sample variance; 0 until there are two reports
+    @property
+    def variance(self):
+        return self.m2 / (self.reports - 1) if self.reports > 1 else 0.0
+
+    def add(self, rating):
+        self.merge(RunningStats.of([rating]))
+
+    # Fold another aggregate in (Chan et al.'s pairwise form of Welford's update)
+    def merge(self, other):
+        if not other.reports:
+            return
+        total = self.reports + other.reports
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.reports * other.reports / total
+        self.mean += delta * other.reports / total
+        self.reports = total
+        self.histogram = [mine + theirs for mine, theirs in zip(self.histogram, other.histogram)]
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+    # Take back ratings that were merged in earlier (a corrected or retracted report)
+    def remove(self, other):
+        if not other.reports:
+            return
+        remaining = self.reports - other.reports
+        histogram = [mine - theirs for mine, theirs in zip(self.histogram, other.histogram)]
+        if remaining < 0 or min(histogram) < 0:
+            raise ValueError("removing ratings that were never added")
+        if remaining == 0:
+            self.__init__()
+            return
+        mean = (self.mean * self.reports - other.mean * other.reports) / remaining
+        delta = other.mean - mean
+        self.m2 = max(self.m2 - other.m2 - delta * delta * remaining * other.reports / self.reports, 0.0)
+        self.mean = mean
+        self.reports = remaining
+        self.histogram = histogram
+        # The histogram still knows the extremes, so min/max survive removals exactly
+        present = [value for value, count in enumerate(histogram) if count]
+        self.minimum, self.maximum = present[0], present[-1]
+
+    # Exact statistics of a set of ratings given as its 0-10 histogram
+    @classmethod
+    def from_histogram(cls, histogram):
+        histogram = [int(count) for count in histogram]
+        reports = sum(histogram)
+        if not reports:
+            return cls()
+        mean = sum(value * count for value, count in enumerate(histogram)) / reports
+        m2 = sum(count * (value - mean) ** 2 for value, count in enumerate(histogram) if count)
+        present = [value for value, count in enumerate(histogram) if count]
+        return cls(reports, mean, m2, present[0], present[-1], histogram)
+
+    @classmethod
+    def of(cls, ratings):
+        return cls.from_histogram(np.bincount(np.asarray(ratings, dtype=np.int64), minlength=RATING_VALUES))
+
+
+# Function to compute exact statistics from 0-10 histograms: (keys, 11) counts -> (keys, STAT_COLUMNS) block
+def block_from_histograms(histograms):
+    counts = np.asarray(histograms, dtype=np.float64).reshape(-1, RATING_VALUES)
+    block = np.zeros((len(counts), len(STAT_COLUMNS)))
+    block[:, _REPORTS] = counts.sum(axis=1)
+    block[:, _HISTOGRAM] = counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        block[:, _MEAN] = np.nan_to_num(counts @ _VALUES / block[:, _REPORTS])
+    block[:, _M2] = (counts * (_VALUES - block[:, _MEAN, None]) ** 2).sum(axis=1)
+    _extremes(block)
+    return block
+
+
+# Function to fold a block of statistics into another row by row, the vectorized form of
+# RunningStats.merge, or with remove=True of RunningStats.remove; emptied rows come back as zeros
+def combine(current, change, remove=False):
+    current = np.asarray(current, dtype=np.float64)
+    change = np.asarray(change, dtype=np.float64)
+    n_a, mean_a, m2_a = current[:, _REPORTS], current[:, _MEAN], current[:, _M2]
+    n_b, mean_b, m2_b = change[:, _REPORTS], change[:, _MEAN], change[:, _M2]
+    result = np.zeros_like(current)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if remove:
+            result[:, _HISTOGRAM] = current[:, _HISTOGRAM] - change[:, _HISTOGRAM]
+            if (result[:, _HISTOGRAM] < 0).any():
+                raise ValueError("removing ratings that were never added")
+            n = n_a - n_b
+            mean = (mean_a * n_a - mean_b * n_b) / n
+            delta = mean_b - mean
+            m2 = np.maximum(m2_a - m2_b - delta * delta * n * n_b / n_a, 0.0)
+        else:
+            result[:, _HISTOGRAM] = current[:, _HISTOGRAM] + change[:, _HISTOGRAM]
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            mean = mean_a + delta * n_b / n
+            m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    empty = n == 0
+    result[:, _REPORTS] = n
+    result[:, _MEAN] = np.where(empty, 0.0, mean)
+    result[:, _M2] = np.where(empty, 0.0, m2)
+    _extremes(result)
+    return result
+
+
+# min/max are read off the histogram, so they stay exact after removals too; empty rows get zeros
+def _extremes(block):
+    present = block[:, _HISTOGRAM] > 0
+    block[:, _MIN] = present.argmax(axis=1)
+    block[:, _MAX] = np.where(present.any(axis=1), RATING_VALUES - 1 - present[:, ::-1].argmax(axis=1), 0)
+
+
+# Function to aggregate a batch of stored rows, given as (employee names, experience_date,
+# handbook_ratings) triples, into a list of (employee, criterion, period) keys and a block of
+# their statistics, one row per key, for every named employee, each month and ALL_TIME;
+# rows without ratings or employees are skipped
+def aggregate(rows):
+    keys = {}
+    key_codes = []
+    blobs = []
+    for names, experience_date, ratings in rows:
+        if ratings is None or not names:
+            continue
+        periods = (ALL_TIME, experience_date[:7]) if experience_date else (ALL_TIME,)
+        for name in names:
+            for period in periods:
+                key_codes.append(keys.setdefault((name, period), len(keys)))
+                blobs.append(ratings)
+    if not blobs:
+        return [], np.zeros((0, len(STAT_COLUMNS)))
+    ratings = np.frombuffer(b"".join(blobs), dtype=np.uint8).reshape(-1, CRITERIA_COUNT)
+    if ratings.max() >= RATING_VALUES:
+        raise ValueError(f"handbook ratings run from 0 to {RATING_VALUES - 1}, got {ratings.max()}")
+    # One histogram per (employee, period, criterion) group, counted in a single bincount
+    groups = np.asarray(key_codes, dtype=np.int64)[:, None] * CRITERIA_COUNT + np.arange(CRITERIA_COUNT)
+    histograms = np.bincount(
+        (groups * RATING_VALUES + ratings).ravel(), minlength=len(keys) * CRITERIA_COUNT * RATING_VALUES
+    )
+    stat_keys = [(name, criterion, period) for name, period in keys for criterion in range(CRITERIA_COUNT)]
+    return stat_keys, block_from_histograms(histograms)
+
+
+# Function to lay out one employee's statistics (criterion -> RunningStats) as a scorecard table
+def scorecard_frame(stats):
+    import pandas as pd
+
+    return pd.DataFrame(
+        [
+            {"Reports": item.reports, "Mean": item.mean, "Std": item.variance ** 0.5,
+             "Min": item.minimum, "Max": item.maximum, **dict(zip(map(str, range(RATING_VALUES)), item.histogram))}
+            for item in stats.values()
+        ],
+        index=list(stats),
+    )
@@ -0,0 +1,251 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from experience_record import HANDBOOK_CRITERIA
+
+CRITERIA_COUNT = len(HANDBOOK_CRITERIA)
+RATING_VALUES = 11  # handbook sliders run from 0 to 10
+PERCENTILES = (25, 50, 75, 90)
+
+
+# Function to read percentiles out of per-group rating histograms (..., 11 counts)
+def histogram_percentiles(counts, percentiles=PERCENTILES):
+    totals = counts.sum(axis=-1, keepdims=True)
+    cumulative = counts.cumsum(axis=-1)
+    result = []
+    for q in percentiles:
+        # Lower-nearest-rank percentile: first rating whose cumulative share reaches q
+        target = np.ceil(totals * q / 100.0)
+        rank = (cumulative < np.maximum(target, 1)).sum(axis=-1).astype(float)
+        rank[totals[..., 0] == 0] = np.nan
+        result.append(rank)
+    return np.stack(result, axis=-1)
+
+
+# Columnar copy of the stored handbook ratings (rows x 16 criteria, uint8) at one store revision.
+# Never changed once built: appending returns a new snapshot, so a reader holding one sees arrays
+# that always belong together however the shared matrix is refreshed meanwhile.
+class RatingsSnapshot:
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.months = np.empty(0, dtype=np.int32)
+        self.service = np.empty(0, dtype=np.uint8)
+        # Stored criterion-major so each criterion is one contiguous uint8 column
+        self.columns = np.empty((CRITERIA_COUNT, 0), dtype=np.uint8)
+        # (row, employee) pairs; a report can name several employees
+        self.pair_rows = np.empty(0, dtype=np.int64)
+        self.pair_employees = np.empty(0, dtype=np.int32)
+        self.employees = []
+        self._employee_codes = {}
+        self.revision = 0
+        self.change_revision = 0
+        self._results = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def ratings(self):
+        return self.columns.T
+
+    # Function to return a copy with a block of rows appended; employee_pairs is (submission id, name) pairs
+    def appended(self, ids, dates, service, ratings, employee_pairs=(), revision=None):
+        ids = np.asarray(ids, dtype=np.int64)
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        snapshot = RatingsSnapshot()
+        snapshot.change_revision = self.change_revision
+        snapshot.ids = np.concatenate([self.ids, ids])
+        snapshot.dates = np.concatenate([self.dates, dates])
+        snapshot.months = np.concatenate([self.months, dates.astype("datetime64[M]").astype(np.int32)])
+        snapshot.service = np.concatenate([self.service, np.asarray(service, dtype=np.uint8)])
+        block = np.asarray(ratings, dtype=np.uint8).reshape(-1, CRITERIA_COUNT)
+        snapshot.columns = np.ascontiguousarray(np.concatenate([self.columns, block.T], axis=1))
+        snapshot.employees = list(self.employees)
+        snapshot._employee_codes = dict(self._employee_codes)
+        snapshot.pair_rows, snapshot.pair_employees = self.pair_rows, self.pair_employees
+        if len(employee_pairs):
+            pair_ids, names = zip(*employee_pairs)
+            codes = np.fromiter((snapshot._employee_code(name) for name in names), dtype=np.int32, count=len(names))
+            rows = len(self.ids) + np.searchsorted(ids, np.asarray(pair_ids, dtype=np.int64))
+            snapshot.pair_rows = np.concatenate([self.pair_rows, rows])
+            snapshot.pair_employees = np.concatenate([self.pair_employees, codes])
+        snapshot.revision = revision if revision is not None else (int(ids[-1]) if len(ids) else self.revision)
+        return snapshot
+
+    # Function to return a copy that only moves the revision on (no rated rows were added)
+    def advanced(self, revision):
+        snapshot = RatingsSnapshot()
+        snapshot.__dict__.update(self.__dict__)
+        snapshot.revision = revision
+        snapshot._results = {}
+        return snapshot
+
+    def _employee_code(self, name):
+        code = self._employee_codes.get(name)
+        if code is None:
+            code = self._employee_codes[name] = len(self.employees)
+            self.employees.append(name)
+        return code
+
+    # Function to build a row mask for the dashboard filters
+    def mask(self, start=None, end=None, min_service=1, max_service=5):
+        mask = (self.service >= min_service) & (self.service <= max_service)
+        if start is not None:
+            mask &= self.dates >= np.datetime64(start, "D")
+        if end is not None:
+            mask &= self.dates <= np.datetime64(end, "D")
+        return mask
+
+    # Results are memoized per filter for the life of the snapshot
+    def _cached(self, name, key, compute):
+        key = (name,) + key
+        result = self._results.get(key)
+        if result is None:
+            result = self._results[key] = compute()
+        return result
+
+    def _pairs(self, mask, employees):
+        keep = mask[self.pair_rows]
+        if employees:
+            wanted = [self._employee_codes[name] for name in employees if name in self._employee_codes]
+            keep &= np.isin(self.pair_employees, wanted)
+        return self.pair_rows[keep], self.pair_employees[keep]
+
+    # Function to turn the filters into sorted row indices (indexing beats boolean masks per column)
+    def _rows(self, mask, employees):
+        if employees:
+            rows, _ = self._pairs(mask, employees)
+            return np.unique(rows)
+        return np.flatnonzero(mask)
+
+    # Function to sum every criterion over integer group codes: (groups, 16)
+    def _group_sums(self, rows, codes, groups):
+        return np.stack([np.bincount(codes, weights=column.take(rows), minlength=groups) for column in self.columns], axis=1)
+
+    # Rating counts per criterion: (16, 11)
+    def distribution(self, start=None, end=None, min_service=1, max_service=5, employees=()):
+        def compute():
+            rows = self._rows(self.mask(start, end, min_service, max_service), employees)
+            counts = np.stack([np.bincount(column.take(rows), minlength=RATING_VALUES) for column in self.columns])
+            return pd.DataFrame(counts, index=HANDBOOK_CRITERIA)
+
+        return self._cached("distribution", (start, end, min_service, max_service, tuple(employees)), compute)
+
+    # Mean and percentiles per criterion
+    def criterion_summary(self, start=None, end=None, min_service=1, max_service=5, employees=()):
+        def compute():
+            counts = self.distribution(start, end, min_service, max_service, employees).to_numpy()
+            totals = counts.sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = (counts * np.arange(RATING_VALUES)).sum(axis=1) / totals
+            summary = pd.DataFrame({"Reports": totals, "Mean": means}, index=HANDBOOK_CRITERIA)
+            percentiles = histogram_percentiles(counts)
+            for i, q in enumerate(PERCENTILES):
+                summary[f"P{q}"] = percentiles[:, i]
+            return summary
+
+        return self._cached("criterion_summary", (start, end, min_service, max_service, tuple(employees)), compute)
+
+    # Mean rating per employee and criterion, plus the report count
+    def employee_means(self, start=None, end=None, min_service=1, max_service=5, employees=()):
+        def compute():
+            rows, codes = self._pairs(self.mask(start, end, min_service, max_service), employees)
+            groups = len(self.employees)
+            reports = np.bincount(codes, minlength=groups)
+            sums = self._group_sums(rows, codes, groups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = sums / reports[:, None]
+            frame = pd.DataFrame(means, index=self.employees, columns=HANDBOOK_CRITERIA)
+            frame.insert(0, "Reports", reports)
+            frame.insert(1, "Overall", sums.sum(axis=1) / np.maximum(reports * CRITERIA_COUNT, 1))
+            return frame[frame["Reports"] > 0].sort_values("Overall")
+
+        return self._cached("employee_means", (start, end, min_service, max_service, tuple(employees)), compute)
+
+    # Mean rating per criterion for each period ("M" for months, "Y" for years)
+    def period_means(self, start=None, end=None, min_service=1, max_service=5, employees=(), period="M"):
+        def compute():
+            rows = self._rows(self.mask(start, end, min_service, max_service), employees)
+            periods = self.months[rows]
+            if period == "Y":
+                periods = periods // 12
+            first = int(periods.min()) if len(periods) else 0
+            codes = periods - first
+            groups = int(codes.max()) + 1 if len(codes) else 0
+            reports = np.bincount(codes, minlength=groups)
+            sums = self._group_sums(rows, codes, groups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = sums / reports[:, None]
+            labels = np.arange(first, first + groups).astype("datetime64[Y]" if period == "Y" else "datetime64[M]")
+            frame = pd.DataFrame(means, index=pd.PeriodIndex(labels.astype(str), freq=period), columns=HANDBOOK_CRITERIA)
+            frame.insert(0, "Reports", reports)
+            return frame[frame["Reports"] > 0]
+
+        return self._cached("period_means", (start, end, min_service, max_service, tuple(employees), period), compute)
+
+
+# The shared, refreshable ratings matrix: a reference to its current snapshot, replaced as a
+# whole under the lock. Attribute reads and queries go to the snapshot current at the time.
+class RatingsMatrix:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.snapshot = RatingsSnapshot()
+
+    def __getattr__(self, name):
+        return getattr(self.snapshot, name)
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    # Function to append a block of rows; employee_pairs is (submission id, name) pairs
+    def append(self, ids, dates, service, ratings, employee_pairs=(), revision=None):
+        with self._lock:
+            self.snapshot = self.snapshot.appended(ids, dates, service, ratings, employee_pairs, revision)
+
+    # Function to load submissions added to the store since the last refresh
+    def refresh(self, store):
+        with self._lock:
+            snapshot = self.snapshot
+            # A corrected or retracted report can be anywhere in the matrix; start over
+            change_revision = store.change_revision()
+            if change_revision != snapshot.change_revision:
+                snapshot = RatingsSnapshot()
+                snapshot.change_revision = change_revision
+            revision = store.revision()
+            if revision == snapshot.revision:
+                self.snapshot = snapshot
+                return False
+            rows = store.query(
+                "SELECT id, experience_date, customer_service_rating, handbook_ratings FROM submissions"
+                " WHERE id > ? AND id <= ? AND handbook_ratings IS NOT NULL ORDER BY id",
+                (snapshot.revision, revision),
+            )
+            pairs = store.query(
+                "SELECT e.submission_id, e.employee_name FROM submission_employees e"
+                " JOIN submissions s ON s.id = e.submission_id"
+                " WHERE e.submission_id > ? AND e.submission_id <= ? AND s.handbook_ratings IS NOT NULL",
+                (snapshot.revision, revision),
+            )
+            if rows:
+                ids, dates, service, blobs = zip(*rows)
+                ratings = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+                service = [value or 0 for value in service]
+                snapshot = snapshot.appended(ids, pd.to_datetime(pd.Series(dates), errors="coerce").values, service,
+                                             ratings, [tuple(pair) for pair in pairs], revision)
+            else:
+                snapshot = snapshot.advanced(revision)
+            self.snapshot = snapshot
+            return True
+
+
+_matrix = RatingsMatrix()
+
+
+# Function to get the ratings as of the store's latest revision: the process-wide matrix is
+# refreshed, and its current snapshot returned, which later refreshes leave untouched
+def get_ratings_matrix(store):
+    _matrix.refresh(store)
+    return _matrix.snapshot
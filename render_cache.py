@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time
+
+# Default bounds for the process-wide PDF cache (overridable through the environment)
+DEFAULT_MAX_ENTRIES = int(os.environ.get("BEC_PDF_CACHE_ENTRIES", 256))
+DEFAULT_MAX_BYTES = int(os.environ.get("BEC_PDF_CACHE_BYTES", 64 * 1024 * 1024))
+# Directory and size bound of the on-disk PDF cache shared by exports across processes and runs
+DEFAULT_DISK_DIR = os.environ.get("BEC_PDF_DISK_CACHE", "pdf_cache")
+DEFAULT_DISK_BYTES = int(os.environ.get("BEC_PDF_DISK_CACHE_BYTES", 2 * 1024 ** 3))
+
+
+# Function to turn a report's data into plain JSON values so equal inputs hash equally
+def _normalize(value):
+    if isinstance(value, dict):
+        # Keep key order: the PDF renders sections in insertion order
+        return [[str(key), _normalize(item)] for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+# Function to compute a stable content hash of a data dict
+def stable_hash(data, namespace=""):
+    payload = json.dumps(_normalize(data), separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256(namespace.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(payload.encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Bounded LRU cache of rendered documents, evicting by entry count and total bytes
+class RenderCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Whether key is cached, without counting a hit or a miss or refreshing its place
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            # A single payload larger than the whole budget is never retained
+            if len(payload) > self.max_bytes:
+                return
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    # Return the cached rendering of data, rendering it only on a miss
+    def get_or_render(self, namespace, data, render):
+        key = stable_hash(data, namespace)
+        payload = self.get(key)
+        if payload is None:
+            payload = render(data)
+            self.put(key, payload)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Content-addressed cache of rendered documents on disk, one file per key (see stable_hash); files are
+# written under a temporary name and renamed, so concurrent processes never see a partial document
+class DiskCache:
+    def __init__(self, directory=DEFAULT_DISK_DIR, max_bytes=DEFAULT_DISK_BYTES, suffix=".pdf"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    # Path of the cached document, or None; a hit refreshes the file's mtime for prune()
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key, payload):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(partial, "wb") as output:
+            output.write(payload)
+        os.replace(partial, path)
+        return path
+
+    # Function to delete the least recently used documents until the cache fits in max_bytes
+    def prune(self):
+        files = []
+        for folder, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(self.suffix):
+                    try:
+                        stat = os.stat(os.path.join(folder, name))
+                    except FileNotFoundError:
+                        # Pruned meanwhile by another process
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, os.path.join(folder, name)))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Process-wide cache shared by every Streamlit session and rerun
+pdf_cache = RenderCache()
@@ -0,0 +1,145 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from render_cache import pdf_cache, stable_hash
+from session_budget import session_artifacts
+
+# Renders share one executor per process; threads, because the render functions live in the
+# Streamlit script module and cannot be pickled into worker processes
+RENDER_WORKERS = int(os.environ.get("BEC_RENDER_WORKERS", 2))
+# Seconds between checks of a pending render while its button is disabled
+POLL_INTERVAL = float(os.environ.get("BEC_RENDER_POLL", 0.5))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# Classes built by pdf_class, by the form module, class name, method code and font configuration
+_pdf_classes = {}
+_pdf_classes_lock = threading.Lock()
+
+
+# Function to mix a form's PDF sections into ReportPDF; report_pdf, and fpdf with it, load on the
+# first render. Streamlit runs the form script afresh on every rerun, defining a new sections class
+# each time, so the class built for the first is looked up by what the sections are, not by identity.
+def pdf_class(sections):
+    from report_pdf import ReportPDF
+
+    key = (
+        sections.__module__,
+        sections.__qualname__,
+        tuple((name, value.__code__) for name, value in vars(sections).items() if hasattr(value, "__code__")),
+        tuple(ReportPDF.ttf_paths.items()),
+    )
+    with _pdf_classes_lock:
+        built = _pdf_classes.get(key)
+        if built is None:
+            built = _pdf_classes[key] = type(sections.__name__, (sections, ReportPDF), {})
+        return built
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="pdf-render")
+        return _executor
+
+
+# The render a session is currently waiting for, identified by the content hash of its inputs.
+# Once shown, the PDF is handed to the session's artifacts and the future is dropped.
+class RenderJob:
+    __slots__ = ("key", "future")
+
+    def __init__(self, key, future):
+        self.key = key
+        self.future = future
+
+    def done(self):
+        return self.future is None or self.future.done()
+
+
+def _render_into_cache(key, data, render):
+    payload = pdf_cache.get(key)
+    if payload is None:
+        payload = render(data)
+        pdf_cache.put(key, payload)
+    return payload
+
+
+# Function to drop a session slot's job for inputs other than key; a render still queued is
+# cancelled, one already started runs to completion and only fills the cache
+def cancel_stale(jobs, slot, key):
+    job = jobs.get(slot)
+    if job is not None and job.key != key:
+        if job.future is not None:
+            job.future.cancel()
+        del jobs[slot]
+
+
+# Function to start (or reuse) the background render of data for one slot of a session.
+# jobs is the session's mutable mapping; a job for different inputs in the same slot is cancelled.
+def submit_render(jobs, slot, namespace, data, render):
+    key = stable_hash(data, namespace)
+    job = jobs.get(slot)
+    if job is not None and job.key == key:
+        return job
+    cancel_stale(jobs, slot, key)
+    payload = pdf_cache.get(key)
+    if payload is not None:
+        future = Future()
+        future.set_result(payload)
+    else:
+        future = get_executor().submit(_render_into_cache, key, data, render)
+    job = jobs[slot] = RenderJob(key, future)
+    return job
+
+
+# Function to show the PDF download button, disabled while the render is still running. Nothing
+# is rendered until asked for: a PDF already in the cache is offered at once, others once the
+# prepare button is clicked, or at once when start is set (a form's submit).
+def pdf_download_button(namespace, data, render, label, file_name, mime='application/octet-stream',
+                        start=False, prepare_label="Prepare PDF"):
+    import streamlit as st
+
+    slot = f"pdf_render_{namespace}"
+    key = stable_hash(data, namespace)
+    job = st.session_state.get(slot)
+    if job is None or job.key != key:
+        # Edited inputs supersede the job for the previous ones
+        cancel_stale(st.session_state, slot, key)
+        if not start and key not in pdf_cache and not st.button(prepare_label, key=f"{slot}_prepare"):
+            return
+    job = submit_render(st.session_state, slot, namespace, data, render)
+    if job.done():
+        _show_result(job, slot, label, file_name, mime, lambda: _render_into_cache(key, data, render))
+        return
+
+    # Poll only this fragment until the render finishes, so the script itself never waits; once
+    # it has, rerun the whole app, whose next run shows the result outside the polling fragment
+    @st.fragment(run_every=POLL_INTERVAL)
+    def pending_download():
+        current = st.session_state.get(slot)
+        if current is None or current.done():
+            st.rerun()
+        st.button(f"{label} (preparing…)", disabled=True, key=f"{slot}_pending")
+
+    pending_download()
+
+
+# The PDF is kept with the session's artifacts (which may spill it to disk while the session is
+# idle) and only read when the button is clicked, rather than on every rerun; rerender serves a
+# click that comes after the session's artifacts were dropped
+def _show_result(job, slot, label, file_name, mime, rerender):
+    import streamlit as st
+
+    artifacts = session_artifacts()
+    if job.future is not None:
+        error = job.future.exception()
+        if error is not None:
+            st.error(f"The PDF could not be rendered: {error}")
+            return
+        artifacts.put(slot, job.future.result())
+        job.future = None
+    st.download_button(label=label, data=artifacts.loader(slot, rerender), file_name=file_name, mime=mime)
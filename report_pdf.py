@@ -0,0 +1,413 @@
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+HEADER_TEXT = 'Blue Earth County Career Workforce Center Experience'
+
+# DejaVu Sans, where the system has it (the fonts-dejavu package on Debian and Ubuntu, dejavu-sans-fonts
+# on Fedora), is the default Unicode font
+_DEJAVU_DIRS = ("/usr/share/fonts/truetype/dejavu", "/usr/share/fonts/dejavu", "/usr/local/share/fonts/dejavu")
+
+
+# Function to find a DejaVu Sans file of the given name, or None
+def _system_font(name):
+    return next((path for path in (os.path.join(folder, name) for folder in _DEJAVU_DIRS) if os.path.exists(path)),
+                None)
+
+
+# TrueType files for Unicode reports, by style. BEC_PDF_FONT defaults to DejaVu Sans when installed;
+# set it to an empty value, or leave it unset without DejaVu, for the core latin-1 Arial.
+# Bold and italic fall back to the regular file when not given.
+_REGULAR_TTF = os.environ.get("BEC_PDF_FONT", _system_font("DejaVuSans.ttf"))
+TTF_PATHS = {
+    '': _REGULAR_TTF,
+    'B': os.environ.get("BEC_PDF_FONT_BOLD", _system_font("DejaVuSans-Bold.ttf") if _REGULAR_TTF else None),
+    'I': os.environ.get("BEC_PDF_FONT_ITALIC", _system_font("DejaVuSans-Oblique.ttf") if _REGULAR_TTF else None),
+}
+# Latin-1 glyphs are embedded in every subset, so most reports share one cached subset
+_BASE_SUBSET = frozenset(range(32, 256))
+SUBSET_CACHE_ENTRIES = 16
+
+# Typographic characters the core fonts lack, replaced before latin-1 output
+_LATIN1_FALLBACKS = str.maketrans({
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'", '\u2032': "'", '\u2039': '<', '\u203a': '>',
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u201f': '"', '\u2033': '"',
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-', '\u2014': '-', '\u2015': '-', '\u2212': '-',
+    '\u2026': '...', '\u2022': '*', '\u2023': '*', '\u2043': '-', '\u2122': '(TM)', '\u20ac': 'EUR',
+    '\u2002': ' ', '\u2003': ' ', '\u2009': ' ', '\u200a': ' ', '\u202f': ' ', '\u2007': ' ', '\u2008': ' ',
+    '\u200b': '', '\u200c': '', '\u200d': '', '\u2060': '', '\ufeff': '',
+    '\u0141': 'L', '\u0142': 'l', '\u0110': 'D', '\u0111': 'd', '\u0152': 'OE', '\u0153': 'oe', '\u0131': 'i',
+})
+
+# Layouts of static text, computed once per process and keyed by font, size, width and text
+_layouts = {}
+
+# Parsed TrueType metrics by path, and embedded subsets by (path, glyph set), shared by every PDF
+_ttf_metrics = {}
+_ttf_subsets = OrderedDict()
+_ttf_lock = threading.Lock()
+
+
+# Function to spell one character in latin-1: itself, its compatibility decomposition without
+# combining marks (so "ễ" becomes "e" and "ﬁ" becomes "fi"), or '?'
+def _latin1_char(char):
+    if ord(char) < 256:
+        return char
+    base = ''.join(part for part in unicodedata.normalize('NFKD', char) if not unicodedata.combining(part))
+    if base and all(ord(part) < 256 for part in base):
+        return base
+    return '?'
+
+
+# Function to tell whether every string in a report (nested dicts and lists of text) is latin-1
+def _is_latin1(value):
+    if isinstance(value, str):
+        return value.isascii() or max(value) <= '\xff'
+    if isinstance(value, dict):
+        return all(_is_latin1(key) and _is_latin1(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return all(_is_latin1(item) for item in value)
+    return True
+
+
+# Function to parse a TrueType file's metrics once per process
+def _load_ttf(path):
+    with _ttf_lock:
+        font = _ttf_metrics.get(path)
+        if font is None:
+            ttf = TTFontFile()
+            ttf.getMetrics(path)
+            font = _ttf_metrics[path] = {
+                'type': 'TTF',
+                'name': re.sub('[ ()]', '', ttf.fullName),
+                'desc': {
+                    'Ascent': int(round(ttf.ascent, 0)),
+                    'Descent': int(round(ttf.descent, 0)),
+                    'CapHeight': int(round(ttf.capHeight, 0)),
+                    'Flags': ttf.flags,
+                    'FontBBox': "[%s %s %s %s]" % tuple(int(round(b, 0)) for b in ttf.bbox),
+                    'ItalicAngle': int(ttf.italicAngle),
+                    'StemV': int(round(ttf.stemV, 0)),
+                    'MissingWidth': int(round(ttf.defaultWidth, 0)),
+                },
+                'up': round(ttf.underlinePosition),
+                'ut': round(ttf.underlineThickness),
+                'cw': ttf.charWidths,
+                # Character -> width, for line breaking without a get_string_width() call per character
+                'char_widths': {chr(code): width for code, width in enumerate(ttf.charWidths) if width},
+                'ttffile': path,
+                'originalsize': os.stat(path).st_size,
+            }
+        return font
+
+
+# Function to build (or reuse) the embedded subset of a font: the compressed glyph data, its
+# uncompressed length, the compressed CID-to-glyph map and the /W widths array
+def _ttf_subset(pdf, font, codes):
+    key = (font['ttffile'], codes)
+    with _ttf_lock:
+        subset = _ttf_subsets.get(key)
+        if subset is not None:
+            _ttf_subsets.move_to_end(key)
+            return subset
+    ttf = TTFontFile()
+    glyphs = ttf.makeSubset(font['ttffile'], sorted(codes))
+    cid_to_gid = bytearray(256 * 256 * 2)
+    for code, glyph in ttf.codeToGlyph.items():
+        cid_to_gid[code * 2] = glyph >> 8
+        cid_to_gid[code * 2 + 1] = glyph & 0xFF
+    # _putTTfontwidths() writes through _out(); capture its text instead of the document's
+    buffer, pdf.buffer = pdf.buffer, ''
+    try:
+        pdf._putTTfontwidths(dict(font, subset=codes, unifilename=None), ttf.maxUni)
+        widths = pdf.buffer.rstrip('\n')
+    finally:
+        pdf.buffer = buffer
+    subset = (zlib.compress(glyphs), len(glyphs), zlib.compress(bytes(cid_to_gid)), widths)
+    with _ttf_lock:
+        _ttf_subsets[key] = subset
+        while len(_ttf_subsets) > SUBSET_CACHE_ENTRIES:
+            _ttf_subsets.popitem(last=False)
+    return subset
+
+
+# Function to break text into lines exactly as FPDF.multi_cell does with justified alignment.
+# Returns [(word spacing, line)]; a spacing of None resets it to 0 before the line.
+def _wrap(text, char_widths, font_size, width, c_margin):
+    wmax = (width - 2 * c_margin) * 1000.0 / font_size
+    s = text.replace("\r", '')
+    nb = len(s)
+    if nb > 0 and s[nb - 1] == "\n":
+        nb -= 1
+    steps = []
+    sep = -1
+    i = j = l = ls = ns = 0
+    while i < nb:
+        c = s[i]
+        if c == "\n":
+            steps.append((None, s[j:i]))
+            i += 1
+            sep = -1
+            j = i
+            l = ns = 0
+            continue
+        if c == ' ':
+            sep = i
+            ls = l
+            ns += 1
+        l += char_widths.get(c, 0)
+        if l > wmax:
+            if sep == -1:
+                if i == j:
+                    i += 1
+                steps.append((None, s[j:i]))
+            else:
+                spacing = (wmax - ls) / 1000.0 * font_size / (ns - 1) if ns > 1 else 0
+                steps.append((spacing, s[j:sep]))
+                i = sep + 1
+            sep = -1
+            j = i
+            l = ns = 0
+        else:
+            i += 1
+    steps.append((None, s[j:i]))
+    return steps
+
+
+_TO_UNICODE = (
+    "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n/CIDSystemInfo\n"
+    "<</Registry (Adobe)\n/Ordering (UCS)\n/Supplement 0\n>> def\n"
+    "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+    "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+    "1 beginbfrange\n<0000> <FFFF> <0000>\nendbfrange\n"
+    "endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend"
+)
+
+
+# Page layout shared by every version's experience report
+class ReportPDF(FPDF):
+    ttf_paths = TTF_PATHS
+
+    # data, when given, is the report about to be rendered: text latin-1 can carry renders in the
+    # faster core font, and only text that needs more embeds the Unicode font
+    def __init__(self, data=None):
+        super().__init__()
+        # Set left and right margins to 10% of the page width (A4 width is 210mm, so 21mm margins)
+        self.set_left_margin(21)  # 10% of 210mm
+        self.set_right_margin(21)  # 10% of 210mm
+        self.font_name = 'Arial'
+        if self.ttf_paths.get('') and (data is None or not _is_latin1(data)):
+            self.font_name = 'report'
+            for style in ('', 'B', 'I'):
+                self._add_ttf(style, self.ttf_paths.get(style) or self.ttf_paths[''])
+
+    # Register a cached TrueType font, as add_font(uni=True) would without re-parsing the file
+    def _add_ttf(self, style, path):
+        font = _load_ttf(path)
+        fontkey = self.font_name + style
+        self.fonts[fontkey] = dict(font, i=len(self.fonts) + 1, fontkey=fontkey, subset=[], unifilename=None)
+        self.font_files[fontkey] = {'length1': font['originalsize'], 'type': 'TTF', 'ttffile': path}
+
+    # Latin-1 output cannot carry other characters: substitute punctuation, drop accents latin-1
+    # lacks ("Nguyễn" -> "Nguyen"), and only then fall back to '?'
+    def normalize_text(self, txt):
+        if self.unifontsubset or not isinstance(txt, str) or txt.isascii():
+            return txt
+        txt = txt.translate(_LATIN1_FALLBACKS)
+        try:
+            return txt.encode('latin1').decode('latin1')
+        except UnicodeEncodeError:
+            return ''.join(_latin1_char(char) for char in txt)
+
+    def _putfonts(self):
+        ttf_fonts = {key: font for key, font in self.fonts.items() if font.get('type') == 'TTF'}
+        if not ttf_fonts:
+            return super()._putfonts()
+        # FPDF writes the core fonts; the TrueType ones are written from the process-wide cache
+        for key in ttf_fonts:
+            del self.fonts[key]
+        try:
+            super()._putfonts()
+        finally:
+            self.fonts.update(ttf_fonts)
+        # Styles that share a file (bold and italic default to the regular one) share one embedded subset
+        by_file = {}
+        for font in ttf_fonts.values():
+            by_file.setdefault(font['ttffile'], []).append(font)
+        for fonts in by_file.values():
+            codes = _BASE_SUBSET.union(*(font['subset'] for font in fonts))
+            self._put_ttf(fonts[0], codes)
+            for font in fonts:
+                font['n'] = fonts[0]['n']
+
+    # The objects FPDF._putfonts writes for a TrueType font, from a cached subset
+    def _put_ttf(self, font, codes):
+        glyphs, glyphs_size, cid_to_gid, widths = _ttf_subset(self, font, codes)
+        fontname = 'MPDFAA+' + font['name']
+        font['n'] = self.n + 1
+        # Type0 font
+        self._newobj()
+        self._out('<</Type /Font')
+        self._out('/Subtype /Type0')
+        self._out('/BaseFont /' + fontname)
+        self._out('/Encoding /Identity-H')
+        self._out('/DescendantFonts [' + str(self.n + 1) + ' 0 R]')
+        self._out('/ToUnicode ' + str(self.n + 2) + ' 0 R')
+        self._out('>>')
+        self._out('endobj')
+        # CIDFontType2
+        self._newobj()
+        self._out('<</Type /Font')
+        self._out('/Subtype /CIDFontType2')
+        self._out('/BaseFont /' + fontname)
+        self._out('/CIDSystemInfo ' + str(self.n + 2) + ' 0 R')
+        self._out('/FontDescriptor ' + str(self.n + 3) + ' 0 R')
+        if font['desc'].get('MissingWidth'):
+            self._out('/DW %d' % font['desc']['MissingWidth'])
+        self._out(widths)
+        self._out('/CIDToGIDMap ' + str(self.n + 4) + ' 0 R')
+        self._out('>>')
+        self._out('endobj')
+        # ToUnicode
+        self._newobj()
+        self._out('<</Length ' + str(len(_TO_UNICODE)) + '>>')
+        self._putstream(_TO_UNICODE)
+        self._out('endobj')
+        # CIDSystemInfo
+        self._newobj()
+        self._out('<</Registry (Adobe)')
+        self._out('/Ordering (UCS)')
+        self._out('/Supplement 0')
+        self._out('>>')
+        self._out('endobj')
+        # Font descriptor
+        self._newobj()
+        self._out('<</Type /FontDescriptor')
+        self._out('/FontName /' + fontname)
+        for name in ('Ascent', 'Descent', 'CapHeight', 'Flags', 'FontBBox', 'ItalicAngle', 'StemV', 'MissingWidth'):
+            value = font['desc'][name]
+            if name == 'Flags':
+                value = (value | 4) & ~32
+            self._out(' /%s %s' % (name, value))
+        self._out('/FontFile2 ' + str(self.n + 2) + ' 0 R')
+        self._out('>>')
+        self._out('endobj')
+        # CIDToGIDMap
+        self._newobj()
+        self._out('<</Length ' + str(len(cid_to_gid)))
+        self._out('/Filter /FlateDecode')
+        self._out('>>')
+        self._putstream(cid_to_gid)
+        self._out('endobj')
+        # Font file
+        self._newobj()
+        self._out('<</Length ' + str(len(glyphs)))
+        self._out('/Filter /FlateDecode')
+        self._out('/Length1 ' + str(glyphs_size))
+        self._out('>>')
+        self._putstream(glyphs)
+        self._out('endobj')
+
+    def header(self):
+        self.set_font(self.font_name, 'B', 12)
+        self.static_line(10, HEADER_TEXT)
+
+    # Line breaks of text in the current font at the width left on the line
+    def _wrapped(self, text):
+        width = self.w - self.r_margin - self.x
+        char_widths = self.current_font.get('char_widths') or self.current_font['cw']
+        return width, _wrap(self.normalize_text(text), char_widths, self.font_size, width, self.c_margin)
+
+    # Cached layout of static text in the current font and the width left on the line
+    def _layout(self, text, kind):
+        width = self.w - self.r_margin - self.x
+        key = (kind, self.font_family, self.font_style, self.font_size_pt, width, text)
+        layout = _layouts.get(key)
+        if layout is None:
+            if kind == 'center':
+                layout = (width, (width - self.get_string_width(text)) / 2.0)
+            else:
+                layout = self._wrapped(text)
+            _layouts[key] = layout
+        return layout
+
+    # Draw wrapped lines with their word spacing, as multi_cell(w, h, text) does
+    def _draw_lines(self, width, steps, h=10):
+        for spacing, line in steps:
+            if spacing is None:
+                if self.ws > 0:
+                    self.ws = 0
+                    self._out('0 Tw')
+            else:
+                self.ws = spacing
+                self._out('%.3f Tw' % (spacing * self.k))
+            self.cell(width, h, line, 0, 2, 'J')
+        self.x = self.l_margin
+
+    # A centred single line of static text, as cell(0, h, text, 0, 1, 'C') would draw it
+    def static_line(self, h, text):
+        width, dx = self._layout(text, 'center')
+        self.x += dx - self.c_margin
+        self.cell(width, h, text, 0, 1, 'L')
+
+    # A static paragraph, as chapter_body draws it, with its line breaks computed once per process
+    def static_body(self, body):
+        self.set_font(self.font_name, '', 12)
+        self._draw_lines(*self._layout(body, 'wrap'))
+        self.ln()
+
+    def chapter_title(self, title):
+        self.set_font(self.font_name, 'B', 12)
+        self.cell(0, 10, title, 0, 1, 'L')
+        self.ln(4)
+
+    def chapter_body(self, body):
+        self.set_font(self.font_name, '', 12)
+        if self.unifontsubset:
+            # multi_cell() measures TrueType text with one get_string_width() call per character
+            self._draw_lines(*self._wrapped(body))
+        else:
+            self.multi_cell(0, 10, body)
+        self.ln()
+
+    # Render (title, body) sections one after another
+    def add_sections(self, sections):
+        for title, body in sections:
+            self.chapter_title(title)
+            self.chapter_body(body)
+
+    # Render a flat record (the version5 data shape) one section per field
+    def add_experience(self, data):
+        self.add_sections(data.items())
+
+    # Render an ExperienceRecord of any version from its sections: handbook ratings only when it
+    # has them, and its Code of Conduct selection when it has one
+    def add_record(self, record):
+        self.add_sections(record.pdf_sections())
+
+    # The finished document as bytes (output() returns the bytes as a latin-1 str for any font)
+    def output_bytes(self):
+        return self.output(dest='S').encode('latin1')
+
+
+# Function to render one flat record to PDF bytes
+def render_experience(data, pdf_class=ReportPDF):
+    pdf = pdf_class(data)
+    pdf.add_page()
+    pdf.add_experience(data)
+    return pdf.output_bytes()
+
+
+# Function to render a report's (title, body) sections, as ExperienceRecord.pdf_sections() lists them,
+# to PDF bytes; the bulk renderers pass sections, which pickle small, to their worker processes
+def render_sections(sections, pdf_class=ReportPDF):
+    pdf = pdf_class(sections)
+    pdf.add_page()
+    pdf.add_sections(sections)
+    return pdf.output_bytes()
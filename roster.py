@@ -0,0 +1,183 @@
+import difflib
+import heapq
+import os
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+# Names the forms offered before the roster was kept in the store
+SEED_NAMES = ("LeRoy", "Danielle", "Sarah")
+# The shared store's file (submission_store.DEFAULT_STORE_PATH), which the shared roster is read from
+STORE_PATH = os.environ.get("BEC_STORE_PATH", "submissions.db")
+
+
+# Function to reduce a name to the key it is deduplicated, searched and sorted by: accents
+# dropped, case folded and whitespace collapsed, so "José  Ruiz" and "jose ruiz" are one employee
+def name_key(name):
+    decomposed = unicodedata.normalize("NFKD", name)
+    return " ".join("".join(char for char in decomposed if not unicodedata.combining(char)).casefold().split())
+
+
+# Employee names held for prefix search. Every word of a name is indexed, so "smi" finds
+# "Jane Smith": _index is a sorted list of (name key from that word on, name key), and the
+# names starting with a prefix are one bisect away, however long the roster.
+# store is the SubmissionStore new names are saved to, or a function returning it; load, when
+# given, returns the names on first use instead of indexing names now.
+class Roster:
+    def __init__(self, names=(), store=None, load=None):
+        self._store = store
+        self._load = load
+        self._lock = threading.Lock()
+        self._names = {}
+        self._index = []
+        for name in names:
+            self._insert(name)
+        self._index.sort()
+        self._sorted = None
+
+    def __len__(self):
+        with self._lock:
+            self._loaded()
+            return len(self._names)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    # Function to index the names from load on first use; called with the lock held
+    def _loaded(self):
+        if self._load is not None:
+            for name in self._load():
+                self._insert(name)
+            self._index.sort()
+            self._load = None
+
+    # Load the roster kept in a submission store; names added later are saved back to it
+    @classmethod
+    def load(cls, store):
+        return cls(store.roster_names(), store)
+
+    # Function to index a name unless an equivalent one is known; returns the name as known
+    def _insert(self, name, sort=False):
+        name = " ".join(name.split())
+        key = name_key(name)
+        if not key:
+            return None
+        if key in self._names:
+            return self._names[key]
+        self._names[key] = name
+        words = key.split(" ")
+        for start in range(len(words)):
+            entry = (" ".join(words[start:]), key)
+            if sort:
+                insort(self._index, entry)
+            else:
+                self._index.append(entry)
+        return name
+
+    # All names, sorted by key
+    def names(self):
+        with self._lock:
+            self._loaded()
+            if self._sorted is None:
+                self._sorted = [self._names[key] for key in sorted(self._names)]
+            return self._sorted
+
+    # The roster's spelling of a name, or None when it is not on the roster
+    def get(self, name):
+        with self._lock:
+            self._loaded()
+            return self._names.get(name_key(name))
+
+    # Add a name (saving it to the store first) unless an equivalent one is on the roster;
+    # returns the roster's spelling, so the same employee is never entered twice
+    def add(self, name):
+        known = self.get(name)
+        if known is not None or not name_key(name):
+            return known
+        if self._store is not None:
+            store = self._store() if callable(self._store) else self._store
+            name = store.add_to_roster(name)
+        return self.extend([name])[0]
+
+    # Index names already saved to the store (see remember_names); returns the roster's spellings
+    def extend(self, names):
+        with self._lock:
+            self._loaded()
+            known = [self._insert(name, sort=True) for name in names]
+            self._sorted = None
+            return known
+
+    # Names with a word starting with the typed text, names starting with it first, then by key;
+    # every match is ranked before the list is cut to limit
+    def suggest(self, text, limit=8):
+        prefix = name_key(text)
+        if not prefix:
+            return []
+        with self._lock:
+            self._loaded()
+            found = set()
+            position = bisect_left(self._index, (prefix,))
+            while position < len(self._index) and self._index[position][0].startswith(prefix):
+                found.add(self._index[position][1])
+                position += 1
+            ranked = heapq.nsmallest(limit, found, key=lambda key: (not key.startswith(prefix), key))
+            return [self._names[key] for key in ranked]
+
+    # Names spelled like the typed text, for when no name starts with it ("Danelle" -> "Danielle")
+    def fuzzy(self, text, limit=3, cutoff=0.75):
+        with self._lock:
+            self._loaded()
+            keys = list(self._names)
+        return [self._names[key] for key in difflib.get_close_matches(name_key(text), keys, limit, cutoff)]
+
+
+# Function to read the names on a store file's roster with the sqlite3 module alone; None when
+# the file has no roster table yet (a new store, or one from before the roster)
+def read_names(path):
+    import sqlite3
+
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM roster")]
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+def _shared_store():
+    from submission_store import get_store
+
+    return get_store()
+
+
+# Function to read the shared roster's names. Straight from the file when it has a roster, so the
+# forms list names without importing submission_store (and numpy with it); otherwise through the
+# store, whose migrations create the roster.
+def _shared_names():
+    names = read_names(STORE_PATH)
+    return names if names is not None else _shared_store().roster_names()
+
+
+_roster = None
+_roster_lock = threading.Lock()
+
+
+# Shared roster, used by every session: its names are read once per process, on first use
+def get_roster():
+    global _roster
+    with _roster_lock:
+        if _roster is None:
+            _roster = Roster(store=_shared_store, load=_shared_names)
+        return _roster
+
+
+# Function to put the names on a report just saved to the shared store on the shared roster, so
+# every session suggests them at once; nothing to do before the roster is first used
+def remember_names(names):
+    with _roster_lock:
+        roster = _roster
+    if roster is not None and names:
+        roster.extend(names)
@@ -0,0 +1,278 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict, deque
+
+import instrumentation
+
+# Bytes of session artifacts (rendered PDFs, CSVs) kept in memory across all sessions of the process
+# before those of the least recently active sessions are spilled to disk
+DEFAULT_BUDGET_BYTES = int(os.environ.get("BEC_SESSION_BUDGET_BYTES", 32 * 1024 * 1024))
+# Seconds without a rerun after which a session's artifacts are spilled even under the budget
+DEFAULT_IDLE_SECONDS = float(os.environ.get("BEC_SESSION_IDLE", 300))
+DEFAULT_SPILL_DIR = os.environ.get("BEC_SESSION_SPILL_DIR") or os.path.join(tempfile.gettempdir(), "bec_sessions")
+
+
+# One artifact: its bytes while resident, and the file they were spilled to (kept until the
+# artifact is replaced or its session ends, so spilling it again costs nothing)
+class _Artifact:
+    __slots__ = ("payload", "path", "size", "writing", "discarded")
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.path = None
+        self.size = len(payload)
+        # Whether its file is being written outside the lock, and whether it was replaced or dropped since
+        self.writing = False
+        self.discarded = False
+
+
+# Process-wide account of the artifacts held for each session. Sessions are ordered by their last
+# activity; artifacts of idle sessions, then of the least recently active ones while the resident
+# total is over budget, are written to disk and read back when their session asks for them again.
+# The session making a request is never spilled. Files are written outside the lock, so one
+# session's spill never holds up another session's get or put.
+class SessionBudget:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 directory=DEFAULT_SPILL_DIR):
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.directory = directory
+        self._lock = threading.Lock()
+        # session -> {name: _Artifact}, least recently active first
+        self._sessions = OrderedDict()
+        self._active = {}
+        # Sessions whose handles were collected; a finalizer may run while this thread holds the
+        # lock (a garbage collection inside put or get), so it only queues them for the next call
+        self._dropped = deque()
+        self.resident = 0
+        self.spilled = 0
+        self.spills = 0
+        self.rehydrations = 0
+
+    # Store (or replace) an artifact of a session
+    def put(self, session, name, payload):
+        with self._lock:
+            artifacts = self._touch(session)
+            previous = artifacts.pop(name, None)
+            if previous is not None:
+                self._discard(previous)
+            artifacts[name] = _Artifact(payload)
+            self.resident += len(payload)
+            pending = self._enforce(session)
+        self._write(pending)
+        self._report(session)
+
+    # An artifact of a session, read back from disk if it was spilled; None if there is none (or
+    # the session was dropped). The file is read outside the lock, like the writes.
+    def get(self, session, name):
+        while True:
+            with self._lock:
+                artifact = self._touch(session, create=False).get(name)
+                if artifact is None:
+                    return None
+                path = artifact.path
+                if artifact.payload is not None:
+                    payload = artifact.payload
+                    pending = self._enforce(session)
+                    break
+            payload = missing = None
+            try:
+                with open(path, "rb") as spilled:
+                    payload = spilled.read()
+            except FileNotFoundError as error:
+                missing = error
+            with self._lock:
+                # Replaced or dropped while it was read: look again
+                if artifact.discarded:
+                    continue
+                if artifact.payload is None:
+                    if missing is not None:
+                        raise missing
+                    artifact.payload = payload
+                    self.resident += artifact.size
+                    self.spilled -= artifact.size
+                    self.rehydrations += 1
+                payload = artifact.payload
+                pending = self._enforce(session)
+                break
+        self._write(pending)
+        self._report(session)
+        return payload
+
+    # Mark a session active (a rerun) and spill what has gone idle elsewhere
+    def touch(self, session):
+        with self._lock:
+            self._touch(session)
+            pending = self._enforce(session)
+        self._write(pending)
+        self._report(session)
+
+    # Forget a session and delete its spilled artifacts
+    def drop(self, session):
+        with self._lock:
+            self._drop(session)
+
+    # Queue a session to be forgotten by the next call; safe from a finalizer, as it takes no lock
+    def drop_later(self, session):
+        self._dropped.append(session)
+
+    # Resident and spilled bytes of each session
+    def session_bytes(self):
+        with self._lock:
+            return {
+                session: (sum(a.size for a in artifacts.values() if a.payload is not None),
+                          sum(a.size for a in artifacts.values() if a.payload is None))
+                for session, artifacts in self._sessions.items()
+            }
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "resident_bytes": self.resident,
+                    "spilled_bytes": self.spilled, "spills": self.spills, "rehydrations": self.rehydrations}
+
+    # A session's artifacts, marked as its latest activity; an unknown session is added, or with
+    # create unset (a read, which must not bring back a dropped session) an empty dict returned
+    def _touch(self, session, create=True):
+        while self._dropped:
+            self._drop(self._dropped.popleft())
+        artifacts = self._sessions.get(session)
+        if artifacts is None:
+            if not create:
+                return {}
+            artifacts = self._sessions[session] = {}
+        else:
+            self._sessions.move_to_end(session)
+        self._active[session] = time.monotonic()
+        return artifacts
+
+    def _drop(self, session):
+        for artifact in self._sessions.pop(session, {}).values():
+            self._discard(artifact)
+        self._active.pop(session, None)
+        if instrumentation.ENABLED:
+            instrumentation.registry.remove_gauge("bec_session_resident_bytes", (("session", session),))
+
+    def _discard(self, artifact):
+        artifact.discarded = True
+        if artifact.payload is not None:
+            self.resident -= artifact.size
+        else:
+            self.spilled -= artifact.size
+        if artifact.path is not None:
+            try:
+                os.remove(artifact.path)
+            except FileNotFoundError:
+                pass
+
+    def _spill(self, artifact):
+        artifact.payload = None
+        self.resident -= artifact.size
+        self.spilled += artifact.size
+        self.spills += 1
+
+    # Spill idle sessions, then the least recently active ones until the resident total fits.
+    # Artifacts with a file already are spilled at once; the rest are returned for _write, with
+    # the bytes they will free counted as gone so that one pass does not pick more than it needs.
+    def _enforce(self, current):
+        idle_before = time.monotonic() - self.idle_seconds
+        pending = []
+        writing = 0
+        for session, artifacts in self._sessions.items():
+            if session == current:
+                continue
+            if self._active[session] > idle_before and self.resident - writing <= self.budget_bytes:
+                break
+            for artifact in artifacts.values():
+                if artifact.payload is None or artifact.writing:
+                    continue
+                if artifact.path is not None:
+                    self._spill(artifact)
+                else:
+                    artifact.writing = True
+                    writing += artifact.size
+                    pending.append(artifact)
+        return pending
+
+    # Write the artifacts _enforce picked to disk, outside the lock, then spill those still held
+    def _write(self, pending):
+        if not pending:
+            return
+        written = []
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for artifact in pending:
+                descriptor, path = tempfile.mkstemp(dir=self.directory, suffix=".bin")
+                with os.fdopen(descriptor, "wb") as output:
+                    output.write(artifact.payload)
+                written.append((artifact, path))
+        finally:
+            # Artifacts that could not be written stay resident, to be picked again by a later pass
+            with self._lock:
+                for artifact in pending:
+                    artifact.writing = False
+                for artifact, path in written:
+                    if artifact.discarded:
+                        os.remove(path)
+                        continue
+                    artifact.path = path
+                    self._spill(artifact)
+
+    def _report(self, session):
+        if not instrumentation.ENABLED:
+            return
+        with self._lock:
+            resident = sum(a.size for a in self._sessions.get(session, {}).values() if a.payload is not None)
+        registry = instrumentation.registry
+        registry.set_gauge("bec_session_resident_bytes", resident, (("session", session),))
+        registry.set_gauge("bec_session_artifacts_resident_bytes", self.resident)
+        registry.set_gauge("bec_session_artifacts_spilled_bytes", self.spilled)
+        registry.set_gauge("bec_sessions", len(self._sessions))
+
+
+budget = SessionBudget()
+
+
+# A session's handle on its artifacts, kept in its session state; when Streamlit discards the
+# session state the handle is collected and the session's artifacts go with it
+class SessionArtifacts:
+    def __init__(self, owner=None):
+        self.owner = owner or budget
+        self.session = uuid.uuid4().hex[:12]
+        weakref.finalize(self, self.owner.drop_later, self.session)
+
+    def put(self, name, payload):
+        self.owner.put(self.session, name, payload)
+
+    def get(self, name):
+        return self.owner.get(self.session, name)
+
+    # A callable returning the artifact, for st.download_button to call only when it is clicked.
+    # The click may come after the session was dropped (its handle collected while the page stayed
+    # open); then the artifact is rendered again by render, or a LookupError says it is gone.
+    def loader(self, name, render=None):
+        owner, session = self.owner, self.session
+
+        def load():
+            payload = owner.get(session, name)
+            if payload is not None:
+                return payload
+            if render is None:
+                raise LookupError(f"the {name} of this session is no longer available; reload the page")
+            return render()
+
+        return load
+
+
+# Function to return the current session's artifacts, marking the session active
+def session_artifacts():
+    import streamlit as st
+
+    if "session_artifacts" not in st.session_state:
+        st.session_state.session_artifacts = SessionArtifacts()
+    artifacts = st.session_state.session_artifacts
+    artifacts.owner.touch(artifacts.session)
+    return artifacts
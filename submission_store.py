@@ -0,0 +1,788 @@
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from conduct_catalog import CONDUCT_ITEMS, LEGACY_CATALOG
+from experience_record import HANDBOOK_CRITERIA, TEXT_FIELDS, ExperienceRecord
+from period_rollups import ROLLUP_COLUMNS, fiscal_year_key, fiscal_year_months
+from period_rollups import aggregate as aggregate_rollups
+from rating_stats import ALL_TIME, STAT_COLUMNS, RunningStats, aggregate, combine
+from roster import SEED_NAMES, name_key
+
+# Location of the shared submission database (overridable through the environment)
+DEFAULT_STORE_PATH = os.environ.get("BEC_STORE_PATH", "submissions.db")
+
+COLUMNS = (
+    "id",
+    "version",
+    "submitted_at",
+    "experience_date",
+    "experience_time",
+    "employee_name",
+    "customer_service_rating",
+    *TEXT_FIELDS,
+    "conduct_mask",
+    "conduct_catalog",
+    "handbook_ratings",
+)
+
+# Columns of a row passed to insert_rows(), in order (ids are assigned by the store). Its employee_name
+# is a tuple of names, or text split at commas (historical exports only have the names as text).
+INSERT_COLUMNS = COLUMNS[1:]
+_EMPLOYEE_COLUMN = INSERT_COLUMNS.index("employee_name")
+_DATE_COLUMN = INSERT_COLUMNS.index("experience_date")
+_RATINGS_COLUMN = INSERT_COLUMNS.index("handbook_ratings")
+_ROLLUP_COLUMNS = tuple(
+    INSERT_COLUMNS.index(column)
+    for column in ("experience_date", "customer_service_rating", "conduct_mask", "handbook_ratings")
+)
+
+
+# Function to read the employees named on the reports with ids in [first, last], as id -> tuple of names
+def _stored_employees(conn, first, last):
+    names = {}
+    for name, submission_id in conn.execute(
+        "SELECT employee_name, submission_id FROM submission_employees WHERE submission_id BETWEEN ? AND ?",
+        (first, last),
+    ):
+        names.setdefault(submission_id, []).append(name)
+    return {submission_id: tuple(found) for submission_id, found in names.items()}
+
+
+# Function to fold a batch's rating aggregates, as returned by aggregate(), into rating_stats
+# (or take them back out)
+def _apply_rating_stats(conn, changes, remove=False):
+    keys, block = changes
+    if not keys:
+        return
+    index = {key: position for position, key in enumerate(keys)}
+    current = np.zeros_like(block)
+    for pair in sorted({(employee, period) for employee, _, period in keys}):
+        for row in conn.execute(
+            f"SELECT criterion, {', '.join(STAT_COLUMNS)} FROM rating_stats WHERE employee_name = ? AND period = ?",
+            pair,
+        ):
+            position = index.get((pair[0], row[0], pair[1]))
+            if position is not None:
+                current[position] = tuple(row)[1:]
+    updated = combine(current, block, remove)
+    kept = updated[:, 0] > 0
+    conn.executemany(
+        f"INSERT OR REPLACE INTO rating_stats (employee_name, criterion, period, {', '.join(STAT_COLUMNS)})"
+        f" VALUES ({', '.join('?' for _ in range(3 + len(STAT_COLUMNS)))})",
+        [(*key, *values) for key, values, keep in zip(keys, updated.tolist(), kept.tolist()) if keep],
+    )
+    conn.executemany(
+        "DELETE FROM rating_stats WHERE employee_name = ? AND criterion = ? AND period = ?",
+        [key for key, keep in zip(keys, kept.tolist()) if not keep],
+    )
+
+
+# Migration: per-employee rating statistics kept up to date on every write, plus a log of
+# corrected and retracted reports; existing reports are aggregated in chunks
+def _add_rating_stats(conn):
+    conn.execute(f"""
+        CREATE TABLE rating_stats (
+            employee_name TEXT NOT NULL,
+            criterion INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            reports INTEGER NOT NULL,
+            mean REAL NOT NULL,
+            m2 REAL NOT NULL,
+            min INTEGER,
+            max INTEGER,
+            {', '.join(f'{column} INTEGER NOT NULL' for column in STAT_COLUMNS[5:])},
+            PRIMARY KEY (employee_name, period, criterion)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE submission_changes (
+            id INTEGER PRIMARY KEY,
+            submission_id INTEGER NOT NULL,
+            change TEXT NOT NULL,
+            changed_at TEXT NOT NULL
+        )
+    """)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, experience_date, handbook_ratings FROM submissions"
+            " WHERE id > ? AND handbook_ratings IS NOT NULL ORDER BY id LIMIT 50000",
+            (last_id,),
+        ).fetchall()
+        if not rows:
+            return
+        names = _stored_employees(conn, rows[0]["id"], rows[-1]["id"])
+        _apply_rating_stats(conn, aggregate((names.get(row["id"], ()), *tuple(row)[1:]) for row in rows))
+        last_id = rows[-1]["id"]
+
+
+# Function to add a batch's period rollups, as returned by period_rollups.aggregate(), to
+# period_rollups (or subtract them)
+def _apply_rollups(conn, changes, remove=False):
+    keys, block = changes
+    if not keys:
+        return
+    current = np.zeros_like(block)
+    index = {key: position for position, key in enumerate(keys)}
+    for row in conn.execute(
+        f"SELECT period, {', '.join(ROLLUP_COLUMNS)} FROM period_rollups"
+        f" WHERE period IN ({', '.join('?' for _ in keys)})",
+        keys,
+    ):
+        current[index[row[0]]] = tuple(row)[1:]
+    updated = current - block if remove else current + block
+    if (updated < 0).any():
+        raise ValueError("removing reports that were never added to the period rollups")
+    kept = updated[:, 0] > 0
+    conn.executemany(
+        f"INSERT OR REPLACE INTO period_rollups (period, {', '.join(ROLLUP_COLUMNS)})"
+        f" VALUES ({', '.join('?' for _ in range(1 + len(ROLLUP_COLUMNS)))})",
+        [(key, *values) for key, values, keep in zip(keys, updated.tolist(), kept.tolist()) if keep],
+    )
+    conn.executemany(
+        "DELETE FROM period_rollups WHERE period = ?",
+        [(key,) for key, keep in zip(keys, kept.tolist()) if not keep],
+    )
+
+
+# Migration: per fiscal year and per month counts of reports by customer service rating and by
+# conduct item, and handbook rating sums, kept up to date on every write; existing reports are
+# aggregated in chunks
+def _add_period_rollups(conn):
+    conn.execute(f"""
+        CREATE TABLE period_rollups (
+            period TEXT PRIMARY KEY,
+            {', '.join(f'{column} INTEGER NOT NULL' for column in ROLLUP_COLUMNS)}
+        ) WITHOUT ROWID
+    """)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, experience_date, customer_service_rating, conduct_mask, handbook_ratings FROM submissions"
+            " WHERE id > ? ORDER BY id LIMIT 50000",
+            (last_id,),
+        ).fetchall()
+        if not rows:
+            return
+        _apply_rollups(conn, aggregate_rollups(tuple(row)[1:] for row in rows))
+        last_id = rows[-1]["id"]
+
+
+# Function to add the free text of the reports with ids in [first, last] to the full-text index
+def _index_text(conn, first, last):
+    conn.execute(
+        f"INSERT INTO submissions_fts (rowid, {', '.join(SEARCH_FIELDS)})"
+        f" SELECT id, {', '.join(SEARCH_FIELDS)} FROM submissions WHERE id BETWEEN ? AND ?",
+        (first, last),
+    )
+
+
+# Function to put names on the employee roster; a name equivalent to one already there is skipped
+def _add_to_roster(conn, names):
+    conn.executemany(
+        "INSERT OR IGNORE INTO roster (name_key, name) VALUES (?, ?)",
+        [(name_key(name), " ".join(name.split())) for name in dict.fromkeys(names) if name_key(name)],
+    )
+
+
+# Migration: the statewide employee roster the forms offer names from, one row per name key
+# (see roster.name_key); it starts with the names the forms listed and everyone named on a report,
+# and every employee named on a report saved later joins it
+def _add_roster(conn):
+    conn.execute("CREATE TABLE roster (name_key TEXT PRIMARY KEY, name TEXT NOT NULL) WITHOUT ROWID")
+    _add_to_roster(conn, [*SEED_NAMES, *(row[0] for row in conn.execute(
+        "SELECT DISTINCT employee_name FROM submission_employees ORDER BY employee_name"))])
+
+
+# Schema migrations, applied in order and tracked through PRAGMA user_version; an entry is an
+# SQL script or a function run with the connection inside the migration's transaction
+MIGRATIONS = [
+    """
+    CREATE TABLE submissions (
+        id INTEGER PRIMARY KEY,
+        version TEXT NOT NULL,
+        submitted_at TEXT NOT NULL,
+        experience_date TEXT,
+        experience_time TEXT,
+        employee_name TEXT,
+        customer_service_rating INTEGER,
+        customer_service_feedback TEXT,
+        employee_activities TEXT,
+        actual_experience TEXT,
+        prescribed_activities TEXT,
+        prescribed_notes TEXT,
+        experience_notes TEXT,
+        conduct_items TEXT,
+        handbook_ratings BLOB
+    );
+    CREATE INDEX idx_submissions_date ON submissions (experience_date);
+    CREATE INDEX idx_submissions_employee ON submissions (employee_name);
+    CREATE INDEX idx_submissions_rating ON submissions (customer_service_rating);
+
+    -- One row per employee named on a report (version5 reports can name several)
+    CREATE TABLE submission_employees (
+        employee_name TEXT NOT NULL,
+        submission_id INTEGER NOT NULL,
+        PRIMARY KEY (employee_name, submission_id)
+    ) WITHOUT ROWID;
+    """,
+    # Full-text index over the qualitative fields. _insert() indexes each batch with one statement
+    # (an insert trigger would flush FTS5's pending terms once per row); triggers cover later edits.
+    """
+    CREATE VIRTUAL TABLE submissions_fts USING fts5(
+        customer_service_feedback,
+        actual_experience,
+        employee_activities,
+        prescribed_notes,
+        experience_notes,
+        content='submissions',
+        content_rowid='id',
+        tokenize='porter unicode61'
+    );
+    INSERT INTO submissions_fts (submissions_fts) VALUES ('rebuild');
+
+    CREATE TRIGGER submissions_fts_delete AFTER DELETE ON submissions BEGIN
+        INSERT INTO submissions_fts (submissions_fts, rowid, customer_service_feedback, actual_experience,
+                                     employee_activities, prescribed_notes, experience_notes)
+        VALUES ('delete', old.id, old.customer_service_feedback, old.actual_experience,
+                old.employee_activities, old.prescribed_notes, old.experience_notes);
+    END;
+    CREATE TRIGGER submissions_fts_update AFTER UPDATE ON submissions BEGIN
+        INSERT INTO submissions_fts (submissions_fts, rowid, customer_service_feedback, actual_experience,
+                                     employee_activities, prescribed_notes, experience_notes)
+        VALUES ('delete', old.id, old.customer_service_feedback, old.actual_experience,
+                old.employee_activities, old.prescribed_notes, old.experience_notes);
+        INSERT INTO submissions_fts (rowid, customer_service_feedback, actual_experience,
+                                     employee_activities, prescribed_notes, experience_notes)
+        VALUES (new.id, new.customer_service_feedback, new.actual_experience,
+                new.employee_activities, new.prescribed_notes, new.experience_notes);
+    END;
+    """,
+    # Conduct selections as a 16-bit mask over conduct_catalog.CONDUCT_ITEMS instead of a JSON list of
+    # the item sentences; rows stored so far were all made on the first catalog
+    f"""
+    ALTER TABLE submissions ADD COLUMN conduct_mask INTEGER;
+    ALTER TABLE submissions ADD COLUMN conduct_catalog INTEGER;
+    CREATE TEMP TABLE conduct_bits (item TEXT PRIMARY KEY, bit INTEGER NOT NULL);
+    INSERT INTO conduct_bits VALUES {", ".join(
+        "('" + item.replace("'", "''") + f"', {bit})" for bit, item in enumerate(CONDUCT_ITEMS)
+    )};
+    UPDATE submissions
+    SET conduct_mask = (
+            SELECT COALESCE(SUM(1 << b.bit), 0)
+            FROM json_each(submissions.conduct_items) j JOIN conduct_bits b ON b.item = j.value
+        ),
+        conduct_catalog = {LEGACY_CATALOG}
+    WHERE conduct_items IS NOT NULL;
+    DROP TABLE conduct_bits;
+    ALTER TABLE submissions DROP COLUMN conduct_items;
+    CREATE INDEX idx_submissions_conduct ON submissions (experience_date, conduct_mask)
+        WHERE conduct_mask IS NOT NULL;
+    """,
+    _add_rating_stats,
+    _add_period_rollups,
+    _add_roster,
+]
+
+# Free-text fields covered by the full-text index, in index column order
+SEARCH_FIELDS = (
+    "customer_service_feedback",
+    "actual_experience",
+    "employee_activities",
+    "prescribed_notes",
+    "experience_notes",
+)
+
+_SEARCH_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+# Function to turn a search box entry into an FTS5 query: "quoted text" is a phrase, a trailing *
+# makes a prefix term, and every other word must appear somewhere in the report
+def fts_query(text):
+    terms = []
+    for phrase, word in _SEARCH_TERM.findall(text):
+        # A stray quote outside a phrase is dropped rather than passed to FTS5
+        term = phrase if phrase else word.replace('"', '')
+        prefix = not phrase and term.endswith("*")
+        term = term.rstrip("*") if prefix else term
+        if term.strip():
+            terms.append('"' + term.replace('"', '""') + '"' + (" *" if prefix else ""))
+    return " ".join(terms)
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+# Function to normalize any version's data dict into a submissions row
+def normalize_record(data, version, submitted_at=None):
+    if not isinstance(data, ExperienceRecord):
+        data = ExperienceRecord.from_data(data, version)
+    row = data.store_row()
+    row["submitted_at"] = submitted_at or utc_now()
+    return row
+
+
+# Function to split a row's employee_name into (column text, tuple of names)
+def _employee_fields(value):
+    if not value:
+        return None, ()
+    if isinstance(value, str):
+        return value, tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    names = tuple(dict.fromkeys(value))
+    return ", ".join(names), names
+
+
+# Function to pick the rating_stats inputs (names, experience_date, handbook_ratings) from rows
+def _stats_inputs(values, names):
+    return ((employees, row[_DATE_COLUMN], row[_RATINGS_COLUMN]) for row, employees in zip(values, names))
+
+
+# Function to aggregate rows (tuples in INSERT_COLUMNS order, with the names of each row's employees)
+# for every write-time aggregate, as (rating_stats changes, period_rollups changes)
+def _aggregates(values, names):
+    return (
+        aggregate(_stats_inputs(values, names)),
+        aggregate_rollups(tuple(row[column] for column in _ROLLUP_COLUMNS) for row in values),
+    )
+
+
+# Function to fold rows into every write-time aggregate, or take them back out
+def _apply_aggregates(conn, values, names, remove=False):
+    stats, rollups = _aggregates(values, names)
+    _apply_rating_stats(conn, stats, remove)
+    _apply_rollups(conn, rollups, remove)
+
+
+# Function to merge two batches' aggregate changes, each (keys, block) as aggregate() returns them;
+# merge combines the block rows of a key found in both
+def _merge_changes(pending, changes, merge):
+    if pending is None:
+        return changes
+    index = {key: position for position, key in enumerate(dict.fromkeys([*pending[0], *changes[0]]))}
+    blocks = []
+    for keys, block in (pending, changes):
+        full = np.zeros((len(index), block.shape[1]), dtype=block.dtype)
+        full[[index[key] for key in keys]] = block
+        blocks.append(full)
+    return list(index), merge(*blocks)
+
+
+# Work a bulk load (see SubmissionStore.bulk_load) has deferred to its end: the ids it inserted,
+# the employees they name and their aggregate changes so far
+class _BulkLoad:
+    def __init__(self):
+        self.first_id = None
+        self.last_id = None
+        self.names = {}
+        self.rating_stats = None
+        self.rollups = None
+
+    def add(self, ids, values, names):
+        if self.first_id is None:
+            self.first_id = ids[0]
+        self.last_id = ids[-1]
+        self.names.update(dict.fromkeys(name for row_names in names for name in row_names))
+        stats, rollups = _aggregates(values, names)
+        self.rating_stats = _merge_changes(self.rating_stats, stats, combine)
+        self.rollups = _merge_changes(self.rollups, rollups, np.add)
+
+
+# SQLite store for submitted reports; reports are appended, and corrected or retracted by id
+class SubmissionStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._bulk = None
+        self._migrate()
+
+    def _migrate(self):
+        with self._lock:
+            current = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, script in enumerate(MIGRATIONS[current:], start=current + 1):
+                if isinstance(script, str):
+                    self._conn.executescript(f"BEGIN IMMEDIATE;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;")
+                    continue
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    script(self._conn)
+                    self._conn.execute(f"PRAGMA user_version = {number}")
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Store a single report and return its id
+    def add(self, data, version):
+        return self.add_many([data], version)[0]
+
+    # Store reports in batched transactions and return their ids
+    def add_many(self, records, version, batch_size=5000):
+        ids = []
+        batch = []
+        submitted_at = utc_now()
+        for data in records:
+            batch.append(normalize_record(data, version, submitted_at))
+            if len(batch) >= batch_size:
+                ids.extend(self._insert(batch))
+                batch = []
+        if batch:
+            ids.extend(self._insert(batch))
+        return ids
+
+    def _insert(self, rows):
+        return self.insert_rows([tuple(row[column] for column in INSERT_COLUMNS) for row in rows])
+
+    # Store normalized rows (tuples in INSERT_COLUMNS order) in one transaction and return their ids
+    def insert_rows(self, values):
+        if not values:
+            return []
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        names = []
+        rows = []
+        # Imports repeat the same few employee columns, so each distinct one is split once
+        fields = {}
+        for row in values:
+            value = row[_EMPLOYEE_COLUMN]
+            if value not in fields:
+                fields[value] = _employee_fields(value)
+            text, employees = fields[value]
+            names.append(employees)
+            rows.append((*row[:_EMPLOYEE_COLUMN], text, *row[_EMPLOYEE_COLUMN + 1:]))
+        values = rows
+        with self._lock:
+            conn = self._conn
+            bulk = self._bulk
+            conn.execute("BEGIN IMMEDIATE" if bulk is None else "SAVEPOINT insert_rows")
+            try:
+                # Ids are assigned here so the employee rows can be written in the same batch;
+                # the id of a retracted report is never handed out again
+                first_id = conn.execute(
+                    "SELECT MAX(COALESCE((SELECT MAX(id) FROM submissions), 0),"
+                    " COALESCE((SELECT MAX(submission_id) FROM submission_changes), 0)) + 1"
+                ).fetchone()[0]
+                ids = range(first_id, first_id + len(values))
+                conn.executemany(
+                    f"INSERT INTO submissions ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                    [(row_id, *row) for row_id, row in zip(ids, values)],
+                )
+                employees = [(name, row_id) for row_id, row_names in zip(ids, names) for name in row_names]
+                conn.executemany(
+                    "INSERT OR IGNORE INTO submission_employees (employee_name, submission_id) VALUES (?, ?)",
+                    employees,
+                )
+                if bulk is not None:
+                    bulk.add(ids, values, names)
+                    conn.execute("RELEASE insert_rows")
+                    return list(ids)
+                _index_text(conn, ids[0], ids[-1])
+                _add_to_roster(conn, (name for name, _ in employees))
+                _apply_aggregates(conn, values, names)
+                conn.execute("COMMIT")
+            except BaseException:
+                if bulk is None:
+                    conn.execute("ROLLBACK")
+                else:
+                    conn.execute("ROLLBACK TO insert_rows")
+                    conn.execute("RELEASE insert_rows")
+                raise
+        return list(ids)
+
+    # Bulk loading, for imports: every insert_rows() call inside the block joins one transaction and
+    # writes only the report and employee rows. The indexes on submissions are dropped until the
+    # block ends, when they are built again and the full-text index, roster and aggregates are
+    # brought up to date in one pass each. An error leaving the block rolls the whole load back;
+    # other writers wait until it ends.
+    @contextmanager
+    def bulk_load(self):
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                indexes = conn.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'submissions' AND sql IS NOT NULL"
+                ).fetchall()
+                for name, _ in indexes:
+                    conn.execute(f"DROP INDEX {name}")
+                self._bulk = bulk = _BulkLoad()
+                yield
+                self._bulk = None
+                if bulk.first_id is not None:
+                    _index_text(conn, bulk.first_id, bulk.last_id)
+                    _add_to_roster(conn, bulk.names)
+                    _apply_rating_stats(conn, bulk.rating_stats)
+                    _apply_rollups(conn, bulk.rollups)
+                for _, sql in indexes:
+                    conn.execute(sql)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._bulk = None
+
+    # Replace a stored report with corrected data; its id and submission time stay the same
+    def correct(self, submission_id, data, version=None):
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._locked_row(submission_id)
+                old_names = _stored_employees(conn, submission_id, submission_id).get(submission_id, ())
+                row = normalize_record(data, version or old["version"], old["submitted_at"])
+                text, names = _employee_fields(row["employee_name"])
+                row["employee_name"] = text
+                values = tuple(row[column] for column in INSERT_COLUMNS)
+                _apply_aggregates(conn, [tuple(old)[1:]], [old_names], remove=True)
+                conn.execute(
+                    f"UPDATE submissions SET {', '.join(f'{column} = ?' for column in INSERT_COLUMNS)} WHERE id = ?",
+                    (*values, submission_id),
+                )
+                self._replace_employees(submission_id, names)
+                _apply_aggregates(conn, [values], [names])
+                self._log_change(submission_id, "correct")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # Remove a stored report (and its share of every aggregate)
+    def retract(self, submission_id):
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._locked_row(submission_id)
+                old_names = _stored_employees(conn, submission_id, submission_id).get(submission_id, ())
+                _apply_aggregates(conn, [tuple(old)[1:]], [old_names], remove=True)
+                self._replace_employees(submission_id, ())
+                conn.execute("DELETE FROM submissions WHERE id = ?", (submission_id,))
+                self._log_change(submission_id, "retract")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _locked_row(self, submission_id):
+        row = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM submissions WHERE id = ?", (submission_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"no stored report with id {submission_id}")
+        return row
+
+    def _replace_employees(self, submission_id, names):
+        self._conn.execute("DELETE FROM submission_employees WHERE submission_id = ?", (submission_id,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO submission_employees (employee_name, submission_id) VALUES (?, ?)",
+            [(name, submission_id) for name in names],
+        )
+        _add_to_roster(self._conn, names)
+
+    def _log_change(self, submission_id, change):
+        self._conn.execute(
+            "INSERT INTO submission_changes (submission_id, change, changed_at) VALUES (?, ?, ?)",
+            (submission_id, change, utc_now()),
+        )
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get(self, submission_id):
+        rows = self.query("SELECT * FROM submissions WHERE id = ?", (submission_id,))
+        return rows[0] if rows else None
+
+    # Reports whose Experience Date falls in [start, end], inclusive
+    def by_date_range(self, start, end, limit=None):
+        sql = "SELECT * FROM submissions WHERE experience_date BETWEEN ? AND ? ORDER BY experience_date, id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, (str(start), str(end)))
+
+    # Reports naming the given employee, newest first
+    def by_employee(self, name, limit=None):
+        sql = (
+            "SELECT s.* FROM submission_employees e JOIN submissions s ON s.id = e.submission_id"
+            " WHERE e.employee_name = ? ORDER BY e.submission_id DESC"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, (name,))
+
+    def by_rating(self, rating, limit=None):
+        sql = "SELECT * FROM submissions WHERE customer_service_rating = ? ORDER BY id DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, (int(rating),))
+
+    # Function to read reports in id order, one bounded chunk at a time
+    def iter_chunks(self, start=None, end=None, chunk_size=10000):
+        where = ["id > ?"]
+        params = []
+        if start is not None:
+            where.append("experience_date >= ?")
+            params.append(str(start))
+        if end is not None:
+            where.append("experience_date <= ?")
+            params.append(str(end))
+        sql = f"SELECT * FROM submissions WHERE {' AND '.join(where)} ORDER BY id LIMIT {int(chunk_size)}"
+        last_id = 0
+        while True:
+            rows = self.query(sql, (last_id, *params))
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]["id"]
+
+    # Reports matching a full-text query, best bm25 match first (or newest first), each with a
+    # snippet of its best matching field; optionally limited to a date range and rating band
+    def search(self, text, start=None, end=None, min_rating=None, max_rating=None, limit=50, newest_first=False):
+        query = fts_query(text)
+        if not query:
+            return []
+        filters = []
+        params = [query]
+        if start is not None:
+            filters.append("s.experience_date >= ?")
+            params.append(str(start))
+        if end is not None:
+            filters.append("s.experience_date <= ?")
+            params.append(str(end))
+        if min_rating is not None:
+            filters.append("s.customer_service_rating >= ?")
+            params.append(int(min_rating))
+        if max_rating is not None:
+            filters.append("s.customer_service_rating <= ?")
+            params.append(int(max_rating))
+        source = "submissions_fts"
+        if filters:
+            source += " JOIN submissions s ON s.id = submissions_fts.rowid"
+        order = "submissions_fts.rowid DESC" if newest_first else "bm25(submissions_fts)"
+        # Pick the page of ids first, so snippets are only built for the reports returned
+        ids = [row[0] for row in self.query(
+            f"SELECT submissions_fts.rowid FROM {source} WHERE submissions_fts MATCH ?"
+            f"{''.join(' AND ' + condition for condition in filters)} ORDER BY {order} LIMIT {int(limit)}",
+            params,
+        )]
+        if not ids:
+            return []
+        rows = self.query(
+            "SELECT s.*, snippet(submissions_fts, -1, '[', ']', '…', 12) AS snippet"
+            " FROM submissions_fts JOIN submissions s ON s.id = submissions_fts.rowid"
+            f" WHERE submissions_fts MATCH ? AND submissions_fts.rowid IN ({', '.join('?' for _ in ids)})",
+            (query, *ids),
+        )
+        position = {row_id: index for index, row_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: position[row["id"]])
+
+    # Distinct conduct masks and the number of reports with each, optionally within a date range;
+    # feed to conduct_catalog.item_counts() / co_occurrence()
+    def conduct_histogram(self, start=None, end=None):
+        where = ["conduct_mask IS NOT NULL"]
+        params = []
+        if start is not None:
+            where.append("experience_date >= ?")
+            params.append(str(start))
+        if end is not None:
+            where.append("experience_date <= ?")
+            params.append(str(end))
+        rows = self.query(
+            f"SELECT conduct_mask, COUNT(*) FROM submissions WHERE {' AND '.join(where)} GROUP BY conduct_mask",
+            params,
+        )
+        masks, reports = zip(*rows) if rows else ((), ())
+        return np.array(masks, dtype=np.uint16), np.array(reports, dtype=np.int64)
+
+    def count(self):
+        return self.query("SELECT COUNT(*) FROM submissions")[0][0]
+
+    # First and last Experience Date over every stored report, as dates; (None, None) when there are none
+    def date_bounds(self):
+        first, last = self.query("SELECT MIN(experience_date), MAX(experience_date) FROM submissions")[0]
+        return (date.fromisoformat(first), date.fromisoformat(last)) if first else (None, None)
+
+    # Highest stored id; changes whenever a report is added
+    def revision(self):
+        return self.query("SELECT COALESCE(MAX(id), 0) FROM submissions")[0][0]
+
+    # Number of corrections and retractions so far; reports below revision() changed when it moves
+    def change_revision(self):
+        return self.query("SELECT COALESCE(MAX(id), 0) FROM submission_changes")[0][0]
+
+    # One employee's running statistics for a period ("YYYY-MM" or ALL_TIME), by criterion;
+    # a fixed 16 rows however many reports have been stored
+    def employee_stats(self, employee, period=ALL_TIME):
+        rows = self.query(
+            "SELECT * FROM rating_stats WHERE employee_name = ? AND period = ? ORDER BY criterion",
+            (employee, period),
+        )
+        return {HANDBOOK_CRITERIA[row["criterion"]]: RunningStats.from_row(row) for row in rows}
+
+    # Periods with statistics for an employee: ALL_TIME, then months newest first
+    def stats_periods(self, employee):
+        rows = self.query(
+            "SELECT period FROM rating_stats WHERE employee_name = ? AND criterion = 0 ORDER BY period DESC",
+            (employee,),
+        )
+        months = [row[0] for row in rows if row[0] != ALL_TIME]
+        return [ALL_TIME, *months] if rows else []
+
+    # Employees with running statistics
+    def stats_employees(self):
+        rows = self.query("SELECT DISTINCT employee_name FROM rating_stats WHERE period = ?", (ALL_TIME,))
+        return [row[0] for row in rows]
+
+    # Names on the employee roster
+    def roster_names(self):
+        return [row[0] for row in self.query("SELECT name FROM roster")]
+
+    # Add a name to the roster unless an equivalent one is on it; returns the roster's spelling,
+    # or None for a blank name, which is never added
+    def add_to_roster(self, name):
+        key = name_key(name)
+        if not key:
+            return None
+        with self._lock:
+            _add_to_roster(self._conn, [name])
+            return self._conn.execute("SELECT name FROM roster WHERE name_key = ?", (key,)).fetchone()[0]
+
+    # Rollups of a fiscal year and its months, as period -> {column: value}; at most 13 rows read
+    def fiscal_year_rollups(self, year):
+        rows = self.query(
+            f"SELECT period, {', '.join(ROLLUP_COLUMNS)} FROM period_rollups WHERE period = ? OR period BETWEEN ? AND ?",
+            (fiscal_year_key(year), *fiscal_year_months(year)[::11]),
+        )
+        return {row[0]: dict(zip(ROLLUP_COLUMNS, tuple(row)[1:])) for row in rows}
+
+    # Fiscal years with reports, newest first
+    def rollup_fiscal_years(self):
+        rows = self.query("SELECT period FROM period_rollups WHERE period LIKE 'FY%' ORDER BY period DESC")
+        return [int(row[0][2:]) for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+# Function to get the process-wide store shared by every Streamlit session
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SubmissionStore()
+        return _store
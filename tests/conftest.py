@@ -0,0 +1,156 @@
+import random
+import re
+import zlib
+from datetime import date, time, timedelta
+
+import pandas as pd
+import pytest
+
+from conduct_catalog import CURRENT_CATALOG, MASK_BITS, catalog_items, conduct_mask
+from experience_record import HANDBOOK_CRITERIA
+from period_rollups import ROLLUP_COLUMNS
+from rating_stats import ALL_TIME, HISTOGRAM_COLUMNS, RATING_VALUES, STAT_COLUMNS
+import ratings_analytics
+import roster
+import submission_store
+import write_queue
+from submission_store import SubmissionStore
+
+STAT_KEY = ["employee_name", "criterion", "period"]
+
+EMPLOYEES = ["LeRoy", "Danielle", "Sarah", "Marcus", "Ana"]
+
+
+# Function to generate version5 report data dicts, as the form builds them
+def version5_reports(count, seed=0, start=date(2023, 5, 15), days=120):
+    rng = random.Random(seed)
+    for _ in range(count):
+        data = {
+            "Customer Service Rating": str(rng.randint(1, 5)),
+            "Customer Service Feedback": rng.choice(["helpful", "slow", ""]),
+            "Experience Date": str(start + timedelta(days=rng.randrange(days))),
+            "Experience Time": f"{rng.randint(8, 17):02}:{rng.randint(0, 59):02}",
+            "Employee Activities": "resume review",
+            "Actual Experience": "waited, then got help",
+            "Prescribed Activities": "",
+            "Prescribed Notes": "",
+            "Experience Notes": rng.choice(["none", 'a "quoted" note']),
+            "Employee Names": ", ".join(rng.sample(EMPLOYEES, rng.randint(1, 2))),
+        }
+        data.update({f"Rating - {criterion}": str(rng.randint(0, 10)) for criterion in HANDBOOK_CRITERIA})
+        yield data
+
+
+# Function to generate version1 report data dicts (one-element lists, a Code of Conduct selection
+# and no handbook ratings), as the form builds them
+def version1_reports(count, seed=0, start=date(2023, 5, 15), days=120):
+    rng = random.Random(seed)
+    items = catalog_items()
+    for _ in range(count):
+        yield {
+            "Name": [rng.choice(EMPLOYEES)],
+            "Customer Service Rating": [rng.randint(1, 5)],
+            "Customer Service Feedback": [rng.choice(["helpful", "slow", ""])],
+            "Experience Date": [start + timedelta(days=rng.randrange(days))],
+            "Experience Time": [time(rng.randint(8, 17), rng.randint(0, 59))],
+            "Employee Activities": ["resume review"],
+            "Actual Experience": ["waited, then got help"],
+            "Prescribed Activities": [""],
+            "Prescribed Notes": [""],
+            "Experience Notes": ["none"],
+            "Code of Conduct Mask": [conduct_mask(rng.sample(items, 2))],
+            "Conduct Catalog": [CURRENT_CATALOG],
+        }
+
+
+# Function to extract the text drawn in a PDF, from its deflated content streams; strings in the
+# core font are latin-1, those in the embedded TrueType font UTF-16
+def pdf_text(payload):
+    text = []
+    for stream in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", payload, re.S):
+        try:
+            content = zlib.decompress(stream)
+        except zlib.error:
+            continue
+        # A justified TrueType line is a TJ array of its words
+        for block in re.findall(rb"BT (.*?) ET", content, re.S):
+            for string in re.findall(rb"\(((?:\\.|[^\\)])*)\)", block, re.S):
+                string = re.sub(rb"\\(.)", lambda match: b"\r" if match[1] == b"r" else match[1], string, flags=re.S)
+                text.append(string.decode("utf-16-be" if string[:1] == b"\0" else "latin1"))
+    return " ".join(text)
+
+
+# Function to recompute rating_stats with pandas from the stored reports and their employees
+def expected_rating_stats(store):
+    rows = store.query(
+        "SELECT e.employee_name, s.experience_date, s.handbook_ratings FROM submissions s"
+        " JOIN submission_employees e ON e.submission_id = s.id WHERE s.handbook_ratings IS NOT NULL"
+    )
+    ratings = pd.DataFrame(
+        [(name, criterion, period, rating) for name, day, blob in rows for period in (ALL_TIME, day[:7])
+         for criterion, rating in enumerate(blob)],
+        columns=[*STAT_KEY, "rating"],
+    )
+    grouped = ratings.groupby(STAT_KEY)["rating"]
+    expected = grouped.agg(reports="count", mean="mean", var="var", min="min", max="max")
+    expected["m2"] = expected.pop("var").fillna(0.0) * (expected["reports"] - 1)
+    histograms = pd.crosstab([ratings[column] for column in STAT_KEY], ratings["rating"])
+    histograms = histograms.reindex(columns=range(RATING_VALUES), fill_value=0)
+    expected[list(HISTOGRAM_COLUMNS)] = histograms.to_numpy()
+    return expected[list(STAT_COLUMNS)].sort_index()
+
+
+def stored_rating_stats(store):
+    rows = [dict(row) for row in store.query("SELECT * FROM rating_stats")]
+    return pd.DataFrame(rows, columns=[*STAT_KEY, *STAT_COLUMNS]).set_index(STAT_KEY)[list(STAT_COLUMNS)].sort_index()
+
+
+# Function to recompute period_rollups with pandas from the stored reports; fiscal years run July to June
+def expected_rollups(store):
+    frame = pd.DataFrame(
+        [tuple(row) for row in store.query(
+            "SELECT experience_date, customer_service_rating, conduct_mask, handbook_ratings FROM submissions"
+            " WHERE experience_date IS NOT NULL"
+        )],
+        columns=["date", "rating", "mask", "ratings"],
+    )
+    days = pd.to_datetime(frame["date"])
+    fiscal_years = "FY" + (days.dt.year + (days.dt.month >= 7)).astype(str)
+    values = pd.DataFrame({"reports": 1}, index=frame.index)
+    for rating in range(1, 6):
+        values[f"rating_{rating}"] = frame["rating"] == rating
+    values["conduct_reports"] = frame["mask"].notna()
+    masks = frame["mask"].fillna(0).astype(int)
+    for bit in range(MASK_BITS):
+        values[f"conduct_{bit}"] = (masks // (1 << bit)) % 2
+    values["rated_reports"] = frame["ratings"].notna()
+    for criterion in range(len(HANDBOOK_CRITERIA)):
+        values[f"criterion_sum_{criterion}"] = [blob[criterion] if blob else 0 for blob in frame["ratings"]]
+    values = values.astype(int)
+    expected = pd.concat([values.groupby(fiscal_years).sum(), values.groupby(frame["date"].str[:7]).sum()])
+    return expected[list(ROLLUP_COLUMNS)].rename_axis("period").sort_index()
+
+
+def stored_rollups(store):
+    rows = [dict(row) for row in store.query("SELECT * FROM period_rollups")]
+    return pd.DataFrame(rows, columns=["period", *ROLLUP_COLUMNS]).set_index("period").sort_index()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SubmissionStore(str(tmp_path / "submissions.db"))
+    yield store
+    store.close()
+
+
+# The store as the Streamlit apps get it (get_store), with a writer and ratings matrix of its own
+@pytest.fixture
+def shared_store(store, monkeypatch):
+    queue = write_queue.WriteQueue(store)
+    monkeypatch.setattr(submission_store, "_store", store)
+    monkeypatch.setattr(write_queue, "_queue", queue)
+    monkeypatch.setattr(ratings_analytics, "_matrix", ratings_analytics.RatingsMatrix())
+    monkeypatch.setattr(roster, "_roster", None)
+    monkeypatch.setattr(roster, "STORE_PATH", store.path)
+    yield store
+    queue.close()
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import re
+from http import HTTPStatus
+
+import pytest
+
+import api_server
+from api_server import HTTPError, Request, respond, validate
+from conftest import version5_reports
+from csv_export import record_csv
+from experience_record import EXPORT_COLUMNS, RATING_COLUMNS
+
+
+def _payload(**changes):
+    payload = next(version5_reports(1))
+    payload.update(changes)
+    return {key: value for key, value in payload.items() if value is not None}
+
+
+def _post(path, body, method="POST"):
+    body = body if isinstance(body, bytes) else json.dumps(body).encode()
+    return asyncio.run(respond(Request(method, path, {}, body, True)))
+
+
+def test_validate_returns_the_fields_in_export_order_as_strings():
+    payload = _payload(**{"Customer Service Rating": 4, RATING_COLUMNS[0]: 10})
+    data = validate(dict(reversed(payload.items())))
+    assert list(data) == list(EXPORT_COLUMNS)
+    assert data["Customer Service Rating"] == "4" and data[RATING_COLUMNS[0]] == "10"
+
+
+@pytest.mark.parametrize("payload, message", [
+    ([], "expected a JSON object"),
+    (_payload(**{"Experience Notes": None, "Extra": "x"}), "missing fields: Experience Notes; unknown fields: Extra"),
+    (_payload(**{"Customer Service Rating": True}), "'Customer Service Rating' must be a string"),
+    (_payload(**{"Actual Experience": ["a"]}), "'Actual Experience' must be a string"),
+    (_payload(**{"Customer Service Rating": "6"}), "must be 1 to 5"),
+    (_payload(**{"Experience Date": ""}), "'Experience Date' is required"),
+    (_payload(**{"Experience Date": "2024-13-01"}), "invalid field value"),
+    (_payload(**{RATING_COLUMNS[3]: "11"}), "handbook ratings must be 0 to 10"),
+    (_payload(**{RATING_COLUMNS[3]: ""}), "handbook ratings must be 0 to 10"),
+])
+def test_validate_names_what_is_wrong(payload, message):
+    with pytest.raises(HTTPError, match=message) as error:
+        validate(payload)
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("method, path, body, status", [
+    ("GET", "/health", b"", HTTPStatus.OK),
+    ("POST", "/health", b"", HTTPStatus.METHOD_NOT_ALLOWED),
+    ("POST", "/nowhere", b"{}", HTTPStatus.NOT_FOUND),
+    ("GET", "/reports.csv", b"", HTTPStatus.METHOD_NOT_ALLOWED),
+    ("POST", "/reports.csv", b"{not json", HTTPStatus.BAD_REQUEST),
+    ("POST", "/reports.csv", b"{}", HTTPStatus.BAD_REQUEST),
+])
+def test_respond_maps_errors_to_statuses(method, path, body, status):
+    answered, content_type, payload = _post(path, body, method)
+    assert (answered, content_type) == (status, "application/json")
+    assert json.loads(payload)
+
+
+def test_respond_exports_and_saves_reports(shared_store):
+    payload = _payload()
+    assert _post("/reports.csv", payload) == (HTTPStatus.OK, "text/csv; charset=utf-8", record_csv(validate(payload)))
+    status, content_type, pdf = _post("/reports.pdf", payload)
+    assert (status, content_type) == (HTTPStatus.OK, "application/pdf") and pdf.startswith(b"%PDF")
+
+    status, _, body = _post("/reports", payload)
+    assert status == HTTPStatus.CREATED
+    assert shared_store.get(json.loads(body)["id"])["customer_service_feedback"] == payload["Customer Service Feedback"]
+
+
+def test_a_failed_handler_answers_500_for_its_request_only(monkeypatch):
+    async def broken(data):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setitem(api_server.ROUTES, "/reports.csv", broken)
+    status, _, body = _post("/reports.csv", _payload())
+    assert status == HTTPStatus.INTERNAL_SERVER_ERROR and json.loads(body) == {"error": "RuntimeError: disk full"}
+
+
+def test_pipelined_responses_come_back_in_request_order():
+    async def exchange():
+        server = await asyncio.start_server(api_server.handle_connection, "127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        csv_body = json.dumps(_payload()).encode()
+        writer.write(
+            b"POST /reports.csv HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(csv_body), csv_body)
+            + b"GET /nowhere HTTP/1.1\r\n\r\n"
+            + b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n"
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(exchange())
+    statuses = []
+    while response:
+        head, _, response = response.partition(b"\r\n\r\n")
+        length = int(re.search(rb"Content-Length: (\d+)", head)[1])
+        statuses.append(head.split(b" ")[1])
+        body, response = response[:length], response[length:]
+    assert statuses == [b"200", b"404", b"200"]
+    assert body == b'{"status":"ok"}' and b"Connection: close" in head
@@ -0,0 +1,22 @@
+from batch_render import render_batch, store_records
+from conduct_catalog import conduct_items
+from conftest import pdf_text, version1_reports, version5_reports
+from experience_record import ExperienceRecord
+from report_pdf import ReportPDF
+
+
+def test_batch_pdfs_match_single_report_pdfs(store, tmp_path):
+    version1 = next(version1_reports(1))
+    ids = [store.add(version1, "version1"), *store.add_many(version5_reports(2), "version5")]
+    assert render_batch(store_records(store), str(tmp_path), workers=1) == (3, 0)
+
+    for submission_id in ids:
+        record = ExperienceRecord.from_row(store.get(submission_id))
+        pdf = ReportPDF(record.pdf_sections())
+        pdf.add_page()
+        pdf.add_record(record)
+        batch = (tmp_path / f"report-{submission_id:07d}.pdf").read_bytes()
+        assert pdf_text(batch) == pdf_text(pdf.output_bytes())
+
+    text = " ".join(pdf_text((tmp_path / f"report-{ids[0]:07d}.pdf").read_bytes()).split())
+    assert all(" ".join(item.split()) in text for item in conduct_items(version1["Code of Conduct Mask"][0]))
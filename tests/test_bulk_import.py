@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+from bulk_import import import_csv
+from conftest import stored_rating_stats, version5_reports
+from submission_store import SubmissionStore
+from experience_record import HANDBOOK_CRITERIA
+
+
+@pytest.mark.parametrize("version", [None, "version5", "version1"])
+def test_version5_ratings_are_imported_whatever_the_version_label(store, tmp_path, version):
+    reports = list(version5_reports(20))
+    path = tmp_path / "export.csv"
+    pd.DataFrame(reports).to_csv(path, index=False)
+
+    detected, imported = import_csv(store, str(path), version)
+    assert (detected, imported) == (version or "version5", 20)
+    stored = [row["handbook_ratings"] for row in store.query("SELECT handbook_ratings FROM submissions ORDER BY id")]
+    assert stored == [bytes(int(data[f"Rating - {criterion}"]) for criterion in HANDBOOK_CRITERIA) for data in reports]
+
+
+# Function to read everything an import writes besides the rating statistics (compared
+# approximately, as batches merge them in another order) and the submission times
+def _store_state(store):
+    tables = {
+        table: sorted(tuple(row) for row in store.query(f"SELECT * FROM {table}"))
+        for table in ("submission_employees", "period_rollups", "roster")
+    }
+    tables["submissions"] = sorted(tuple(row)[3:] for row in store.query("SELECT * FROM submissions"))
+    tables["indexes"] = store.query("SELECT name, sql FROM sqlite_master WHERE type = 'index' ORDER BY name")
+    tables["search"] = [row["id"] for row in store.search("slow")]
+    return tables
+
+
+def test_bulk_load_ends_in_the_state_row_batches_leave(store, tmp_path):
+    path = tmp_path / "export.csv"
+    pd.DataFrame(version5_reports(300)).to_csv(path, index=False)
+    import_csv(store, str(path), chunk_size=70)
+
+    bulk = SubmissionStore(str(tmp_path / "bulk.db"))
+    with bulk.bulk_load():
+        import_csv(bulk, str(path), chunk_size=70)
+    assert _store_state(bulk) == _store_state(store)
+    pd.testing.assert_frame_equal(stored_rating_stats(bulk), stored_rating_stats(store))
+    assert bulk.query("SELECT COUNT(*) FROM submissions_fts WHERE submissions_fts MATCH 'slow'")[0][0] > 0
+    bulk.close()
+
+
+def test_bulk_load_rolls_back_on_error(store, tmp_path):
+    path = tmp_path / "export.csv"
+    pd.DataFrame(version5_reports(30)).to_csv(path, index=False)
+    import_csv(store, str(path))
+    before, before_stats = _store_state(store), stored_rating_stats(store)
+
+    with pytest.raises(ValueError):
+        with store.bulk_load():
+            import_csv(store, str(path))
+            raise ValueError("stop")
+    assert _store_state(store) == before
+    pd.testing.assert_frame_equal(stored_rating_stats(store), before_stats)
+
+
+@pytest.mark.parametrize("rating, problem", [
+    ("", "row 4: no rating for Rating - "),
+    (11, "row 4: Rating - "),
+    (-1, "row 4: Rating - "),
+    (2.5, "row 4: Rating - "),
+])
+def test_partial_or_out_of_range_version5_ratings_are_rejected_by_row(store, tmp_path, rating, problem):
+    reports = list(version5_reports(5))
+    reports[2][f"Rating - {HANDBOOK_CRITERIA[3]}"] = rating
+    path = tmp_path / "export.csv"
+    pd.DataFrame(reports).to_csv(path, index=False)
+
+    with pytest.raises(ValueError, match=problem) as error:
+        import_csv(store, str(path))
+    assert HANDBOOK_CRITERIA[3] in str(error.value)
+    assert store.count() == 0
+
+
+@pytest.mark.parametrize("ratings, problem", [
+    ({criterion: 5 for criterion in HANDBOOK_CRITERIA[1:]}, "no rating for"),
+    ({**dict.fromkeys(HANDBOOK_CRITERIA, 5), HANDBOOK_CRITERIA[0]: 12}, "ratings run from 0 to 10"),
+    ({**dict.fromkeys(HANDBOOK_CRITERIA, 5), HANDBOOK_CRITERIA[0]: 300}, "ratings run from 0 to 10"),
+])
+def test_partial_or_out_of_range_version4_ratings_are_rejected_by_row(store, tmp_path, ratings, problem):
+    rows = [{"Experience Date": "2023-05-15", "Experience Time": "10:00:00", "Customer Service Rating": 4,
+             "Employee Handbook Ratings": dict.fromkeys(HANDBOOK_CRITERIA, 5)} for _ in range(5)]
+    rows[3]["Employee Handbook Ratings"] = ratings
+    path = tmp_path / "export.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    with pytest.raises(ValueError, match=f"row 5: Employee Handbook Ratings: {problem}"):
+        import_csv(store, str(path))
+    assert store.count() == 0
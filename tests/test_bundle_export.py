@@ -0,0 +1,53 @@
+import os
+import re
+import zipfile
+
+from bundle_export import CSV_NAME, write_bundle
+from conduct_catalog import conduct_items
+from conftest import pdf_text, version1_reports, version5_reports
+from experience_record import RATING_COLUMNS
+from render_cache import DiskCache
+
+
+# A cache whose files are pruned by "another export" right after get() finds them
+class PrunedAfterGet(DiskCache):
+    def get(self, key):
+        path = super().get(key)
+        if path is not None:
+            os.remove(path)
+        return path
+
+
+# A cache whose finished renders are pruned before the bundle copies them
+class PrunedAfterRender(DiskCache):
+    def path(self, key):
+        return super().path(key) + ".pruned"
+
+
+def bundle(store, path, cache):
+    write_bundle(store, str(path), workers=1, cache=cache)
+    with zipfile.ZipFile(path) as archive:
+        # Without the creation time, which differs between renders a second apart
+        return {name: re.sub(rb"/CreationDate \(D:\d+\)", b"", archive.read(name))
+                for name in archive.namelist() if name != CSV_NAME}
+
+
+def test_pdfs_pruned_during_an_export_are_rendered_again(store, tmp_path):
+    store.add_many(version5_reports(4), "version5")
+    directory = str(tmp_path / "cache")
+    expected = bundle(store, tmp_path / "first.zip", DiskCache(directory))
+    assert len(expected) == 4
+
+    assert bundle(store, tmp_path / "hit.zip", PrunedAfterGet(directory)) == expected
+    assert bundle(store, tmp_path / "rendered.zip", PrunedAfterRender(str(tmp_path / "other"))) == expected
+
+
+def test_version1_pdfs_list_the_conduct_selection_and_no_ratings(store, tmp_path):
+    data = next(version1_reports(1))
+    submission_id = store.add(data, "version1")
+    text = " ".join(pdf_text(bundle(store, tmp_path / "bundle.zip", DiskCache(str(tmp_path / "cache")))[
+        f"report-{submission_id:07d}.pdf"]).split())
+    assert "Selected Code of Conduct Items" in text
+    for item in conduct_items(data["Code of Conduct Mask"][0]):
+        assert " ".join(item.split()) in text
+    assert not any(column in text for column in RATING_COLUMNS)
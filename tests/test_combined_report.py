@@ -0,0 +1,19 @@
+from combined_report import stored_records, write_combined_report
+from conduct_catalog import conduct_items
+from conftest import pdf_text, version1_reports, version5_reports
+from experience_record import RATING_COLUMNS
+
+
+def test_each_version_keeps_its_own_sections(store, tmp_path):
+    version1 = list(version1_reports(2))
+    store.add_many(version1, "version1")
+    store.add_many(version5_reports(3), "version5")
+    path = tmp_path / "combined.pdf"
+    write_combined_report(stored_records(store), str(path))
+
+    text = " ".join(pdf_text(path.read_bytes()).split())
+    for data in version1:
+        for item in conduct_items(data["Code of Conduct Mask"][0]):
+            assert " ".join(item.split()) in text
+    # Only the three version5 reports list handbook ratings
+    assert text.count(RATING_COLUMNS[0]) == 3
@@ -0,0 +1,39 @@
+import random
+from itertools import combinations
+
+import numpy as np
+
+import conduct_catalog
+from conduct_catalog import CONDUCT_ITEMS, LEGACY_CATALOG, catalog_items, co_occurrence, conduct_mask, item_counts
+from conftest import version1_reports
+
+
+def test_counts_over_reports_from_several_catalogs(store, monkeypatch):
+    # A later catalog that retires the first item and keeps the others on their bits
+    monkeypatch.setitem(conduct_catalog.CATALOGS, 2, tuple(range(1, len(CONDUCT_ITEMS))))
+    rng = random.Random(3)
+    reports = []
+    for number, data in enumerate(version1_reports(60)):
+        catalog = (LEGACY_CATALOG, 2)[number % 2]
+        selected = rng.sample(catalog_items(catalog), rng.randint(0, 4))
+        if catalog == LEGACY_CATALOG and number % 4 == 0:
+            # Exports from before the mask list the selected items as text
+            del data["Code of Conduct Mask"], data["Conduct Catalog"]
+            data["Selected Code of Conduct"] = [selected]
+        else:
+            data["Code of Conduct Mask"], data["Conduct Catalog"] = [conduct_mask(selected)], [catalog]
+        reports.append((str(data["Experience Date"][0]), set(selected)))
+        store.add(data, "version1")
+    assert sorted(row[0] for row in store.query("SELECT DISTINCT conduct_catalog FROM submissions")) == [1, 2]
+
+    start, end = "2023-06-01", "2023-07-31"
+    for bounds in ((None, None), (start, end)):
+        chosen = [items for day, items in reports if bounds[0] is None or bounds[0] <= day <= bounds[1]]
+        masks, counts = store.conduct_histogram(*bounds)
+        assert counts.sum() == len(chosen)
+        assert item_counts(masks, counts).tolist() == [sum(item in items for items in chosen) for item in CONDUCT_ITEMS]
+        pairs = co_occurrence(masks, counts)
+        assert np.array_equal(np.diag(pairs), item_counts(masks, counts))
+        for first, second in combinations(range(len(CONDUCT_ITEMS)), 2):
+            expected = sum(CONDUCT_ITEMS[first] in items and CONDUCT_ITEMS[second] in items for items in chosen)
+            assert pairs[first, second] == pairs[second, first] == expected
@@ -0,0 +1,57 @@
+import tracemalloc
+
+import pytest
+
+from conftest import version5_reports
+from csv_export import LINE_TERMINATOR, record_csv, stream_csv, write_csv
+from submission_store import COLUMNS
+
+# Peak traced memory allowed for a streamed export of any size
+CEILING_BYTES = 16 * 1024 * 1024
+
+
+def export_peak(store, path):
+    tracemalloc.start()
+    try:
+        write_csv(store, path)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_stream_matches_record_csv(store):
+    reports = list(version5_reports(3))
+    store.add_many(reports, "version5")
+    streamed = b"".join(stream_csv(store, chunk_size=2)).decode("utf-8").split(LINE_TERMINATOR)
+    for data, row in zip(reports, streamed[1:]):
+        header, expected, _ = record_csv(data).decode("utf-8").split(LINE_TERMINATOR)
+        assert header == streamed[0]
+        assert row == expected
+
+
+def test_export_memory_is_bounded_by_the_chunk_not_the_row_count(store, tmp_path):
+    store.add_many(version5_reports(4000), "version5")
+    small = export_peak(store, str(tmp_path / "small.csv"))
+    store.add_many(version5_reports(36000, seed=1), "version5", batch_size=20000)
+    large = export_peak(store, str(tmp_path / "large.csv"))
+    assert large < CEILING_BYTES
+    # Ten times the rows: the peak may only move by allocator noise
+    assert large < small + 1024 * 1024
+
+
+# Function to grow the store to count reports by copying the stored ones (faster than saving 1M reports)
+def _copy_reports(store, count):
+    columns = ", ".join(COLUMNS[1:])
+    while store.count() < count:
+        store.query(f"INSERT INTO submissions ({columns}) SELECT {columns} FROM submissions LIMIT ?",
+                    (count - store.count(),))
+
+
+@pytest.mark.slow
+def test_export_of_a_million_rows_stays_under_the_ceiling(store, tmp_path):
+    store.add_many(version5_reports(50000), "version5", batch_size=25000)
+    _copy_reports(store, 1_000_000)
+    path = tmp_path / "export.csv"
+    assert export_peak(store, str(path)) < CEILING_BYTES
+    with open(path, "rb") as export:
+        assert sum(1 for _ in export) == 1_000_001
@@ -0,0 +1,56 @@
+import os
+from datetime import date
+
+from streamlit.testing.v1 import AppTest
+
+from conduct_catalog import CONDUCT_ITEMS, conduct_items
+from conftest import version1_reports, version5_reports
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dashboard.py")
+
+
+def run_dashboard():
+    at = AppTest.from_file(SCRIPT, default_timeout=60).run()
+    assert not at.exception, at.exception
+    return at
+
+
+def test_unrated_reports_still_show_the_incident_log(shared_store):
+    shared_store.add_many(version1_reports(30), "version1")
+    at = run_dashboard()
+    assert "No handbook ratings have been submitted yet." in [info.value for info in at.info]
+    assert "Incident Log" in [header.value for header in at.subheader]
+    # The date filter spans every report, not just the rated ones
+    assert at.date_input[0].value == shared_store.date_bounds()
+
+
+def test_date_filter_spans_rated_and_unrated_reports(shared_store):
+    shared_store.add_many(version1_reports(10, start=date(2022, 1, 1), days=30), "version1")
+    shared_store.add_many(version5_reports(10), "version5")
+    at = run_dashboard()
+    first, last = at.date_input[0].value
+    assert first < date(2022, 2, 1) and last >= date(2023, 5, 15)
+    assert "Handbook criteria" in [header.value for header in at.subheader]
+
+
+def test_conduct_citations_without_handbook_ratings(shared_store):
+    reports = list(version1_reports(20))
+    shared_store.add_many(reports, "version1")
+    at = run_dashboard()
+    assert "Code of Conduct citations" in [header.value for header in at.subheader]
+    citations = at.dataframe[0].value
+    assert citations["Reports"].tolist() == [
+        sum(item in conduct_items(data["Code of Conduct Mask"][0]) for data in reports) for item in CONDUCT_ITEMS
+    ]
+
+
+def test_search_without_handbook_ratings(shared_store):
+    reports = list(version1_reports(10))
+    reports[3]["Customer Service Feedback"] = ["the printer was slow"]
+    ids = shared_store.add_many(reports, "version1")
+    at = run_dashboard()
+    at.text_input[0].input("printer").run()
+    assert not at.exception, at.exception
+    assert at.caption[-1].value == "1 matching reports"
+    assert at.dataframe[-1].value["Match"].tolist() == ["the [printer] was slow"]
+    assert shared_store.search("printer")[0]["id"] == ids[3]
@@ -0,0 +1,15 @@
+from conduct_catalog import conduct_items
+from conftest import version1_reports, version5_reports
+from experience_record import RATING_COLUMNS, ExperienceRecord
+
+
+def test_pdf_sections_follow_the_report_version():
+    data = next(version1_reports(1))
+    titles = dict(ExperienceRecord.from_data(data, "version1").pdf_sections())
+    assert titles["Selected Code of Conduct Items"].split("\n") == conduct_items(data["Code of Conduct Mask"][0])
+    assert not set(RATING_COLUMNS) & set(titles)
+
+    data = next(version5_reports(1))
+    titles = dict(ExperienceRecord.from_data(data, "version5").pdf_sections())
+    assert "Selected Code of Conduct Items" not in titles
+    assert {column: titles[column] for column in RATING_COLUMNS} == {column: data[column] for column in RATING_COLUMNS}
@@ -0,0 +1,46 @@
+import os
+import threading
+
+import instrumentation
+from instrumentation import Registry
+
+
+def flush_from_threads(registry, path, force, threads=8, flushes=50):
+    errors = []
+
+    def session():
+        try:
+            for _ in range(flushes):
+                registry.observe("widgets", 0.001)
+                registry.flush(path, force=force)
+        except Exception as error:
+            errors.append(error)
+
+    workers = [threading.Thread(target=session) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return errors
+
+
+def test_concurrent_flushes_never_collide(tmp_path):
+    registry = Registry()
+    path = str(tmp_path / "metrics.prom")
+    assert flush_from_threads(registry, path, force=True) == []
+    assert os.listdir(tmp_path) == ["metrics.prom"]
+    with open(path) as metrics:
+        assert 'bec_phase_seconds_count{phase="widgets"} 400' in metrics.read()
+
+
+def test_flushes_are_rate_limited(tmp_path, monkeypatch):
+    writes = []
+    replace = os.replace
+
+    def counted_replace(source, target):
+        writes.append(target)
+        replace(source, target)
+
+    monkeypatch.setattr(instrumentation.os, "replace", counted_replace)
+    assert flush_from_threads(Registry(), str(tmp_path / "metrics.prom"), force=False) == []
+    assert len(writes) == 1
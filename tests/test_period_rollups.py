@@ -0,0 +1,42 @@
+import pandas as pd
+
+from conduct_catalog import CONDUCT_ITEMS
+from conftest import expected_rollups, stored_rollups, version5_reports
+from period_rollups import fiscal_year_months
+
+
+# version5 reports, every third with a Code of Conduct selection
+def _reports(count, seed=0):
+    for number, data in enumerate(version5_reports(count, seed)):
+        if number % 3 == 0:
+            data["Selected Code of Conduct"] = CONDUCT_ITEMS[number % 5:number % 5 + 2]
+        yield data
+
+
+def test_rollups_follow_corrections_and_retractions(store):
+    ids = store.add_many(_reports(90), "version5")
+    replacements = _reports(15, seed=1)
+    for submission_id in ids[:15]:
+        store.correct(submission_id, next(replacements))
+    for submission_id in ids[40:55]:
+        store.retract(submission_id)
+
+    pd.testing.assert_frame_equal(stored_rollups(store), expected_rollups(store), check_dtype=False)
+
+
+def test_fiscal_year_rollups_split_at_july(store):
+    june, july = dict(next(version5_reports(1))), dict(next(version5_reports(1, seed=1)))
+    june["Experience Date"], july["Experience Date"] = "2023-06-30", "2023-07-01"
+    store.add_many([june, july, *_reports(60)], "version5")
+    expected = expected_rollups(store)
+
+    for year in (2023, 2024):
+        rollups = store.fiscal_year_rollups(year)
+        periods = [f"FY{year}", *(month for month in fiscal_year_months(year) if month in expected.index)]
+        assert sorted(rollups) == sorted(periods)
+        stored = pd.DataFrame.from_dict(rollups, orient="index").sort_index()
+        pd.testing.assert_frame_equal(stored, expected.loc[sorted(periods)], check_dtype=False, check_names=False)
+
+    assert "2023-06" in store.fiscal_year_rollups(2023) and "2023-06" not in store.fiscal_year_rollups(2024)
+    assert "2023-07" in store.fiscal_year_rollups(2024) and "2023-07" not in store.fiscal_year_rollups(2023)
+    assert store.rollup_fiscal_years() == [2024, 2023]
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import expected_rating_stats, stored_rating_stats, version5_reports
+from rating_stats import RunningStats, block_from_histograms, combine
+
+RATINGS = [random.Random(1).randint(0, 10) for _ in range(200)]
+
+
+def _histogram(ratings):
+    return np.bincount(ratings, minlength=11)
+
+
+def _assert_same(stats, ratings):
+    expected = pd.Series(ratings)
+    assert stats.reports == len(ratings)
+    assert stats.mean == pytest.approx(expected.mean())
+    assert stats.variance == pytest.approx(expected.var())
+    assert (stats.minimum, stats.maximum) == (expected.min(), expected.max())
+    assert stats.histogram == list(_histogram(ratings))
+
+
+def test_merge_and_remove_match_a_recomputation():
+    stats = RunningStats()
+    for start in range(0, len(RATINGS), 30):
+        stats.merge(RunningStats.of(RATINGS[start:start + 30]))
+    _assert_same(stats, RATINGS)
+
+    stats.remove(RunningStats.of(RATINGS[:150]))
+    _assert_same(stats, RATINGS[150:])
+    stats.remove(RunningStats.of(RATINGS[150:]))
+    assert stats.reports == 0 and stats.minimum is None
+
+
+def test_remove_rejects_ratings_never_added():
+    with pytest.raises(ValueError):
+        RunningStats.of([1, 2]).remove(RunningStats.of([3]))
+
+
+def test_combine_matches_running_stats():
+    parts = [RATINGS[:70], RATINGS[70:71], RATINGS[71:]]
+    block = block_from_histograms([_histogram(parts[0])])
+    for part in parts[1:]:
+        block = combine(block, block_from_histograms([_histogram(part)]))
+    _assert_same(RunningStats.from_block_row(block[0]), RATINGS)
+
+    block = combine(block, block_from_histograms([_histogram(RATINGS[:71])]), remove=True)
+    _assert_same(RunningStats.from_block_row(block[0]), RATINGS[71:])
+    block = combine(block, block_from_histograms([_histogram(RATINGS[71:])]), remove=True)
+    assert not block.any()
+
+
+def test_stored_stats_follow_corrections_and_retractions(store):
+    ids = store.add_many(version5_reports(80), "version5")
+    replacements = version5_reports(20, seed=1)
+    for submission_id in ids[:20]:
+        store.correct(submission_id, next(replacements))
+    # A correction can drop the ratings altogether
+    without_ratings = {key: value for key, value in next(version5_reports(1, seed=2)).items()
+                       if not key.startswith("Rating - ")}
+    store.correct(ids[20], without_ratings)
+    for submission_id in ids[30:50]:
+        store.retract(submission_id)
+
+    pd.testing.assert_frame_equal(stored_rating_stats(store), expected_rating_stats(store), check_dtype=False)
+
+    for submission_id in ids:
+        if store.get(submission_id) is not None:
+            store.retract(submission_id)
+    assert stored_rating_stats(store).empty
@@ -0,0 +1,44 @@
+import threading
+
+import numpy as np
+
+from ratings_analytics import CRITERIA_COUNT, RatingsMatrix
+
+
+def block(first, count, rating):
+    ids = np.arange(first, first + count)
+    dates = np.full(count, np.datetime64("2024-03-01"))
+    pairs = [(row_id, f"Employee {row_id % 3}") for row_id in ids]
+    return ids, dates, np.full(count, 3), np.full((count, CRITERIA_COUNT), rating), pairs
+
+
+def test_snapshot_is_unchanged_by_later_appends():
+    matrix = RatingsMatrix()
+    matrix.append(*block(1, 10, 4))
+    snapshot = matrix.snapshot
+    matrix.append(*block(11, 10, 8))
+    assert len(snapshot) == 10 and len(matrix) == 20
+    assert snapshot.criterion_summary()["Mean"].eq(4).all()
+    assert matrix.criterion_summary()["Mean"].eq(6).all()
+
+
+def test_readers_see_consistent_snapshots_while_appending():
+    matrix = RatingsMatrix()
+    matrix.append(*block(1, 30, 5))
+    errors = []
+
+    def read():
+        for _ in range(200):
+            snapshot = matrix.snapshot
+            means = snapshot.employee_means()
+            if means["Reports"].sum() != len(snapshot):
+                errors.append((means["Reports"].sum(), len(snapshot)))
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for first in range(31, 3031, 30):
+        matrix.append(*block(first, 30, 5))
+    for reader in readers:
+        reader.join()
+    assert errors == []
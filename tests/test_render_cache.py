@@ -0,0 +1,67 @@
+import os
+from datetime import date, time
+
+import pytest
+
+from render_cache import DiskCache, RenderCache, stable_hash
+
+
+def test_stable_hash_follows_content_order_and_namespace():
+    data = {"Name": ["Danielle"], "Experience Date": [date(2024, 3, 1)], "Experience Time": [time(10, 30)]}
+    same = {"Name": ("Danielle",), "Experience Date": ["2024-03-01"], "Experience Time": ["10:30:00"]}
+    assert stable_hash(data) == stable_hash(same) == stable_hash(dict(data))
+    # Sections render in insertion order, so reordered keys are another document
+    assert stable_hash(data) != stable_hash(dict(reversed(data.items())))
+    assert stable_hash(data, "version1") != stable_hash(data, "version2")
+    assert stable_hash({"Rating": 1}) != stable_hash({"Rating": "1"})
+    assert len(stable_hash(data)) == 64
+
+
+def test_cache_evicts_least_recently_used_by_count_and_bytes():
+    cache = RenderCache(max_entries=3, max_bytes=10)
+    for key in "abc":
+        cache.put(key, b"12")
+    assert cache.get("a") == b"12"
+    cache.put("d", b"12")
+    # b was the least recently used once a was read
+    assert cache.get("b") is None and cache.get("a") == b"12"
+
+    # Over the byte budget: the least recently used go until the rest fits
+    cache.put("e", b"1234567")
+    assert cache.stats()["bytes"] == 9
+    assert [key for key in "acde" if cache.get(key) is not None] == ["a", "e"]
+
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None and cache.get("e") == b"1234567"
+    assert cache.stats()["evictions"] == 3
+
+
+def test_get_or_render_renders_each_input_once():
+    cache = RenderCache()
+    renders = []
+
+    def render(data):
+        renders.append(data)
+        return repr(data).encode()
+
+    for _ in range(3):
+        assert cache.get_or_render("version3", {"Rating": 4}, render) == b"{'Rating': 4}"
+    cache.get_or_render("version4", {"Rating": 4}, render)
+    assert len(renders) == 2
+    assert cache.stats() | {"bytes": 0} == {"entries": 2, "bytes": 0, "hits": 2, "misses": 2, "evictions": 0}
+
+
+@pytest.mark.parametrize("read_first", [True, False])
+def test_disk_cache_prunes_least_recently_used(tmp_path, read_first):
+    cache = DiskCache(str(tmp_path), max_bytes=25)
+    for number, key in enumerate(("aa1", "bb2", "cc3")):
+        os.utime(cache.put(key, b"x" * 10), (number, number))
+    # A hit counts as a use
+    if read_first:
+        assert cache.get("aa1") == cache.path("aa1")
+    assert cache.get("zz9") is None
+
+    assert cache.prune() == 1
+    oldest = "bb2" if read_first else "aa1"
+    assert [key for key in ("aa1", "bb2", "cc3") if cache.get(key) is None] == [oldest]
+    assert cache.prune() == 0
@@ -0,0 +1,100 @@
+import os
+import runpy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.testing.v1 import AppTest
+
+import render_jobs
+from conftest import version1_reports
+from render_cache import RenderCache
+from render_jobs import pdf_class, submit_render
+
+FORMS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Function to run a form script the way Streamlit does on every rerun, in a fresh namespace
+def rerun(name):
+    return runpy.run_path(os.path.join(FORMS, name), run_name=name[:-3])
+
+
+def test_reruns_reuse_one_pdf_class():
+    data = next(version1_reports(1))
+    rerun("version3.py")["download_pdf"](data)
+    size = len(render_jobs._pdf_classes)
+    classes = set()
+    for _ in range(6):
+        form = rerun("version3.py")
+        assert form["download_pdf"](data).startswith(b"%PDF")
+        classes.add(pdf_class(form["PDF"]))
+    assert len(classes) == 1
+    assert len(render_jobs._pdf_classes) == size
+
+
+# Executor that counts the renders submitted to it
+class CountingExecutor(ThreadPoolExecutor):
+    submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+def _buttons(at, label):
+    return [button for button in at.button if button.label == label]
+
+
+def test_forms_render_the_pdf_only_once_asked(monkeypatch, shared_store):
+    executor = CountingExecutor(max_workers=1)
+    monkeypatch.setattr(render_jobs, "get_executor", lambda: executor)
+    monkeypatch.setattr(render_jobs, "pdf_cache", RenderCache())
+    at = AppTest.from_file(os.path.join(FORMS, "version3.py"), default_timeout=60).run()
+    for text in ("slow", "helpful"):
+        at.text_area[0].input(text)
+        at.run()
+    assert not at.exception
+    assert executor.submitted == 0
+
+    _buttons(at, "Prepare PDF")[0].click()
+    at.run()
+    executor.shutdown(wait=True)
+    at.run()
+    assert executor.submitted == 1
+    assert not _buttons(at, "Prepare PDF")
+    assert [button.label for button in at.get("download_button")] == ["Download data as CSV", "Download data as PDF"]
+
+    # Edited inputs need another request; the finished render stays cached for the old ones
+    at.text_area[0].input("rude")
+    at.run()
+    assert _buttons(at, "Prepare PDF") and executor.submitted == 1
+    at.text_area[0].input("helpful")
+    at.run()
+    assert not _buttons(at, "Prepare PDF") and executor.submitted == 1
+
+
+def test_submit_render_reuses_cancels_and_reads_the_cache(monkeypatch):
+    executor = CountingExecutor(max_workers=1)
+    monkeypatch.setattr(render_jobs, "get_executor", lambda: executor)
+    monkeypatch.setattr(render_jobs, "pdf_cache", RenderCache())
+    release = threading.Event()
+
+    def render(data):
+        release.wait(10)
+        return repr(data).encode()
+
+    jobs = {}
+    first = submit_render(jobs, "pdf", "version3", {"Rating": 1}, render)
+    assert submit_render(jobs, "pdf", "version3", {"Rating": 1}, render) is first
+    # first is running; second waits behind it until third supersedes it
+    second = submit_render(jobs, "pdf", "version3", {"Rating": 2}, render)
+    third = submit_render(jobs, "pdf", "version3", {"Rating": 3}, render)
+    assert jobs == {"pdf": third} and second.future.cancelled()
+    release.set()
+    assert third.future.result(10) == b"{'Rating': 3}" and first.future.result(10) == b"{'Rating': 1}"
+    assert executor.submitted == 3
+
+    # Rendered inputs come from the cache, without the executor
+    again = submit_render(jobs, "pdf", "version3", {"Rating": 1}, render)
+    assert again.done() and again.future.result() == b"{'Rating': 1}"
+    assert executor.submitted == 3
+    executor.shutdown()
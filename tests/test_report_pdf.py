@@ -0,0 +1,21 @@
+import pytest
+
+from report_pdf import TTF_PATHS, ReportPDF, render_experience
+
+
+class Latin1PDF(ReportPDF):
+    ttf_paths = {}
+
+
+def test_latin1_fallback_keeps_punctuation_and_base_letters():
+    pdf = Latin1PDF()
+    pdf.add_page()
+    pdf.set_font("Arial", "", 12)
+    text = "“Great” service — Łukasz, Zoë and Nguyễn helped… 北"
+    assert pdf.normalize_text(text) == '"Great" service - Lukasz, Zoë and Nguyen helped... ?'
+
+
+@pytest.mark.skipif(not TTF_PATHS[""], reason="no Unicode font configured or installed")
+def test_only_reports_beyond_latin1_embed_the_unicode_font():
+    assert b"/FontFile2" in render_experience({"Customer Service Feedback": "“Great” service — Nguyễn"})
+    assert b"/FontFile2" not in render_experience({"Customer Service Feedback": "Great service, Zoë"})
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import roster
+from conftest import version5_reports
+from roster import Roster
+from write_queue import commit_report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_equivalent_names_are_entered_once(store):
+    names = Roster.load(store)
+    assert names.add("  José   Ramirez ") == "José Ramirez"
+    assert names.add("jose ramirez") == "José Ramirez"
+    assert names.add("   ") is None
+    assert Roster.load(store).get("JOSE RAMIREZ") == "José Ramirez"
+
+
+def test_prefix_matches_are_not_crowded_out_by_surnames():
+    names = Roster([f"Alex{number} Smith" for number in range(12)] + ["Smyth Zed", "Smith Abel"])
+    assert names.suggest("sm", limit=3) == ["Smith Abel", "Smyth Zed", "Alex0 Smith"]
+    assert names.suggest("smy") == ["Smyth Zed"]
+    assert names.suggest("") == []
+    assert names.fuzzy("Smyht Zed") == ["Smyth Zed"]
+
+
+def test_names_load_on_first_use():
+    loads = []
+    names = Roster(load=lambda: loads.append(1) or ["Danielle", "LeRoy"])
+    assert not loads
+    assert names.suggest("dan") == ["Danielle"] and "leroy" in names and len(names) == 2
+    assert loads == [1]
+
+
+def test_forms_list_names_without_loading_the_store(store):
+    store.add_to_roster("Danielle")
+    script = "import sys, roster; print(roster.get_roster().names(), 'numpy' in sys.modules, 'submission_store' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True,
+                            env={**os.environ, "BEC_STORE_PATH": store.path})
+    assert result.stdout.split("]")[1].split() == ["False", "False"]
+    assert "'Danielle'" in result.stdout
+
+
+@pytest.mark.parametrize("queued", [True, False])
+def test_saved_names_are_suggested_at_once(shared_store, monkeypatch, queued):
+    monkeypatch.setattr("write_queue.QUEUED_WRITES", queued)
+    assert roster.get_roster().suggest("quinn") == []
+    data = next(version5_reports(1))
+    data["Employee Names"] = "Quinn Newhire, Sarah"
+    commit_report(data, "version5")
+    assert roster.get_roster().suggest("quinn") == ["Quinn Newhire"]
+    assert "Quinn Newhire" in shared_store.roster_names()
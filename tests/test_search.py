@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import version1_reports
+from submission_store import fts_query
+
+
+@pytest.mark.parametrize("text, query", [
+    ("job search", '"job" "search"'),
+    ('"job search" help', '"job search" "help"'),
+    ("resum*", '"resum" *'),
+    ('say "hi', '"say" "hi"'),
+    ('an "odd"" quote', '"an" "odd" "quote"'),
+    ("-resume", '"-resume"'),
+    ("NEAR(printer slow)", '"NEAR(printer" "slow)"'),
+    ("printer OR NOT AND", '"printer" "OR" "NOT" "AND"'),
+    ("* ** \"\"", ""),
+])
+def test_fts_query_quotes_every_term(text, query):
+    assert fts_query(text) == query
+
+
+def add(store, *feedback, rating=3):
+    reports = []
+    for data, text in zip(version1_reports(len(feedback)), feedback):
+        data["Customer Service Feedback"] = [text]
+        data["Customer Service Rating"] = [rating]
+        reports.append(data)
+    return store.add_many(reports, "version1")
+
+
+@pytest.mark.parametrize("text", ["-resume", "NEAR(printer slow)", "printer OR", 'a "b', "* AND", "col:value", "^start"])
+def test_search_syntax_never_reaches_fts5(store, text):
+    add(store, "the printer was slow")
+    assert isinstance(store.search(text), list)
+
+
+def test_search_ranks_and_filters(store):
+    many, once = add(store, "printer printer printer broke", "printer was slow today")
+    other, = add(store, "printer jammed", rating=1)
+    add(store, "nothing to report")
+
+    # bm25: more occurrences first, then the shorter of two reports with one
+    assert [row["id"] for row in store.search("printer")] == [many, other, once]
+    assert [row["id"] for row in store.search("printer", newest_first=True)] == [other, once, many]
+    assert [row["id"] for row in store.search("printer", max_rating=2)] == [other]
+    assert [row["id"] for row in store.search('"was slow"')] == [once]
+    assert [row["id"] for row in store.search("prin*", limit=2)] == [many, other]
+    assert "[printer]" in store.search("printer")[0]["snippet"]
+    assert store.search("printer broke -")[0]["id"] == many
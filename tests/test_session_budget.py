@@ -0,0 +1,100 @@
+import gc
+import tempfile
+import time
+
+import pytest
+
+import session_budget
+from session_budget import SessionArtifacts, SessionBudget
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "spill")
+
+
+def test_idle_session_is_spilled_and_read_back(directory):
+    budget = SessionBudget(budget_bytes=1 << 30, idle_seconds=0.05, directory=directory)
+    idle, active = SessionArtifacts(budget), SessionArtifacts(budget)
+    idle.put("pdf", b"%PDF" * 1000)
+    active.put("csv", b"a,b\n")
+    time.sleep(0.1)
+    active.get("csv")
+    assert budget.session_bytes()[idle.session] == (0, 4000)
+    assert budget.stats()["spills"] == 1
+
+    assert idle.loader("pdf")() == b"%PDF" * 1000
+    assert budget.session_bytes()[idle.session] == (4000, 0)
+    assert budget.stats()["rehydrations"] == 1
+
+
+def test_least_recently_active_session_is_spilled_over_budget(directory):
+    budget = SessionBudget(budget_bytes=2500, idle_seconds=3600, directory=directory)
+    first, second, third = (SessionArtifacts(budget) for _ in range(3))
+    for session in (first, second, third):
+        session.put("pdf", bytes(1000))
+    stats = budget.stats()
+    assert budget.session_bytes()[first.session] == (0, 1000)
+    assert budget.session_bytes()[third.session] == (1000, 0)
+    assert stats["resident_bytes"] == 2000 and stats["spilled_bytes"] == 1000
+
+
+def test_files_are_written_outside_the_lock(directory, monkeypatch):
+    budget = SessionBudget(budget_bytes=0, idle_seconds=3600, directory=directory)
+    mkstemp = tempfile.mkstemp
+
+    def checked_mkstemp(*args, **kwargs):
+        assert not budget._lock.locked()
+        return mkstemp(*args, **kwargs)
+
+    monkeypatch.setattr(session_budget.tempfile, "mkstemp", checked_mkstemp)
+    first, second = SessionArtifacts(budget), SessionArtifacts(budget)
+    first.put("pdf", bytes(100))
+    second.put("pdf", bytes(100))
+    assert budget.session_bytes()[first.session] == (0, 100)
+
+
+def test_collected_handle_does_not_deadlock_while_the_lock_is_held(directory):
+    budget = SessionBudget(budget_bytes=0, idle_seconds=3600, directory=directory)
+    handle, other = SessionArtifacts(budget), SessionArtifacts(budget)
+    handle.put("pdf", bytes(100))
+    other.put("pdf", bytes(100))
+    session = handle.session
+    # A collection inside a locked call runs the finalizer on the thread holding the lock
+    with budget._lock:
+        del handle
+        gc.collect()
+    assert session in budget.session_bytes()
+    other.get("pdf")
+    assert session not in budget.session_bytes()
+    assert budget.stats()["spilled_bytes"] == 0
+
+
+def test_spilled_files_are_read_outside_the_lock(directory, monkeypatch):
+    budget = SessionBudget(budget_bytes=0, idle_seconds=3600, directory=directory)
+    first, second = SessionArtifacts(budget), SessionArtifacts(budget)
+    first.put("pdf", b"first")
+    second.put("pdf", b"second")
+    reads = []
+
+    def checked_open(*args, **kwargs):
+        reads.append(budget._lock.locked())
+        return open(*args, **kwargs)
+
+    monkeypatch.setattr(session_budget, "open", checked_open, raising=False)
+    assert first.get("pdf") == b"first"
+    assert reads == [False] and budget.stats()["rehydrations"] == 1
+
+
+def test_loader_of_a_dropped_session_rerenders_or_says_it_is_gone(directory):
+    budget = SessionBudget(directory=directory)
+    handle = SessionArtifacts(budget)
+    handle.put("csv", b"a,b\n")
+    plain, rerendered = handle.loader("csv"), handle.loader("csv", lambda: b"a,b\n")
+    budget.drop(handle.session)
+
+    with pytest.raises(LookupError, match="csv of this session is no longer available"):
+        plain()
+    assert rerendered() == b"a,b\n"
+    # Reading does not bring the dropped session back
+    assert budget.session_bytes() == {}
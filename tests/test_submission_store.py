@@ -0,0 +1,70 @@
+import json
+import sqlite3
+
+import pandas as pd
+
+from conduct_catalog import LEGACY_CATALOG, catalog_items, conduct_mask
+from conftest import (
+    EMPLOYEES, expected_rating_stats, expected_rollups, stored_rating_stats, stored_rollups, version5_reports,
+)
+from experience_record import pack_ratings
+from submission_store import MIGRATIONS, SubmissionStore
+
+
+def test_names_with_commas_stay_one_employee(store):
+    data = next(version5_reports(1))
+    submission_id = store.add({**data, "Employee Names": ["Smith, John", "Ana"]}, "version5")
+    employees = store.query("SELECT employee_name FROM submission_employees WHERE submission_id = ?", (submission_id,))
+    assert sorted(row[0] for row in employees) == ["Ana", "Smith, John"]
+    assert store.get(submission_id)["employee_name"] == "Smith, John, Ana"
+    assert {"Smith, John", "Ana"} <= set(store.stats_employees())
+    assert "Smith, John" in store.roster_names() and "Smith" not in store.roster_names()
+
+    store.correct(submission_id, {**data, "Employee Names": ["Smith, John"]})
+    assert store.stats_employees().count("Smith, John") == 1
+    assert "Ana" not in store.stats_employees()
+    store.retract(submission_id)
+    assert store.stats_employees() == []
+
+
+def test_add_to_roster_ignores_blank_names(store):
+    assert store.add_to_roster("   ") is None
+    assert store.add_to_roster("jose  ruiz") == "jose ruiz"
+    assert store.add_to_roster("José Ruiz") == "jose ruiz"
+
+
+def test_migrates_a_first_schema_database(tmp_path):
+    path = str(tmp_path / "submissions.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(f"{MIGRATIONS[0]}\nPRAGMA user_version = 1;")
+    items = catalog_items(LEGACY_CATALOG)
+    for submission_id, data in enumerate(version5_reports(60), start=1):
+        names = data["Employee Names"].split(", ")
+        # Every other report is a version1 report, with a conduct selection and no handbook ratings
+        selected = json.dumps(items[submission_id % 4:submission_id % 4 + 2]) if submission_id % 2 else None
+        conn.execute(
+            "INSERT INTO submissions (id, version, submitted_at, experience_date, employee_name,"
+            " customer_service_rating, customer_service_feedback, conduct_items, handbook_ratings)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (submission_id, "version1" if selected else "version5", "2023-09-30T00:00:00+00:00",
+             data["Experience Date"], ", ".join(names), int(data["Customer Service Rating"]),
+             data["Customer Service Feedback"], selected, None if selected else pack_ratings(data)),
+        )
+        conn.executemany("INSERT INTO submission_employees VALUES (?, ?)", [(name, submission_id) for name in names])
+    conn.commit()
+    conn.close()
+
+    store = SubmissionStore(path)
+    try:
+        assert store.query("PRAGMA user_version")[0][0] == len(MIGRATIONS)
+        for row in store.query("SELECT id, conduct_mask, conduct_catalog FROM submissions WHERE version = 'version1'"):
+            assert row["conduct_mask"] == conduct_mask(items[row["id"] % 4:row["id"] % 4 + 2])
+            assert row["conduct_catalog"] == LEGACY_CATALOG
+        assert not store.query("SELECT id FROM submissions WHERE version = 'version5' AND conduct_mask IS NOT NULL")
+        pd.testing.assert_frame_equal(stored_rating_stats(store), expected_rating_stats(store), check_dtype=False)
+        pd.testing.assert_frame_equal(stored_rollups(store), expected_rollups(store), check_dtype=False)
+        assert set(EMPLOYEES) <= set(store.roster_names())
+        assert len(store.search("helpful", limit=100)) == store.query(
+            "SELECT COUNT(*) FROM submissions WHERE customer_service_feedback = 'helpful'")[0][0] > 0
+    finally:
+        store.close()
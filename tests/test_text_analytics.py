@@ -0,0 +1,98 @@
+import random
+from collections import Counter
+
+import pandas as pd
+
+from conftest import version5_reports
+from experience_record import HANDBOOK_CRITERIA, TEXT_FIELDS
+from text_analytics import SERVICE, STOP_WORDS, WORD, TextIndex
+
+PHRASES = ["Nobody answered my question", "staff were not helpful", "the resume review was helpful",
+           "waited a long time, then left", "Staff greeted me right away", "Career's workshop was great"]
+COUNTED = ["Term", "Reports", "Occurrences", "Rated reports", "Low-rated reports"]
+
+
+# version5 reports whose service rating goes with their narrative: unanswered questions rate low
+def _reports(count, seed=0):
+    rng = random.Random(seed)
+    for data in version5_reports(count, seed):
+        data["Actual Experience"] = " ".join(rng.sample(PHRASES, 2))
+        data["Customer Service Rating"] = "1" if "Nobody" in data["Actual Experience"] else str(rng.randint(2, 5))
+        yield data
+
+
+# Function to count every term (words and two-word phrases without stop words) over the stored
+# reports directly, for comparison with the index
+def _expected_counts(store, criterion=None):
+    counted = {}
+    for row in store.query(f"SELECT customer_service_rating, handbook_ratings, {', '.join(TEXT_FIELDS)} FROM submissions"):
+        words = [word for word in WORD.findall(" ".join(field for field in tuple(row)[2:] if field).casefold())
+                 if word not in STOP_WORDS]
+        terms = Counter(words + [f"{first} {second}" for first, second in zip(words, words[1:])])
+        if criterion is None:
+            rated, low = row[0] is not None, (row[0] or 0) <= 2
+        else:
+            rated = row[1] is not None
+            low = rated and row[1][HANDBOOK_CRITERIA.index(criterion)] <= 3
+        for term, count in terms.items():
+            entry = counted.setdefault(term, [term, 0, 0, 0, 0])
+            entry[1:] = [entry[1] + 1, entry[2] + count, entry[3] + rated, entry[4] + (rated and low)]
+    return pd.DataFrame(list(counted.values()), columns=COUNTED).sort_values("Term").reset_index(drop=True)
+
+
+def _counts(index, rating=SERVICE):
+    frame = index.associations(rating, min_reports=0)
+    frame = frame[frame["Reports"] > 0][COUNTED].astype({"Term": str})
+    return frame.sort_values("Term").reset_index(drop=True)
+
+
+def test_index_counts_every_term_of_the_stored_narratives(store):
+    store.add_many(_reports(300), "version5")
+    index = TextIndex()
+    assert index.refresh(store) == 300 and index.refresh(store) == 0
+    pd.testing.assert_frame_equal(_counts(index), _expected_counts(store), check_dtype=False)
+    criterion = HANDBOOK_CRITERIA[2]
+    pd.testing.assert_frame_equal(_counts(index, criterion), _expected_counts(store, criterion), check_dtype=False)
+
+    ranked = index.associations(min_reports=20)
+    assert ranked["Term"].iloc[0] in {"nobody", "nobody answered", "answered", "answered question"}
+    assert ranked["z"].is_monotonic_decreasing
+    assert "question" in set(ranked["Term"]) and "my" not in set(ranked["Term"]) and "career's" in set(ranked["Term"])
+
+
+def test_refresh_follows_corrections_and_retractions(store):
+    ids = store.add_many(_reports(200), "version5")
+    index = TextIndex()
+    index.refresh(store)
+    replacements = _reports(40, seed=1)
+    for submission_id in ids[:40]:
+        store.correct(submission_id, next(replacements))
+    for submission_id in ids[100:170]:
+        store.retract(submission_id)
+    store.add_many(_reports(30, seed=2), "version5")
+
+    assert index.refresh(store) == 40 + 30
+    assert len(index) == 200 - 70 + 30
+    pd.testing.assert_frame_equal(_counts(index), _expected_counts(store), check_dtype=False)
+    fresh = TextIndex()
+    fresh.refresh(store)
+    # Equal z scores may come in either order: term ids differ between the two indexes
+    ranked, rebuilt = (
+        built.associations(min_reports=5).astype({"Term": str}).sort_values(["z", "Term"], ascending=[False, True])
+        .reset_index(drop=True) for built in (index, fresh))
+    pd.testing.assert_frame_equal(ranked, rebuilt)
+
+
+def test_snapshot_round_trip_then_refresh(store, tmp_path):
+    store.add_many(_reports(120), "version5")
+    index = TextIndex()
+    index.refresh(store)
+    path = str(tmp_path / "text_index.npz")
+    index.save(path)
+
+    store.add_many(_reports(50, seed=3), "version5")
+    loaded = TextIndex.load(path)
+    assert loaded.terms == index.terms and len(loaded) == 120
+    assert loaded.refresh(store) == 50
+    pd.testing.assert_frame_equal(_counts(loaded), _expected_counts(store), check_dtype=False)
+    assert len(TextIndex.load(str(tmp_path / "missing.npz"))) == 0
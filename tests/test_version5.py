@@ -0,0 +1,25 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "version5.py")
+
+
+@pytest.mark.parametrize("batch", ["1", "0"])
+def test_reruns_save_only_submitted_reports(shared_store, monkeypatch, batch):
+    monkeypatch.setenv("BEC_BATCH_SUBMIT", batch)
+    at = AppTest.from_file(SCRIPT, default_timeout=60).run()
+    for text in ("slow", "helpful", "rude"):
+        at.text_area[0].input(text)
+        at.run()
+    at.run()
+    assert not at.exception
+    assert shared_store.count() == 0
+
+    next(button for button in at.button if button.label == "Submit report").click()
+    at.run()
+    assert shared_store.count() == 1
+    at.run()
+    at.run()
+    assert shared_store.count() == 1
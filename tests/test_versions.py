@@ -0,0 +1,85 @@
+import importlib
+import os
+import re
+import subprocess
+import sys
+from datetime import date, time
+
+import pandas as pd
+import pytest
+
+from conduct_catalog import CURRENT_CATALOG, conduct_mask
+from experience_record import HANDBOOK_CRITERIA, TEXT_FIELDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VERSIONS = ("version1", "version2", "version3", "version4", "version5")
+# Most milliseconds a version module may take to import after streamlit (a few ms when lazy)
+IMPORT_BUDGET_MS = float(os.environ.get("BEC_IMPORT_BUDGET_MS", "60"))
+# Modules the forms must not import until they are needed
+DEFERRED = ("pandas", "numpy", "fpdf")
+TEXTS = {
+    "empty": "",
+    "quoting": 'He said "no, thanks",\nthen left — café closed\r\n',
+    "10kb": ("The resource area was busy but staff checked in with every customer. " * 150)[:10 * 1024],
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+# Function to import streamlit and then module in a fresh interpreter under -X importtime; returns
+# (milliseconds the module took, top-level packages imported along with it)
+def import_cost(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    entries = [(match[4], int(match[2])) for match in _LINE.finditer(result.stderr)]
+    return entries[-1][1] / 1000, {name.split(".")[0] for name, _ in entries}
+
+
+# Function to build the data dict a version's init_main() exports, with text in every text field
+def make_data(version, text, all_conduct=False):
+    fields = {
+        "Customer Service Rating": 3,
+        "Experience Date": date(2024, 3, 1),
+        "Experience Time": time(10, 30),
+        **{key: text for key in TEXT_FIELDS.values()},
+    }
+    if version == "version5":
+        data = {key: str(value) for key, value in fields.items()}
+        data["Experience Time"] = "10:30"
+        data["Employee Names"] = "Danielle, Sarah"
+        data.update({f"Rating - {criterion}": "5" for criterion in HANDBOOK_CRITERIA})
+        return data
+    data = {key: [value] for key, value in fields.items()}
+    if version in ("version1", "version2"):
+        module = importlib.import_module(version)
+        selected = list(module.code_of_conduct_items) if all_conduct else []
+        data = {"Name": ["Danielle"], **data,
+                "Code of Conduct Mask": [conduct_mask(selected)], "Conduct Catalog": [CURRENT_CATALOG]}
+    if version == "version4":
+        data["Employee Handbook Ratings"] = [{criterion: 5 for criterion in HANDBOOK_CRITERIA}]
+    return data
+
+
+@pytest.mark.parametrize("version", VERSIONS)
+def test_version_modules_import_within_budget(version):
+    # Best of three runs, so one slow start on a busy machine does not fail the check
+    for _ in range(3):
+        milliseconds, imported = import_cost(version)
+        assert not imported & set(DEFERRED), f"{version} imports {sorted(imported & set(DEFERRED))} at start"
+        if milliseconds <= IMPORT_BUDGET_MS:
+            return
+    pytest.fail(f"{version} took {milliseconds:.1f} ms to import after streamlit (budget {IMPORT_BUDGET_MS:.0f} ms)")
+
+
+@pytest.mark.parametrize("text", TEXTS)
+@pytest.mark.parametrize("version", VERSIONS)
+def test_csv_fast_path_matches_pandas(version, text):
+    module = importlib.import_module(version)
+    payloads = [make_data(version, TEXTS[text])]
+    if version in ("version1", "version2"):
+        payloads.append(make_data(version, TEXTS[text], all_conduct=True))
+    for data in payloads:
+        frame = pd.DataFrame([data]) if version == "version5" else pd.DataFrame(data)
+        assert module.convert_df_to_csv(data) == frame.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from conftest import version5_reports
+from submission_store import INSERT_COLUMNS
+from write_queue import WriteQueue, WriterBusy
+
+FEEDBACK = INSERT_COLUMNS.index("customer_service_feedback")
+
+
+# Store whose writes wait until released, and which rejects any batch holding a "boom" report
+class GatedStore:
+    def __init__(self, store):
+        self.store = store
+        self.release = threading.Event()
+        self.batches = []
+
+    def insert_rows(self, values):
+        self.release.wait(10)
+        if any(row[FEEDBACK] == "boom" for row in values):
+            raise ValueError("boom")
+        self.batches.append(len(values))
+        return self.store.insert_rows(values)
+
+
+# Function to wait until the writer has taken everything queued (and is held in its commit)
+def _wait_for_writer(writer):
+    while writer.pending():
+        time.sleep(0.001)
+
+
+def test_reports_queued_during_a_commit_share_the_next_one(store):
+    gated = GatedStore(store)
+    writer = WriteQueue(gated)
+    reports = list(version5_reports(21))
+    futures = [writer.submit(reports[0], "version5")]
+    # The writer is held in the first commit while the rest queue up
+    _wait_for_writer(writer)
+    futures += [writer.submit(data, "version5") for data in reports[1:]]
+    gated.release.set()
+    ids = [future.result(10) for future in futures]
+    writer.close()
+
+    assert gated.batches == [1, 20] and (writer.batches, writer.written) == (2, 21)
+    assert ids == sorted(ids) and store.count() == 21
+    assert [store.get(submission_id)["customer_service_feedback"] for submission_id in ids] == \
+        [data["Customer Service Feedback"] for data in reports]
+
+
+def test_a_bad_report_fails_alone(store):
+    gated = GatedStore(store)
+    writer = WriteQueue(gated)
+    reports = list(version5_reports(5))
+    reports[2]["Customer Service Feedback"] = "boom"
+    futures = [writer.submit(data, "version5") for data in reports]
+    gated.release.set()
+
+    with pytest.raises(ValueError, match="boom"):
+        futures[2].result(10)
+    assert [future.result(10) for number, future in enumerate(futures) if number != 2]
+    writer.close()
+    assert store.count() == 4
+
+
+def test_a_full_queue_pushes_back(store):
+    gated = GatedStore(store)
+    writer = WriteQueue(gated, max_pending=2)
+    reports = version5_reports(4)
+    futures = [writer.submit(next(reports), "version5")]
+    _wait_for_writer(writer)
+    futures += [writer.submit(next(reports), "version5", timeout=1) for _ in range(2)]
+    with pytest.raises(WriterBusy):
+        writer.submit(next(reports), "version5", timeout=0.1)
+
+    gated.release.set()
+    writer.close()
+    assert all(future.done() for future in futures) and store.count() == 3
@@ -0,0 +1,358 @@
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from itertools import islice
+
+import numpy as np
+
+from experience_record import HANDBOOK_CRITERIA, TEXT_FIELDS
+
+# Snapshot of the term-document matrix; each run extends it with the reports stored since
+DEFAULT_INDEX_PATH = os.environ.get("BEC_TEXT_INDEX", "text_index.npz")
+# Reports tokenized per batch, and documents per block when scoring
+CHUNK_SIZE = 20000
+SCORE_BLOCK = 200000
+CRITERIA_COUNT = len(HANDBOOK_CRITERIA)
+
+SERVICE = "Customer Service Rating"
+# Highest value counted as a low rating: 1-2 of the 1-5 service scale, 0-3 of the 0-10 criteria
+LOW_SERVICE = 2
+LOW_CRITERION = 3
+
+# Words are runs of letters (an apostrophe may join two); digits and punctuation separate them
+WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+# Common words left out of terms and phrases; negations stay, since "not helpful" is the point
+STOP_WORDS = frozenset("""
+a about after again all also am an and any are as at be been before being both but by can could did do does doing
+during each few for from further had has have having he her here hers him his how i if in into is it it's its
+itself just me more most my myself of off on once only or other our ours out over own same she should so some such
+than that the their theirs them then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours
+""".split())
+
+_LOW_BITS = np.uint64(32)
+_ID_MASK = np.uint64(2 ** 32 - 1)
+
+
+# Function to pick a submissions row's narrative: its qualitative fields joined into one text
+def narrative(fields):
+    return " ".join(field for field in fields if field)
+
+
+# Sparse term-document matrix of the stored narratives, in CSR form (indptr, indices, counts),
+# with each report's ratings alongside. Terms are single words and two-word phrases (adjacent
+# words once stop words are dropped); the vocabulary maps a word to its term id and a
+# (word id, word id) pair to its phrase's. Appended to as reports arrive; corrected and retracted
+# reports are masked out (and corrected ones appended again) until the next compaction.
+class TextIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.vocabulary = defaultdict()
+        self.vocabulary.default_factory = self.vocabulary.__len__
+        self.terms = []
+        self._stop = np.zeros(0, dtype=bool)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.service = np.empty(0, dtype=np.uint8)  # 0 when the report has no service rating
+        self.rated = np.empty(0, dtype=bool)  # whether it has handbook ratings
+        self.ratings = np.empty((0, CRITERIA_COUNT), dtype=np.uint8)
+        self.alive = np.empty(0, dtype=bool)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.counts = np.empty(0, dtype=np.uint16)
+        self.revision = 0
+        self.change_revision = 0
+        self._results = {}
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    # Function to label the terms added to the vocabulary since it had `known` entries
+    def _label_new_terms(self, known):
+        added = list(islice(reversed(self.vocabulary), len(self.vocabulary) - known))
+        for key in reversed(added):
+            self.terms.append(key if isinstance(key, str) else f"{self.terms[key[0]]} {self.terms[key[1]]}")
+        self._stop = np.concatenate([self._stop, np.array(
+            [isinstance(term, str) and term in STOP_WORDS for term in self.terms[len(self._stop):]], dtype=bool
+        )])
+
+    # Function to tokenize a batch of narratives into CSR parts: (row lengths, term ids, counts)
+    def _tokenize(self, texts):
+        known = len(self.vocabulary)
+        words, lengths = [], []
+        for text in texts:
+            tokens = WORD.findall(text.casefold())
+            words.extend(tokens)
+            lengths.append(len(tokens))
+        word_ids = np.fromiter(map(self.vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+        self._label_new_terms(known)
+        docs = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        keep = ~self._stop[word_ids]
+        word_ids, docs = word_ids[keep], docs[keep]
+
+        # Phrases: each pair of neighbouring words within one narrative
+        adjacent = docs[1:] == docs[:-1]
+        pairs = (word_ids[:-1][adjacent].astype(np.uint64) << _LOW_BITS) | word_ids[1:][adjacent].astype(np.uint64)
+        pair_codes, pair_inverse = np.unique(pairs, return_inverse=True)
+        known = len(self.vocabulary)
+        phrase_ids = np.fromiter(
+            map(self.vocabulary.__getitem__, zip((pair_codes >> _LOW_BITS).tolist(), (pair_codes & _ID_MASK).tolist())),
+            dtype=np.int64, count=len(pair_codes),
+        )
+        self._label_new_terms(known)
+
+        # One entry per (report, term), sorted by report then term, with its count in the report
+        keys = np.concatenate([
+            (docs.astype(np.uint64) << _LOW_BITS) | word_ids.astype(np.uint64),
+            (docs[:-1][adjacent].astype(np.uint64) << _LOW_BITS) | phrase_ids[pair_inverse].astype(np.uint64),
+        ])
+        keys, counts = np.unique(keys, return_counts=True)
+        row_lengths = np.bincount((keys >> _LOW_BITS).astype(np.int64), minlength=len(lengths))
+        return row_lengths, (keys & _ID_MASK).astype(np.int32), np.minimum(counts, 65535).astype(np.uint16)
+
+    # Function to add submissions rows (id, customer_service_rating, handbook_ratings, *TEXT_FIELDS)
+    def add_rows(self, rows):
+        parts = []
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+            ids, service, blobs, *fields = zip(*chunk)
+            rated = np.array([blob is not None for blob in blobs])
+            ratings = np.zeros((len(chunk), CRITERIA_COUNT), dtype=np.uint8)
+            if rated.any():
+                ratings[rated] = np.frombuffer(b"".join(blob for blob in blobs if blob is not None),
+                                               dtype=np.uint8).reshape(-1, CRITERIA_COUNT)
+            lengths, indices, counts = self._tokenize([narrative(texts) for texts in zip(*fields)])
+            parts.append((np.asarray(ids, dtype=np.int64), np.array([value or 0 for value in service], dtype=np.uint8),
+                          rated, ratings, lengths, indices, counts))
+        if not parts:
+            return
+        ids, service, rated, ratings, lengths, indices, counts = zip(*parts)
+        self.ids = np.concatenate([self.ids, *ids])
+        self.service = np.concatenate([self.service, *service])
+        self.rated = np.concatenate([self.rated, *rated])
+        self.ratings = np.concatenate([self.ratings, *ratings])
+        self.alive = np.concatenate([self.alive, np.ones(sum(len(part) for part in ids), dtype=bool)])
+        self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(np.concatenate(lengths))])
+        self.indices = np.concatenate([self.indices, *indices])
+        self.counts = np.concatenate([self.counts, *counts])
+        self._results.clear()
+
+    # Function to bring the matrix up to date with the store: new reports are tokenized and
+    # appended, and reports corrected or retracted since the last refresh are masked out (the
+    # corrected ones are tokenized again). Returns the number of reports tokenized.
+    def refresh(self, store):
+        with self._lock:
+            change_revision = store.change_revision()
+            revision = store.revision()
+            if change_revision == self.change_revision and revision == self.revision:
+                return 0
+            columns = f"id, customer_service_rating, handbook_ratings, {', '.join(TEXT_FIELDS)}"
+            changed = [row[0] for row in store.query(
+                "SELECT DISTINCT submission_id FROM submission_changes WHERE id > ? AND id <= ? AND submission_id <= ?",
+                (self.change_revision, change_revision, self.revision),
+            )]
+            tokenized = 0
+            if changed:
+                self.alive &= ~np.isin(self.ids, changed)
+                for start in range(0, len(changed), 500):
+                    batch = changed[start:start + 500]
+                    rows = store.query(
+                        f"SELECT {columns} FROM submissions WHERE id IN ({', '.join('?' for _ in batch)})", batch)
+                    self.add_rows(rows)
+                    tokenized += len(rows)
+            last_id = self.revision
+            while True:
+                rows = store.query(
+                    f"SELECT {columns} FROM submissions WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                    (last_id, revision, CHUNK_SIZE * 5),
+                )
+                if not rows:
+                    break
+                self.add_rows(rows)
+                tokenized += len(rows)
+                last_id = rows[-1][0]
+            self.revision, self.change_revision = revision, change_revision
+            if (~self.alive).sum() > len(self.alive) // 4:
+                self._compact()
+            self._results.clear()
+            return tokenized
+
+    # Function to drop masked-out reports from the matrix
+    def _compact(self):
+        if self.alive.all():
+            return
+        keep = self.alive
+        lengths = np.diff(self.indptr)
+        entries = np.repeat(keep, lengths)
+        self.indices = self.indices[entries]
+        self.counts = self.counts[entries]
+        self.indptr = np.concatenate([[0], np.cumsum(lengths[keep])])
+        self.ids, self.service, self.rated = self.ids[keep], self.service[keep], self.rated[keep]
+        self.ratings = self.ratings[keep]
+        self.alive = np.ones(len(self.ids), dtype=bool)
+
+    # Function to sum per-report weights (k, reports) over every term's reports: (k, terms), plus
+    # each term's occurrences in live reports; works in blocks so no array spans every entry
+    def _term_sums(self, weights):
+        sums = np.zeros((len(weights), len(self.terms)))
+        occurrences = np.zeros(len(self.terms))
+        for start in range(0, len(self.ids), SCORE_BLOCK):
+            stop = min(start + SCORE_BLOCK, len(self.ids))
+            first, last = self.indptr[start], self.indptr[stop]
+            rows = np.repeat(np.arange(start, stop), np.diff(self.indptr[start:stop + 1]))
+            indices = self.indices[first:last]
+            for k, weight in enumerate(weights):
+                sums[k] += np.bincount(indices, weights=weight[rows], minlength=len(self.terms))
+            occurrences += np.bincount(indices, weights=self.counts[first:last] * self.alive[rows],
+                                       minlength=len(self.terms))
+        return sums, occurrences
+
+    # Results are memoized per rating and threshold until the matrix changes
+    def _cached(self, name, key, compute):
+        key = (name, self.revision, self.change_revision) + key
+        result = self._results.get(key)
+        if result is None:
+            result = self._results[key] = compute()
+        return result
+
+    # Function to score how strongly each term goes with low ratings on one scale (SERVICE or a
+    # handbook criterion): among rated reports, the share of low ratings with the term against the
+    # share without it, as a smoothed log odds ratio and its z score. Terms in fewer than
+    # min_reports rated reports are left out; the frame is sorted by z, most associated first.
+    def associations(self, rating=SERVICE, low=None, min_reports=20):
+        def compute():
+            import pandas as pd
+
+            if rating == SERVICE:
+                values, rated = self.service, (self.service > 0) & self.alive
+                threshold = LOW_SERVICE if low is None else low
+            else:
+                values = self.ratings[:, HANDBOOK_CRITERIA.index(rating)]
+                rated = self.rated & self.alive
+                threshold = LOW_CRITERION if low is None else low
+            is_low = rated & (values <= threshold)
+            (reports, rated_reports, low_reports, rating_sums), occurrences = self._term_sums(
+                [self.alive.astype(float), rated.astype(float), is_low.astype(float), values * rated]
+            )
+            total_rated, total_low = rated.sum(), is_low.sum()
+            # 2x2 table per term: low / not low, with / without the term; +0.5 keeps empty cells finite
+            a = low_reports + 0.5
+            b = rated_reports - low_reports + 0.5
+            c = total_low - low_reports + 0.5
+            d = (total_rated - total_low) - (rated_reports - low_reports) + 0.5
+            log_odds = np.log(a * d / (b * c))
+            z = log_odds / np.sqrt(1 / a + 1 / b + 1 / c + 1 / d)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                share = low_reports / rated_reports
+                frame = pd.DataFrame({
+                    "Term": self.terms,
+                    "Reports": reports.astype(np.int64),
+                    "Occurrences": occurrences.astype(np.int64),
+                    "Rated reports": rated_reports.astype(np.int64),
+                    "Low-rated reports": low_reports.astype(np.int64),
+                    "Low-rated share": share,
+                    "Lift": share / (total_low / total_rated) if total_low else np.nan,
+                    "Mean rating": rating_sums / rated_reports,
+                    "Log odds (low)": log_odds,
+                    "z": z,
+                })
+            frame = frame[frame["Rated reports"] >= min_reports]
+            return frame.sort_values("z", ascending=False, kind="stable").reset_index(drop=True)
+
+        # Under the lock, so a refresh from another session cannot change the arrays mid-score
+        with self._lock:
+            return self._cached("associations", (rating, low, min_reports), compute)
+
+    # Function to write the matrix to a snapshot file (compacted first), replacing it atomically
+    def save(self, path=DEFAULT_INDEX_PATH):
+        with self._lock:
+            self._compact()
+            partial = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(
+                partial,
+                ids=self.ids, service=self.service, rated=self.rated, ratings=self.ratings,
+                indptr=self.indptr, indices=self.indices, counts=self.counts,
+                terms=np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8),
+                revisions=np.array([self.revision, self.change_revision], dtype=np.int64),
+            )
+            os.replace(partial, path)
+
+    # Load a snapshot written by save(); an empty index when there is none yet
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        with np.load(path) as snapshot:
+            for name in ("ids", "service", "rated", "ratings", "indptr", "indices", "counts"):
+                setattr(index, name, snapshot[name])
+            index.revision, index.change_revision = snapshot["revisions"].tolist()
+            terms = snapshot["terms"].tobytes().decode("utf-8").split("\n") if snapshot["terms"].size else []
+        index.alive = np.ones(len(index.ids), dtype=bool)
+        for term in terms:
+            # A phrase's words were always added before the phrase
+            first, _, second = term.partition(" ")
+            index.vocabulary[(index.vocabulary[first], index.vocabulary[second]) if second else term]
+        index._label_new_terms(0)
+        return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+# Function to get the process-wide text index: loaded from its snapshot once, then refreshed
+def get_text_index(store, path=DEFAULT_INDEX_PATH):
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TextIndex.load(path)
+    _index.refresh(store)
+    return _index
+
+
+def main(argv=None):
+    from submission_store import DEFAULT_STORE_PATH, SubmissionStore
+
+    parser = argparse.ArgumentParser(
+        description="Tokenize the stored narratives and write the terms most associated with low ratings as CSV."
+    )
+    parser.add_argument("output", help="CSV file to write, or - for stdout")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="snapshot of the term-document matrix")
+    parser.add_argument("--rating", default=SERVICE, choices=(SERVICE, *HANDBOOK_CRITERIA))
+    parser.add_argument("--low", type=int, help=f"highest low rating (default {LOW_SERVICE} for service, "
+                                                f"{LOW_CRITERION} for a criterion)")
+    parser.add_argument("--min-reports", type=int, default=20)
+    parser.add_argument("--top", type=int, help="keep only the first N terms")
+    args = parser.parse_args(argv)
+
+    store = SubmissionStore(args.store)
+    start = time.perf_counter()
+    index = TextIndex.load(args.index)
+    loaded = time.perf_counter()
+    tokenized = index.refresh(store)
+    refreshed = time.perf_counter()
+    if tokenized:
+        index.save(args.index)
+    frame = index.associations(args.rating, args.low, args.min_reports)
+    if args.top:
+        frame = frame.head(args.top)
+    frame.to_csv(sys.stdout if args.output == "-" else args.output, index=False)
+    print(f"{len(index)} reports, {len(index.terms)} terms, {len(index.indices)} entries; snapshot loaded in "
+          f"{loaded - start:.1f} s, {tokenized} reports tokenized in {refreshed - loaded:.1f} s, "
+          f"scored in {time.perf_counter() - refreshed:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
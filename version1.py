@@ -1,51 +1,22 @@
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-from fpdf import FPDF
-
-# Code of Conduct items
-code_of_conduct_items = [
-    "The Customer Code of Conduct and Employee Code of Conduct documents must be clearly posted in various, easy-to-view locations in all Resource Areas.",
-    "All resource area staff will read the employee pledge found on the Employee Code of Conduct and will strive each day to provide service in accordance with the Employee Code of Conduct.",
-    "The Customer Code of Conduct and Employee Code of Conduct may not be changed or modified by WFC staff or managers or by partner employees.",
-    "The Customer Code of Conduct and Employee Code of Conduct are accessible to customers using a screen reader.",
-    "WFCs that previously used the Policy Acknowledgment Form may ask customers to sign the Customer Code of Conduct. It is optional.",
-    "If staff observe a customer on an inappropriate website that was not caught by the web-blocking software, submit a Web Blocking Request.",
-    "All WorkForce Center managers, reception staff, and Resource Area staff must be familiar with the Violations Table and Corrective Actions document.",
-    "The Notice of Suspension from Resource Area document must be used for all suspensions greater than one day and less than six months.",
-    "For all suspensions greater than six months, a letter will be mailed to the customer from the WorkForce Development Division Director.",
-    "If law enforcement are contacted during an incident at the WorkForce Center, a Violence/Threat Report Form must be completed and submitted to the DEED HR Safety Officer.",
-    "The Violence/Threat Report Form is required for all incidents involving theft, property damage, or violence.",
-    "An Incident Log must be kept up to date and submitted to the WorkForce Development Division Equal Opportunity Officer at the close of each state fiscal year or upon request.",
-    "Mandatory training on various policies and forms will be provided to all resource area staff and managers."
-]
-
-# Function to convert the dataframe to a CSV
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-# Function to generate a PDF
-class PDF(FPDF):
-    def __init__(self):
-        super().__init__()
-        # Set left and right margins to 10% of the page width (A4 width is 210mm, so 21mm margins)
-        self.set_left_margin(21)  # 10% of 210mm
-        self.set_right_margin(21)  # 10% of 210mm
-
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'Blue Earth County Career Workforce Center Experience', 0, 1, 'C')
-
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(4)
-
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 12)
-        self.multi_cell(0, 10, body)
-        self.ln()
-
+from conduct_catalog import CURRENT_CATALOG, catalog_items, conduct_items, conduct_mask
+from instrumentation import rerun_timer, timed
+from csv_export import record_csv
+from render_jobs import pdf_class, pdf_download_button
+from roster import get_roster
+from write_queue import save_report
+
+# Code of Conduct items offered on the form
+code_of_conduct_items = catalog_items()
+
+# Function to convert the report data (or, as before, a DataFrame of it) to a CSV
+def convert_df_to_csv(data):
+    if hasattr(data, "to_csv"):
+        return data.to_csv(index=False).encode('utf-8')
+    return record_csv(data)
+
+# Function to generate a PDF (sections of this form, mixed into ReportPDF on the first render)
+class PDF:
     def add_experience(self, data):
         self.chapter_title("Name")
         self.chapter_body(data['Name'][0])
@@ -79,32 +50,22 @@ class PDF(FPDF):
 
         # Add selected Code of Conduct items
         self.chapter_title("Selected Code of Conduct Items")
-        if data['Selected Code of Conduct']:
-            for item in data['Selected Code of Conduct'][0]:
-                self.chapter_body(item)
+        for item in conduct_items(data['Code of Conduct Mask'][0]):
+            self.static_body(item)
 
+@timed("download_pdf")
 def download_pdf(data):
-    pdf = PDF()
+    pdf = pdf_class(PDF)(data)
     pdf.add_page()
     pdf.add_experience(data)
 
-    # Create a BytesIO buffer to store the PDF
-    pdf_output = BytesIO()
-
-    # Save the PDF into the BytesIO buffer by using 'S' to output as string
-    pdf_str = pdf.output(dest='S').encode('latin1')
-
-    # Write the PDF string to the BytesIO buffer
-    pdf_output.write(pdf_str)
-
-    # Move the buffer pointer to the beginning
-    pdf_output.seek(0)
-
-    # Return the buffer content as bytes
-    return pdf_output.read()
+    # Return the PDF as bytes
+    return pdf.output_bytes()
 
 # Main function to run the app
 def init_main():
+    timer = rerun_timer()
+
     # Title of the app
     st.title("Blue Earth County Career Workforce Center")
 
@@ -124,7 +85,7 @@ def init_main():
     )
 
     # Dropdown for selecting a name
-    name = st.selectbox("Select your name", ["LeRoy", "Danielle", "Sarah"])
+    name = st.selectbox("Select your name", get_roster().names())
 
     # Input for customer service experience (quantitative)
     customer_service_rating = st.slider("Rate the customer service experience (1-5)", 1, 5)
@@ -151,6 +112,8 @@ def init_main():
     # Input for general notes regarding the experience
     experience_notes = st.text_area("Any other notes regarding the experience")
 
+    timer.mark("widgets")
+
     # Save data into a dictionary
     data = {
         "Name": [name],
@@ -163,14 +126,15 @@ def init_main():
         "Prescribed Activities": [prescribed_activities],
         "Prescribed Notes": [prescribed_notes],
         "Experience Notes": [experience_notes],
-        "Selected Code of Conduct": [selected_conduct]
+        # Selected items as a bitmask over the versioned catalog; decoded again for the PDF
+        "Code of Conduct Mask": [conduct_mask(selected_conduct)],
+        "Conduct Catalog": [CURRENT_CATALOG]
     }
-
-    # Convert the data into a DataFrame
-    df = pd.DataFrame(data)
+    timer.mark("data_dict")
 
     # Button to download data as CSV
-    csv = convert_df_to_csv(df)
+    csv = convert_df_to_csv(data)
+    timer.mark("convert_df_to_csv")
     st.download_button(
         label="Download data as CSV",
         data=csv,
@@ -178,15 +142,21 @@ def init_main():
         mime='text/csv',
     )
 
-    # Button to download data as PDF
-    pdf = download_pdf(data)
-    st.download_button(
+    # PDF download, rendered in the background once requested and shown as pending until it is ready
+    pdf_download_button(
+        "version1", data, download_pdf,
         label="Download data as PDF",
-        data=pdf,
         file_name='blue_earth_county_experience.pdf',
-        mime='application/octet-stream'
     )
 
+    timer.mark("download_buttons")
+
+    # Save the report to the shared submission store
+    if st.button("Save report"):
+        save_report(data, "version1")
+
+    timer.finish()
+
 # Run the app
 if __name__ == '__main__':
     init_main()
@@ -1,33 +1,17 @@
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-from fpdf import FPDF
-
-# Function to convert the dataframe to a CSV
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-# Function to generate a PDF
-class PDF(FPDF):
-    def __init__(self):
-        super().__init__()
-        self.set_left_margin(21)
-        self.set_right_margin(21)
-
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'Blue Earth County Career Workforce Center Experience', 0, 1, 'C')
-
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(4)
-
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 12)
-        self.multi_cell(0, 10, body)
-        self.ln()
-
+from instrumentation import rerun_timer, timed
+from csv_export import record_csv
+from render_jobs import pdf_class, pdf_download_button
+from write_queue import save_report
+
+# Function to convert the report data (or, as before, a DataFrame of it) to a CSV
+def convert_df_to_csv(data):
+    if hasattr(data, "to_csv"):
+        return data.to_csv(index=False).encode('utf-8')
+    return record_csv(data)
+
+# Function to generate a PDF (sections of this form, mixed into ReportPDF on the first render)
+class PDF:
     def add_experience(self, data):
         self.chapter_title("Customer Service Rating")
         self.chapter_body(str(data['Customer Service Rating'][0]))
@@ -56,20 +40,19 @@ class PDF(FPDF):
         self.chapter_title("Experience Notes")
         self.chapter_body(data['Experience Notes'][0])
 
+@timed("download_pdf")
 def download_pdf(data):
-    pdf = PDF()
+    pdf = pdf_class(PDF)(data)
     pdf.add_page()
     pdf.add_experience(data)
 
-    pdf_output = BytesIO()
-    pdf_str = pdf.output(dest='S').encode('latin1')
-    pdf_output.write(pdf_str)
-    pdf_output.seek(0)
-
-    return pdf_output.read()
+    # Return the PDF as bytes
+    return pdf.output_bytes()
 
 # Main function to run the app
 def init_main():
+    timer = rerun_timer()
+
     st.title("Blue Earth County Career Workforce Center")
 
     st.markdown(
@@ -90,6 +73,8 @@ def init_main():
     prescribed_notes = st.text_area("Any notes regarding the prescribed activities")
     experience_notes = st.text_area("Any other notes regarding the experience")
 
+    timer.mark("widgets")
+
     data = {
         "Customer Service Rating": [customer_service_rating],
         "Customer Service Feedback": [customer_service_feedback],
@@ -101,10 +86,10 @@ def init_main():
         "Prescribed Notes": [prescribed_notes],
         "Experience Notes": [experience_notes]
     }
+    timer.mark("data_dict")
 
-    df = pd.DataFrame(data)
-
-    csv = convert_df_to_csv(df)
+    csv = convert_df_to_csv(data)
+    timer.mark("convert_df_to_csv")
     st.download_button(
         label="Download data as CSV",
         data=csv,
@@ -112,13 +97,20 @@ def init_main():
         mime='text/csv',
     )
 
-    pdf = download_pdf(data)
-    st.download_button(
+    # PDF download, rendered in the background once requested and shown as pending until it is ready
+    pdf_download_button(
+        "version3", data, download_pdf,
         label="Download data as PDF",
-        data=pdf,
         file_name='blue_earth_county_experience.pdf',
-        mime='application/octet-stream'
     )
 
+    timer.mark("download_buttons")
+
+    # Save the report to the shared submission store
+    if st.button("Save report"):
+        save_report(data, "version3")
+
+    timer.finish()
+
 if __name__ == '__main__':
     init_main()
@@ -1,80 +1,68 @@
+import os
 import streamlit as st
-import pandas as pd
-from io import BytesIO
-from fpdf import FPDF
-
-# Function to convert the dataframe to a CSV
-def convert_df_to_csv(df):
-    return df.to_csv(index=False).encode('utf-8')
-
-# Function to generate a PDF
-class PDF(FPDF):
-    def __init__(self):
-        super().__init__()
-        self.set_left_margin(21)
-        self.set_right_margin(21)
-
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'Blue Earth County Career Workforce Center Experience', 0, 1, 'C')
-
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(4)
-
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 12)
-        self.multi_cell(0, 10, body)
-        self.ln()
-
-    def add_experience(self, data):
-        for key, value in data.items():
-            self.chapter_title(key)
-            self.chapter_body(value)
+from instrumentation import rerun_timer, timed
+from csv_export import record_csv
+from render_jobs import pdf_class, pdf_download_button
+from roster import get_roster
+from session_budget import session_artifacts
+from write_queue import save_report
+
+# Submit the report inputs as one batch (set BEC_BATCH_SUBMIT=0 to rerun on every edit)
+BATCH_SUBMIT = os.environ.get("BEC_BATCH_SUBMIT", "1") != "0"
+
+# Criteria from Employee Handbook for grading
+handbook_criteria = [
+    "Act Professional and with Integrity",
+    "Treat all people with respect",
+    "Develop and maintain positive relationships",
+    "Handle situations with integrity",
+    "Maintain confidences and share credit",
+    "Provide Customer Service",
+    "Greet customers positively",
+    "Provide timely and courteous assistance",
+    "Communicate clearly",
+    "Actively listen and respond with empathy",
+    "Ensure customer satisfaction",
+    "Ask for feedback from customers",
+    "Contribute to Organizational Goals",
+    "Adjust positively to changes",
+    "Support organizational goals",
+    "Identify self-development areas"
+]
+
+# Function to convert the report data (or, as before, a DataFrame of it) to a CSV
+def convert_df_to_csv(data):
+    if hasattr(data, "to_csv"):
+        return data.to_csv(index=False).encode('utf-8')
+    return record_csv(data)
+
+# Function to generate a PDF (sections of this form, mixed into ReportPDF on the first render)
+class PDF:
+    pass
 
 # Function to generate PDF from data
+@timed("download_pdf")
 def download_pdf(data):
-    pdf = PDF()
+    pdf = pdf_class(PDF)(data)
     pdf.add_page()
     pdf.add_experience(data)
 
-    pdf_output = BytesIO()
-    pdf_str = pdf.output(dest='S').encode('latin1')
-    pdf_output.write(pdf_str)
-    pdf_output.seek(0)
-
-    return pdf_output.read()
-
-# Main function to run the app
-def init_main():
-    st.title("Blue Earth County Career Workforce Center")
-
-    st.markdown(
-        '[Visit the Minnesota Department of Employment and Economic Development (DEED) website](https://mn.gov/deed/)'
-    )
-    st.markdown(
-        '[View the Workforce Development Policy](https://apps.deed.state.mn.us/ddp/PolicyDetail.aspx?pol=469)'
-    )
-
-    # Customer experience inputs
-    customer_service_rating = st.slider("Rate the customer service experience (1-5)", 1, 5)
-    customer_service_feedback = st.text_area("Provide your qualitative feedback on the customer service experience")
-    experience_date = st.date_input("Select the day of the experience")
-
-    # Manual time input
-    st.markdown("#### Select the time of the experience (manually enter hours and minutes)")
-    experience_hour = st.number_input("Enter hour (0-23)", min_value=0, max_value=23, value=12, step=1)
-    experience_minute = st.number_input("Enter minute (0-59)", min_value=0, max_value=59, value=0, step=1)
-    experience_time = f"{experience_hour:02}:{experience_minute:02}"
-
-    employee_activities = st.text_area("Describe the activities of the employees at the Career Workforce Center")
-    actual_experience = st.text_area("Describe what actually happened during your experience")
-    prescribed_activities = st.text_area("Describe any activities prescribed by the employees")
-    prescribed_notes = st.text_area("Any notes regarding the prescribed activities")
-    experience_notes = st.text_area("Any other notes regarding the experience")
-
-    # Section for adding employee names
+    # Return the PDF as bytes
+    return pdf.output_bytes()
+
+# Function to add a name to the report, spelled as on the shared roster (new names join the roster)
+def add_employee_name(name):
+    name = get_roster().add(name)
+    if name is None:
+        return
+    if name in st.session_state.employee_names:
+        st.info(f"Employee '{name}' is already added.")
+        return
+    st.session_state.employee_names.append(name)
+    st.success(f"Employee '{name}' added!")
+
+# Section for adding employee names
+def employee_roster():
     st.subheader("Enter Employee Names Involved in the Experience")
 
     if "employee_names" not in st.session_state:
@@ -84,74 +72,129 @@ def init_main():
     add_employee_button = st.button("Add Employee")
 
     if add_employee_button and new_employee_name:
-        st.session_state.employee_names.append(new_employee_name)
-        st.success(f"Employee '{new_employee_name}' added!")
+        add_employee_name(new_employee_name)
+    elif new_employee_name:
+        # Names on the roster matching what was typed, or spelled like it when none match
+        roster = get_roster()
+        suggestions = roster.suggest(new_employee_name)
+        if suggestions:
+            st.caption("Names on the roster:")
+        else:
+            suggestions = roster.fuzzy(new_employee_name)
+            if suggestions:
+                st.caption("Did you mean:")
+        for name in suggestions:
+            if st.button(name, key=f"roster-{name}"):
+                add_employee_name(name)
 
     if st.session_state.employee_names:
         st.markdown("### Employees Involved:")
         for i, name in enumerate(st.session_state.employee_names):
             st.write(f"{i + 1}. {name}")
 
-    # Criteria from Employee Handbook for grading
-    handbook_criteria = [
-        "Act Professional and with Integrity",
-        "Treat all people with respect",
-        "Develop and maintain positive relationships",
-        "Handle situations with integrity",
-        "Maintain confidences and share credit",
-        "Provide Customer Service",
-        "Greet customers positively",
-        "Provide timely and courteous assistance",
-        "Communicate clearly",
-        "Actively listen and respond with empathy",
-        "Ensure customer satisfaction",
-        "Ask for feedback from customers",
-        "Contribute to Organizational Goals",
-        "Adjust positively to changes",
-        "Support organizational goals",
-        "Identify self-development areas"
-    ]
-
-    st.subheader("Evaluate CareerForce Employee Performance")
-    employee_ratings = {criterion: st.slider(f"{criterion}", 0, 10, 5) for criterion in handbook_criteria}
-
-    # Prepare data for export
-    data = {
-        "Customer Service Rating": str(customer_service_rating),
-        "Customer Service Feedback": customer_service_feedback,
-        "Experience Date": str(experience_date),
-        "Experience Time": str(experience_time),
-        "Employee Activities": employee_activities,
-        "Actual Experience": actual_experience,
-        "Prescribed Activities": prescribed_activities,
-        "Prescribed Notes": prescribed_notes,
-        "Experience Notes": experience_notes,
-        "Employee Names": ", ".join(st.session_state.employee_names) if st.session_state.employee_names else "None"
-    }
-
-    # Append employee ratings to data
-    data.update({f"Rating - {criterion}": str(rating) for criterion, rating in employee_ratings.items()})
-
-    # Create a DataFrame
-    df = pd.DataFrame([data])
-
-    # CSV download
-    csv = convert_df_to_csv(df)
+# Main function to run the app
+def init_main():
+    timer = rerun_timer()
+
+    st.title("Blue Earth County Career Workforce Center")
+
+    st.markdown(
+        '[Visit the Minnesota Department of Employment and Economic Development (DEED) website](https://mn.gov/deed/)'
+    )
+    st.markdown(
+        '[View the Workforce Development Policy](https://apps.deed.state.mn.us/ddp/PolicyDetail.aspx?pol=469)'
+    )
+
+    # Employee roster stays interactive outside the form
+    roster = st.fragment(employee_roster) if BATCH_SUBMIT else employee_roster
+    roster()
+
+    # Report inputs are committed together when the form is submitted
+    form = st.form("experience_form") if BATCH_SUBMIT else st.container()
+    with form:
+        # Customer experience inputs
+        customer_service_rating = st.slider("Rate the customer service experience (1-5)", 1, 5)
+        customer_service_feedback = st.text_area("Provide your qualitative feedback on the customer service experience")
+        experience_date = st.date_input("Select the day of the experience")
+
+        # Manual time input
+        st.markdown("#### Select the time of the experience (manually enter hours and minutes)")
+        experience_hour = st.number_input("Enter hour (0-23)", min_value=0, max_value=23, value=12, step=1)
+        experience_minute = st.number_input("Enter minute (0-59)", min_value=0, max_value=59, value=0, step=1)
+        experience_time = f"{experience_hour:02}:{experience_minute:02}"
+
+        employee_activities = st.text_area("Describe the activities of the employees at the Career Workforce Center")
+        actual_experience = st.text_area("Describe what actually happened during your experience")
+        prescribed_activities = st.text_area("Describe any activities prescribed by the employees")
+        prescribed_notes = st.text_area("Any notes regarding the prescribed activities")
+        experience_notes = st.text_area("Any other notes regarding the experience")
+
+        st.subheader("Evaluate CareerForce Employee Performance")
+        employee_ratings = {criterion: st.slider(f"{criterion}", 0, 10, 5) for criterion in handbook_criteria}
+
+        if BATCH_SUBMIT:
+            submitted = st.form_submit_button("Submit report")
+        else:
+            submitted = st.button("Submit report")
+
+    timer.mark("widgets")
+
+    # Run the export pipeline only for a submitted report (on every rerun without the form)
+    if submitted or not BATCH_SUBMIT:
+        # Prepare data for export
+        data = {
+            "Customer Service Rating": str(customer_service_rating),
+            "Customer Service Feedback": customer_service_feedback,
+            "Experience Date": str(experience_date),
+            "Experience Time": str(experience_time),
+            "Employee Activities": employee_activities,
+            "Actual Experience": actual_experience,
+            "Prescribed Activities": prescribed_activities,
+            "Prescribed Notes": prescribed_notes,
+            "Experience Notes": experience_notes,
+            "Employee Names": ", ".join(st.session_state.employee_names) if st.session_state.employee_names else "None"
+        }
+
+        # Append employee ratings to data
+        data.update({f"Rating - {criterion}": str(rating) for criterion, rating in employee_ratings.items()})
+        timer.mark("data_dict")
+
+        # The CSV is kept with the session's artifacts, which spill it to disk while the tab is idle
+        st.session_state.report = {"data": data}
+        session_artifacts().put("csv", convert_df_to_csv(data))
+        timer.mark("convert_df_to_csv")
+
+        # Save the submitted report to the shared submission store, with the names as a list so
+        # that a name containing a comma stays one employee; reruns without a submit never save
+        if submitted:
+            save_report({**data, "Employee Names": list(st.session_state.employee_names)}, "version5")
+            timer.mark("save_report")
+
+    if "report" not in st.session_state:
+        st.info("Submit the report to enable the downloads.")
+        timer.finish()
+        return
+    data = st.session_state.report["data"]
+
+    # CSV download, read from the session's artifacts when clicked
     st.download_button(
         label="Download data as CSV",
-        data=csv,
+        data=session_artifacts().loader("csv", lambda: convert_df_to_csv(data)),
         file_name='blue_earth_county_experience.csv',
         mime='text/csv',
     )
 
-    # PDF download
-    pdf = download_pdf(data)
-    st.download_button(
+    # PDF download, rendered in the background from the submit (or once requested) and shown as
+    # pending until it is ready
+    pdf_download_button(
+        "version5", data, download_pdf,
         label="Download data as PDF",
-        data=pdf,
         file_name='blue_earth_county_experience.pdf',
-        mime='application/octet-stream'
+        start=submitted,
     )
 
+    timer.mark("download_buttons")
+    timer.finish()
+
 if __name__ == '__main__':
     init_main()
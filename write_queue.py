@@ -0,0 +1,151 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import instrumentation
+from experience_record import employee_names
+from roster import remember_names
+
+# submission_store, and numpy with it, is imported with the first save rather than with the forms
+
+# Saves go through one writer thread per process unless BEC_WRITE_QUEUE=0 (then each session writes itself)
+QUEUED_WRITES = os.environ.get("BEC_WRITE_QUEUE", "1") == "1"
+# Reports waiting for the writer before submit() pushes back on the caller
+MAX_PENDING = int(os.environ.get("BEC_WRITE_QUEUE_SIZE", 1000))
+# Most reports the writer commits in one transaction
+BATCH_SIZE = int(os.environ.get("BEC_WRITE_BATCH", 500))
+# Seconds the writer waits for more reports before committing a short batch (0: commit what is queued)
+LINGER = float(os.environ.get("BEC_WRITE_LINGER", 0))
+# Seconds a session waits for queue space, and then for its commit, before giving up
+SUBMIT_TIMEOUT = float(os.environ.get("BEC_WRITE_TIMEOUT", 10))
+
+_STOP = object()
+
+
+# Raised when the queue stays full for the whole submit timeout
+class WriterBusy(RuntimeError):
+    pass
+
+
+# Single writer for a store: sessions enqueue normalized rows and get a future that resolves to the
+# report's id once its transaction has committed
+class WriteQueue:
+    def __init__(self, store, max_pending=MAX_PENDING, batch_size=BATCH_SIZE, linger=LINGER):
+        self.store = store
+        self.batch_size = batch_size
+        self.linger = linger
+        self.batches = 0
+        self.written = 0
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name="store-writer", daemon=True)
+        self._thread.start()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # Function to queue one report; blocks while the queue is full, up to timeout seconds
+    def submit(self, data, version, timeout=SUBMIT_TIMEOUT):
+        from submission_store import INSERT_COLUMNS, normalize_record
+
+        # Normalizing here surfaces bad input in the submitting session, not in the writer
+        row = normalize_record(data, version)
+        future = Future()
+        try:
+            self._queue.put((tuple(row[column] for column in INSERT_COLUMNS), future), timeout=timeout)
+        except queue.Full:
+            raise WriterBusy(f"{self._queue.maxsize} reports are already waiting to be saved") from None
+        return future
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.linger
+            stop = False
+            # Group commit: everything that queued up during the previous transaction goes in this one
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0)) if self.linger \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        try:
+            ids = self.store.insert_rows([values for values, _ in batch])
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0][1].set_exception(error)
+                return
+            # One bad row must not fail the reports queued next to it
+            for item in batch:
+                self._commit([item])
+            return
+        for (_, future), submission_id in zip(batch, ids):
+            future.set_result(submission_id)
+        self.batches += 1
+        self.written += len(batch)
+        if instrumentation.ENABLED:
+            instrumentation.registry.observe("store_write_batch", time.perf_counter() - start)
+            instrumentation.registry.set_gauge("bec_write_queue_pending", self.pending())
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+# Function to get the process-wide write queue in front of the shared store
+def get_write_queue():
+    from submission_store import get_store
+
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteQueue(get_store())
+        return _queue
+
+
+# Function to save a report and return its id once committed; raises WriterBusy when the queue stays
+# full, TimeoutError when the report is queued but not yet committed after timeout seconds
+def commit_report(data, version, timeout=SUBMIT_TIMEOUT):
+    if not QUEUED_WRITES:
+        from submission_store import get_store
+
+        submission_id = get_store().add(data, version)
+    else:
+        submission_id = get_write_queue().submit(data, version, timeout).result(timeout)
+    # The store has put the report's employees on its roster; this process's roster follows
+    remember_names(employee_names(data))
+    return submission_id
+
+
+# Function to save a report from a Streamlit session and say whether it was committed
+def save_report(data, version, timeout=SUBMIT_TIMEOUT):
+    import streamlit as st
+
+    try:
+        submission_id = commit_report(data, version, timeout)
+    except WriterBusy:
+        st.warning("Many reports are being saved right now. Please press the button again in a moment.")
+        return None
+    except TimeoutError:
+        st.warning("The report is queued but has not been saved yet. Please check again in a moment.")
+        return None
+    st.success("Report saved.")
+    return submission_id